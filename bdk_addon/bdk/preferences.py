@@ -1,14 +1,15 @@
 from bpy.types import AddonPreferences, Context
-from bpy.props import CollectionProperty, IntProperty, BoolProperty, StringProperty
+from bpy.props import CollectionProperty, IntProperty, BoolProperty, StringProperty, EnumProperty
 
 from .operators import BDK_OT_print_umodel_version
 
 from .repository.properties import BDK_PG_repository
 from .repository.ui import BDK_UL_repositories, BDK_UL_repository_packages, BDK_MT_repository_special, \
-    BDK_MT_repository_add, BDK_MT_repository_remove, BDK_UL_repository_rules, BDK_MT_repositories_special
+    BDK_MT_repository_add, BDK_MT_repository_remove, BDK_UL_repository_rules, BDK_MT_repositories_special, \
+    BDK_UL_repository_package_telemetry
 from ..bdk.repository.operators import BDK_OT_repository_scan, \
     BDK_OT_repository_build_asset_library, BDK_OT_repository_rule_add, \
-    BDK_OT_repository_rule_remove, BDK_OT_repository_rule_move
+    BDK_OT_repository_rule_remove, BDK_OT_repository_rule_move, BDK_OT_repository_telemetry_export
 
 
 class BdkAddonPreferences(AddonPreferences):
@@ -23,6 +24,19 @@ class BdkAddonPreferences(AddonPreferences):
     developer_extras: BoolProperty(name='Developer Extras', default=False,
                                    description='Enable developer extras such as debug panels and operators')
 
+    material_animation_mode: EnumProperty(
+        name='Material Animation',
+        items=(
+            ('DRIVERS', 'Drivers', 'Animate each material (e.g., panners, rotators and oscillators) with its own '
+                                   'drivers'),
+            ('SHARED_TIME', 'Shared Time', 'Animate materials from a single shared scene time node group, so that '
+                                           'the number of driver evaluations does not grow with the number of animated '
+                                           'materials'),
+        ),
+        default='DRIVERS',
+        description='How the animation of imported materials is driven'
+    )
+
     def draw(self, context: Context):
         layout = self.layout
 
@@ -112,6 +126,19 @@ class BdkAddonPreferences(AddonPreferences):
                     op = col.operator(BDK_OT_repository_rule_move.bl_idname, icon='TRIA_DOWN', text='')
                     op.direction = 'DOWN'
 
+                if repository.runtime.has_been_scanned:
+                    telemetry_header, telemetry_panel = repositories_panel.panel('Telemetry', default_closed=True)
+                    telemetry_header.label(text='Slowest Packages')
+
+                    if telemetry_panel is not None:
+                        row = telemetry_panel.row()
+                        row.template_list(BDK_UL_repository_package_telemetry.bl_idname, '',
+                                          repository.runtime, 'packages',
+                                          repository.runtime, 'telemetry_packages_index',
+                                          rows=5)
+                        col = row.column(align=True)
+                        col.operator(BDK_OT_repository_telemetry_export.bl_idname, icon='EXPORT', text='')
+
                 paths_header, paths_panel = repositories_panel.panel('Paths', default_closed=True)
                 paths_header.label(text='Paths')
 
@@ -146,6 +173,8 @@ class BdkAddonPreferences(AddonPreferences):
                     op = row.operator('wm.path_open', icon='FILE_FOLDER', text='')
                     op.filepath = repository.cache_directory
 
+        layout.prop(self, 'material_animation_mode')
+
         layout.prop(self, 'developer_extras')
 
         if self.developer_extras:
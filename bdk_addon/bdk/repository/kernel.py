@@ -1,23 +1,27 @@
 import fnmatch
+import hashlib
 from uuid import uuid5, NAMESPACE_OID
-from datetime import datetime
+from datetime import datetime, timedelta
 import sys
 
 import bpy
 import os.path
 import subprocess
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from configparser import NoOptionError
-from glob import glob
+from time import perf_counter
 
 import networkx
 from bpy.types import Context
 
 from .properties import BDK_PG_repository, BDK_PG_repository_package
+from .scanner import DirectoryScanCache, compile_fnmatch_pattern, scan_package_patterns
+from .scheduler import condense_dependency_cycles
 from pathlib import Path
 
 from ...data import UReference
-from ...helpers import get_addon_preferences
+from ...helpers import get_addon_preferences, invalidate_package_blend_file_indices
 from ...io.config import ConfigParserMultiOpt
 import json
 
@@ -88,10 +92,60 @@ def read_repository_package_patterns(game_directory: Path, mod: str | None) -> l
 
 
 class Manifest:
+    class PackageDependencies:
+        """
+        The packages imported by a package file, keyed by the size and modified time of the file when it was read.
+        """
+        def __init__(self, size: int, modified_time: int, packages: list[str]):
+            self.size = size
+            self.modified_time = modified_time
+            self.packages = packages
+
+    class PackageContentHash:
+        """
+        The content hash of a package file, keyed by the size and modified time of the file when it was hashed.
+        """
+        def __init__(self, size: int, modified_time: int, hash_: str):
+            self.size = size
+            self.modified_time = modified_time
+            self.hash = hash_
+
+    class PackageExportTelemetry:
+        """
+        Measurements of the last export of a package.
+        """
+        def __init__(self, duration: float, peak_memory: int | None, file_count: int):
+            # Wall time in seconds.
+            self.duration = duration
+            # Peak resident memory of the export process in bytes, if known.
+            self.peak_memory = peak_memory
+            self.file_count = file_count
+
+    class PackageBuildTelemetry:
+        """
+        Measurements of the last build of a package.
+        """
+        def __init__(self, duration: float, peak_memory: int | None, asset_size: int):
+            # Wall time in seconds.
+            self.duration = duration
+            # Peak resident memory of the build process in bytes, if known.
+            self.peak_memory = peak_memory
+            # Size of the package's .blend file in bytes.
+            self.asset_size = asset_size
+
     class Package:
         def __init__(self):
             self.exported_time: datetime | None = None
             self.build_time: datetime | None = None
+            self.dependencies: Manifest.PackageDependencies | None = None
+            # The most recently computed content hash of the package file.
+            self.content_hash: Manifest.PackageContentHash | None = None
+            # The content hash of the package file when it was last exported.
+            self.exported_content_hash: str | None = None
+            # The hash of the output of the last export.
+            self.export_hash: str | None = None
+            self.export_telemetry: Manifest.PackageExportTelemetry | None = None
+            self.build_telemetry: Manifest.PackageBuildTelemetry | None = None
 
     def __init__(self, path: str):
         self.path = path
@@ -107,6 +161,8 @@ class Manifest:
         package = self.packages.setdefault(package_path, Manifest.Package())
         package.exported_time = None
         package.build_time = None
+        package.exported_content_hash = None
+        package.export_hash = None
         package.status = 'NEEDS_EXPORT'
 
     def invalidate_package_assets(self, package_path: str):
@@ -114,16 +170,60 @@ class Manifest:
         package.build_time = None
         package.status = 'NEEDS_BUILD'
 
-    def mark_package_as_exported(self, package_path: str):
+    def mark_package_as_exported(self, package_path: str, content_hash: PackageContentHash | None = None,
+                                 export_hash: str | None = None,
+                                 export_telemetry: PackageExportTelemetry | None = None):
         package = self.packages.setdefault(package_path, Manifest.Package())
         package.exported_time = datetime.utcnow()
+        if export_telemetry is not None:
+            package.export_telemetry = export_telemetry
+        if content_hash is not None:
+            package.content_hash = content_hash
+            package.exported_content_hash = content_hash.hash
+        package.export_hash = export_hash
         package.status = 'NEEDS_BUILD'
 
-    def mark_package_as_built(self, package_path: str):
+    def mark_package_as_built(self, package_path: str, build_telemetry: PackageBuildTelemetry | None = None):
         package = self.packages.setdefault(package_path, Manifest.Package())
         package.build_time = datetime.utcnow()
+        if build_telemetry is not None:
+            package.build_telemetry = build_telemetry
         package.status = 'UP_TO_DATE'
 
+    def get_package_dependencies(self, package_path: str, size: int, modified_time: int) -> list[str] | None:
+        """
+        Returns the cached dependencies of the package, or None if they have not been cached or the package file has
+        changed since they were read.
+        """
+        package = self.packages.get(package_path, None)
+        if package is None or package.dependencies is None:
+            return None
+        dependencies = package.dependencies
+        if dependencies.size != size or dependencies.modified_time != modified_time:
+            return None
+        return dependencies.packages
+
+    def set_package_dependencies(self, package_path: str, size: int, modified_time: int, packages: list[str]):
+        package = self.packages.setdefault(package_path, Manifest.Package())
+        package.dependencies = Manifest.PackageDependencies(size, modified_time, packages)
+
+    def get_package_content_hash(self, package_path: str, size: int, modified_time: int) -> str | None:
+        """
+        Returns the cached content hash of the package, or None if it has not been cached or the package file has
+        changed since it was hashed.
+        """
+        package = self.packages.get(package_path, None)
+        if package is None or package.content_hash is None:
+            return None
+        content_hash = package.content_hash
+        if content_hash.size != size or content_hash.modified_time != modified_time:
+            return None
+        return content_hash.hash
+
+    def set_package_content_hash(self, package_path: str, content_hash: PackageContentHash):
+        package = self.packages.setdefault(package_path, Manifest.Package())
+        package.content_hash = content_hash
+
     # Read and write the manifest to a JSON file.
     @staticmethod
     def from_file(path: Path):
@@ -139,6 +239,36 @@ class Manifest:
                     build_time = package_data.get('build_time', None)
                     if isinstance(build_time, str):
                         package.build_time = datetime.fromisoformat(build_time)
+                    dependencies = package_data.get('dependencies', None)
+                    if isinstance(dependencies, dict):
+                        package.dependencies = Manifest.PackageDependencies(
+                            size=dependencies['size'],
+                            modified_time=dependencies['modified_time'],
+                            packages=dependencies['packages'],
+                        )
+                    content_hash = package_data.get('content_hash', None)
+                    if isinstance(content_hash, dict):
+                        package.content_hash = Manifest.PackageContentHash(
+                            size=content_hash['size'],
+                            modified_time=content_hash['modified_time'],
+                            hash_=content_hash['hash'],
+                        )
+                    package.exported_content_hash = package_data.get('exported_content_hash', None)
+                    package.export_hash = package_data.get('export_hash', None)
+                    export_telemetry = package_data.get('export_telemetry', None)
+                    if isinstance(export_telemetry, dict):
+                        package.export_telemetry = Manifest.PackageExportTelemetry(
+                            duration=export_telemetry['duration'],
+                            peak_memory=export_telemetry['peak_memory'],
+                            file_count=export_telemetry['file_count'],
+                        )
+                    build_telemetry = package_data.get('build_telemetry', None)
+                    if isinstance(build_telemetry, dict):
+                        package.build_telemetry = Manifest.PackageBuildTelemetry(
+                            duration=build_telemetry['duration'],
+                            peak_memory=build_telemetry['peak_memory'],
+                            asset_size=build_telemetry['asset_size'],
+                        )
         return manifest
 
     @staticmethod
@@ -146,75 +276,306 @@ class Manifest:
         return Manifest.from_file(get_repository_manifest_path(repository))
 
     def write(self):
+        def package_to_dict(package: Manifest.Package) -> dict:
+            package_data = {
+                'exported_time': package.exported_time.isoformat() if package.exported_time is not None else None,
+                'build_time': package.build_time.isoformat() if package.build_time is not None else None,
+            }
+            if package.dependencies is not None:
+                package_data['dependencies'] = {
+                    'size': package.dependencies.size,
+                    'modified_time': package.dependencies.modified_time,
+                    'packages': package.dependencies.packages,
+                }
+            if package.content_hash is not None:
+                package_data['content_hash'] = {
+                    'size': package.content_hash.size,
+                    'modified_time': package.content_hash.modified_time,
+                    'hash': package.content_hash.hash,
+                }
+            if package.exported_content_hash is not None:
+                package_data['exported_content_hash'] = package.exported_content_hash
+            if package.export_hash is not None:
+                package_data['export_hash'] = package.export_hash
+            if package.export_telemetry is not None:
+                package_data['export_telemetry'] = {
+                    'duration': package.export_telemetry.duration,
+                    'peak_memory': package.export_telemetry.peak_memory,
+                    'file_count': package.export_telemetry.file_count,
+                }
+            if package.build_telemetry is not None:
+                package_data['build_telemetry'] = {
+                    'duration': package.build_telemetry.duration,
+                    'peak_memory': package.build_telemetry.peak_memory,
+                    'asset_size': package.build_telemetry.asset_size,
+                }
+            return package_data
+
         data = {
             'packages': {
-                package_name: {
-                    'exported_time': package.exported_time.isoformat() if package.exported_time is not None else None,
-                    'build_time': package.build_time.isoformat() if package.build_time is not None else None,
-                }
+                package_name: package_to_dict(package)
                 for package_name, package in self.packages.items()
             }
         }
         # Make sure the directory exists.
         Path(self.path).parent.mkdir(parents=True, exist_ok=True)
-        with open(self.path, 'w') as f:
+        # NOTE: The manifest is written to a temporary file first and then moved into place, since the manifest is
+        #  written while build processes may be reading it.
+        temporary_path = f'{self.path}.tmp'
+        with open(temporary_path, 'w') as f:
             json.dump(data, f, indent=2)
+        os.replace(temporary_path, self.path)
+
+        # The packages that have asset libraries may have changed.
+        invalidate_package_blend_file_indices()
+
+
+def get_file_content_hash(path: str | Path, hash_=None) -> str:
+    """
+    Returns a fast hash of the contents of a file.
+    """
+    if hash_ is None:
+        hash_ = hashlib.blake2b(digest_size=16)
+    buffer = bytearray(1024 * 1024)
+    view = memoryview(buffer)
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            size = f.readinto(buffer)
+            if not size:
+                break
+            hash_.update(view[:size])
+    return hash_.hexdigest()
+
+
+def get_package_content_hash(path: str | Path) -> Manifest.PackageContentHash:
+    """
+    Hashes the contents of a package file, keyed by the size and modified time of the file.
+    """
+    # NOTE: The file is stat'ed before it is hashed so that if it is modified while it is being hashed, the modified
+    #  time will not match on the next scan and the file will be hashed again.
+    stat = os.stat(path)
+    return Manifest.PackageContentHash(stat.st_size, stat.st_mtime_ns, get_file_content_hash(path))
+
+
+def get_directory_content_hash(directory: Path) -> str | None:
+    """
+    Returns a hash of the names and contents of all the files in a directory, or None if the directory does not exist.
+    """
+    if not directory.is_dir():
+        return None
+    hash_ = hashlib.blake2b(digest_size=16)
+    for file_path in sorted(file_path for file_path in directory.rglob('*') if file_path.is_file()):
+        hash_.update(file_path.relative_to(directory).as_posix().encode())
+        hash_.update(bytes.fromhex(get_file_content_hash(file_path)))
+    return hash_.hexdigest()
+
+
+def get_directory_file_count(directory: Path) -> int:
+    """
+    Returns the number of files in a directory and all of its subdirectories.
+    """
+    return sum(len(file_names) for _, _, file_names in os.walk(directory))
 
 
 def get_repository_manifest_path(repository: BDK_PG_repository) -> Path:
     return get_repository_cache_directory(repository) / 'manifest.json'
 
 
-def update_repository_runtime(repository: BDK_PG_repository):
+def get_repository_scan_cache_path(repository: BDK_PG_repository) -> Path:
+    return get_repository_cache_directory(repository) / 'scan.json'
+
+
+def update_repository_runtime(repository: BDK_PG_repository, use_scan_cache: bool = True):
+    """
+    Scans the repository for packages and updates their status from the manifest.
+    If `use_scan_cache` is True, directories that have not changed since the last scan are not listed again. Packages
+    in those directories are still stat'ed, so packages that were modified in-place are detected.
+    """
+    timings: dict[str, float] = dict()
+    time = perf_counter()
+
     repository.runtime.package_patterns.clear()
     repository.runtime.packages.clear()
 
     manifest = Manifest.from_repository(repository)
+    package_patterns = [str(pattern) for pattern in
+                        read_repository_package_patterns(Path(repository.game_directory), repository.mod)]
+
+    timings['read'] = perf_counter() - time
+    time = perf_counter()
+
+    scan_cache_path = get_repository_scan_cache_path(repository)
+    scan_cache = DirectoryScanCache.from_file(scan_cache_path) if use_scan_cache else DirectoryScanCache(scan_cache_path)
+    scan_result = scan_package_patterns(package_patterns, scan_cache)
+    try:
+        scan_cache.write()
+    except OSError:
+        # The scan cache is an optimization, so failing to write it is not fatal.
+        pass
+
+    timings['scan'] = perf_counter() - time
+    time = perf_counter()
+
+    game_directory = Path(repository.game_directory).resolve()
 
-    for pattern in read_repository_package_patterns(Path(repository.game_directory), repository.mod):
+    # NOTE: The package patterns are already resolved, so the package paths do not need to be resolved again.
+    package_relative_paths = [Path(package_path).relative_to(game_directory).as_posix()
+                              for package_path, _, _ in scan_result.packages]
+
+    # Hash the packages that have been touched since they were last hashed. Packages that have never been exported (or
+    # that were exported before content hashes were recorded) will be exported anyway, so they are not hashed.
+    packages_to_hash = []
+    for (package_path, size, modified_time_ns), package_relative_path in zip(scan_result.packages,
+                                                                            package_relative_paths):
+        if not manifest.has_package(package_relative_path):
+            continue
+        if manifest.get_package(package_relative_path).exported_content_hash is None:
+            continue
+        if manifest.get_package_content_hash(package_relative_path, size, modified_time_ns) is None:
+            packages_to_hash.append((package_path, package_relative_path))
+
+    if packages_to_hash:
+        with ThreadPoolExecutor() as executor:
+            content_hashes = executor.map(get_package_content_hash,
+                                          [package_path for package_path, _ in packages_to_hash])
+            for (_, package_relative_path), content_hash in zip(packages_to_hash, content_hashes):
+                manifest.set_package_content_hash(package_relative_path, content_hash)
+        manifest.write()
+
+    timings['hash'] = perf_counter() - time
+    time = perf_counter()
+
+    for pattern in package_patterns:
         package_pattern = repository.runtime.package_patterns.add()
-        package_pattern.pattern = str(pattern)
-
-    for package_pattern in repository.runtime.package_patterns:
-        for package_path in glob(package_pattern.pattern):
-            index = len(repository.runtime.packages)
-            package = repository.runtime.packages.add()
-            package.repository_id = repository.id
-            package.index = index
-            package.path = Path(package_path).resolve().relative_to(
-                Path(repository.game_directory).resolve()).as_posix()
-            package.filename = Path(package_path).name
-
-            # Get the modified time of the package file.
-            modified_time = datetime.fromtimestamp(os.path.getmtime(package_path))
-            package.modified_time = int(modified_time.timestamp())
-
-            if manifest.has_package(package.path):
-                # Get the modified time of the package from the manifest.
-                exported_time = None
-                if manifest.has_package(package.path):
-                    manifest_package = manifest.get_package(package.path)
-                    exported_time = manifest_package.exported_time
-                package.exported_time = int(exported_time.timestamp()) if exported_time is not None else 0
-
-                build_time = None
-                # Make sure the package actually exists in the repository cache.
-                if manifest.has_package(package.path) and get_repository_package_asset_path(repository,
-                                                                                            package.path).is_file():
-                    manifest_package = manifest.get_package(package.path)
-                    build_time = manifest_package.build_time
-                package.build_time = int(build_time.timestamp()) if build_time is not None else 0
-
-                # If the package has been exported more recently than the package file has been modified, mark it as
-                # up-to-date.
-                if exported_time is None or modified_time > exported_time:
+        package_pattern.pattern = pattern
+
+    # List the contents of each asset directory once, instead of checking for each package's asset file individually.
+    asset_directory_file_names: dict[Path, set[str]] = dict()
+
+    def is_package_asset_file(package_path: str) -> bool:
+        asset_path = get_repository_package_asset_path(repository, package_path)
+        file_names = asset_directory_file_names.get(asset_path.parent, None)
+        if file_names is None:
+            try:
+                with os.scandir(asset_path.parent) as it:
+                    file_names = {entry.name for entry in it if entry.is_file()}
+            except FileNotFoundError:
+                file_names = set()
+            asset_directory_file_names[asset_path.parent] = file_names
+        return asset_path.name in file_names
+
+    for (package_path, size, modified_time_ns), package_relative_path in zip(scan_result.packages,
+                                                                            package_relative_paths):
+        index = len(repository.runtime.packages)
+        package = repository.runtime.packages.add()
+        package.repository_id = repository.id
+        package.index = index
+        package.path = package_relative_path
+        package.filename = os.path.basename(package_path)
+
+        # Get the modified time of the package file.
+        modified_time = datetime.fromtimestamp(modified_time_ns / 1e9)
+        package.modified_time = int(modified_time.timestamp())
+
+        if manifest.has_package(package.path):
+            # Get the modified time of the package from the manifest.
+            manifest_package = manifest.get_package(package.path)
+            exported_time = manifest_package.exported_time
+            package.exported_time = int(exported_time.timestamp()) if exported_time is not None else 0
+
+            build_time = None
+            # Make sure the package actually exists in the repository cache.
+            if is_package_asset_file(package.path):
+                build_time = manifest_package.build_time
+            package.build_time = int(build_time.timestamp()) if build_time is not None else 0
+
+            export_telemetry = manifest_package.export_telemetry
+            build_telemetry = manifest_package.build_telemetry
+            package.has_telemetry = export_telemetry is not None or build_telemetry is not None
+            peak_memory = 0
+            if export_telemetry is not None:
+                package.export_duration = export_telemetry.duration
+                package.exported_file_count = export_telemetry.file_count
+                peak_memory = max(peak_memory, export_telemetry.peak_memory or 0)
+            if build_telemetry is not None:
+                package.build_duration = build_telemetry.duration
+                package.asset_size = build_telemetry.asset_size / 1024 ** 2
+                peak_memory = max(peak_memory, build_telemetry.peak_memory or 0)
+            package.peak_memory = peak_memory / 1024 ** 2
+
+            if manifest_package.exported_content_hash is not None:
+                # Compare the contents of the package with the contents when it was last exported, so that packages
+                # that were touched, copied or checked out without being changed are not exported again.
+                content_hash = manifest.get_package_content_hash(package.path, size, modified_time_ns)
+                if exported_time is None or content_hash != manifest_package.exported_content_hash:
                     package.status = 'NEEDS_EXPORT'
-                elif build_time is None or modified_time > build_time:
+                elif build_time is None or build_time < exported_time:
                     package.status = 'NEEDS_BUILD'
                 else:
                     package.status = 'UP_TO_DATE'
-            else:
+            # If the package has been exported more recently than the package file has been modified, mark it as
+            # up-to-date.
+            elif exported_time is None or modified_time > exported_time:
                 package.status = 'NEEDS_EXPORT'
+            elif build_time is None or modified_time > build_time:
+                package.status = 'NEEDS_BUILD'
+            else:
+                package.status = 'UP_TO_DATE'
+        else:
+            package.status = 'NEEDS_EXPORT'
+
+    timings['update'] = perf_counter() - time
+
+    print(f'Scanned {len(scan_result.packages)} packages in {sum(timings.values()):.3f}s ('
+          + ', '.join(f'{phase}: {duration:.3f}s' for phase, duration in timings.items())
+          + f'), listed {scan_result.directory_count} directories, '
+            f'{scan_result.skipped_directory_count} unchanged directories skipped')
+
+
+def get_repository_package_telemetry_rows(repository: BDK_PG_repository) -> list[dict]:
+    """
+    Returns the export and build telemetry of each package in the manifest that has any, as a list of flat rows.
+    Durations are in seconds and sizes are in bytes.
+    """
+    manifest = Manifest.from_repository(repository)
+    rows = []
+    for package_path, package in sorted(manifest.packages.items()):
+        export_telemetry = package.export_telemetry
+        build_telemetry = package.build_telemetry
+        if export_telemetry is None and build_telemetry is None:
+            continue
+        rows.append({
+            'package': package_path,
+            'exported_time': package.exported_time.isoformat() if package.exported_time is not None else None,
+            'export_duration': export_telemetry.duration if export_telemetry is not None else None,
+            'export_peak_memory': export_telemetry.peak_memory if export_telemetry is not None else None,
+            'exported_file_count': export_telemetry.file_count if export_telemetry is not None else None,
+            'build_time': package.build_time.isoformat() if package.build_time is not None else None,
+            'build_duration': build_telemetry.duration if build_telemetry is not None else None,
+            'build_peak_memory': build_telemetry.peak_memory if build_telemetry is not None else None,
+            'asset_size': build_telemetry.asset_size if build_telemetry is not None else None,
+        })
+    return rows
+
+
+def repository_telemetry_write(repository: BDK_PG_repository, path: Path, format_: str):
+    """
+    Writes the package telemetry of the repository to a CSV or JSON file.
+    """
+    rows = get_repository_package_telemetry_rows(repository)
+    match format_:
+        case 'CSV':
+            import csv
+            with open(path, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()) if rows else ['package'])
+                writer.writeheader()
+                writer.writerows(rows)
+        case 'JSON':
+            with open(path, 'w') as f:
+                json.dump({'repository_id': repository.id, 'time': datetime.now().isoformat(), 'packages': rows}, f,
+                          indent=2)
+        case _:
+            raise ValueError(f'Unsupported telemetry format: {format_}')
 
 
 def repository_runtime_update_aggregate_stats(repository: BDK_PG_repository):
@@ -249,29 +610,37 @@ def repository_runtime_packages_update_rule_exclusions(repository):
     """
     Apply the rules to the packages in the repository.
     """
-    # Clear the exclusion flags.
-    for package in repository.runtime.packages:
-        package.is_excluded_by_rule = False
+    time = perf_counter()
+
+    # Evaluate the rules on plain Python data, since accessing the properties of the packages is relatively slow.
+    package_paths = [package.path for package in repository.runtime.packages]
+    is_excluded = [False] * len(package_paths)
 
     # Apply the rules to the packages.
     for rule in filter(lambda x: not x.mute, repository.rules):
         match rule.type:
             case 'EXCLUDE':
-                for package in repository.runtime.packages:
-                    if fnmatch.fnmatch(package.path, rule.pattern):
-                        package.is_excluded_by_rule = True
+                match_function = compile_fnmatch_pattern(rule.pattern)
+                for index, package_path in enumerate(package_paths):
+                    if not is_excluded[index] and match_function(package_path):
+                        is_excluded[index] = True
             case 'INCLUDE':
-                for package in filter(lambda x: x.is_excluded_by_rule, repository.runtime.packages):
-                    if fnmatch.fnmatch(package.path, rule.pattern):
-                        package.is_excluded_by_rule = False
+                match_function = compile_fnmatch_pattern(rule.pattern)
+                for index, package_path in enumerate(package_paths):
+                    if is_excluded[index] and match_function(package_path):
+                        is_excluded[index] = False
+
+    for package, package_is_excluded in zip(repository.runtime.packages, is_excluded):
+        package.is_excluded_by_rule = package_is_excluded
+
+    print(f'Applied rules to {len(package_paths)} packages in {perf_counter() - time:.3f}s')
 
     repository_runtime_update_aggregate_stats(repository)
 
 
-def repository_runtime_update(repository: BDK_PG_repository):
-    update_repository_runtime(repository)
+def repository_runtime_update(repository: BDK_PG_repository, use_scan_cache: bool = True):
+    update_repository_runtime(repository, use_scan_cache)
     repository_runtime_packages_update_rule_exclusions(repository)
-    repository_runtime_update_aggregate_stats(repository)
     repository.runtime.has_been_scanned = True
 
 
@@ -289,6 +658,11 @@ def repository_cache_delete(repository: BDK_PG_repository):
     if manifest_path.exists():
         manifest_path.unlink()
 
+    # Delete the scan cache file.
+    scan_cache_path = cache_directory / 'scan.json'
+    if scan_cache_path.exists():
+        scan_cache_path.unlink()
+
     # Delete the exports and assets directories.
     exports_directory = cache_directory / 'exports'
     if exports_directory.exists():
@@ -416,10 +790,13 @@ def repository_remove(context: Context, repositories_index: int):
 def get_repository_package_dependency_graph(repository: BDK_PG_repository) -> networkx.DiGraph:
     """
     Returns the dependency graph of the packages in the repository.
-    Note that cycles are removed from the graph by severing all the edges that create the cycle. This is done to ensure
-    that the graph is a Directed Acyclic Graph (DAG) which is required for topological sorting.
+    Note that cycles are removed from the graph by condensing the packages that form each cycle into a single unit (see
+    `condense_dependency_cycles`). This is done to ensure that the graph is a Directed Acyclic Graph (DAG) which is
+    required for topological sorting. The packages that formed each cycle are stored in `graph.graph['cycles']`.
     Note that the names of the packages are converted to uppercase for comparison since Unreal packages (and all names
     in Unreal) are case-insensitive.
+    The dependencies of each package are cached in the manifest, keyed by the size and modified time of the package
+    file, so that only packages that have changed since the last build need to be read.
     """
     from ...package.reader import read_package_dependencies
     import networkx
@@ -430,23 +807,49 @@ def get_repository_package_dependency_graph(repository: BDK_PG_repository) -> ne
         package_name = os.path.splitext(os.path.basename(package.path))[0].upper()
         graph.add_node(package_name)
 
+    manifest = Manifest.from_repository(repository)
+    cache_hit_count = 0
+    cache_miss_count = 0
+    read_duration = timedelta()
+    time = datetime.now()
+
     for package in repository.runtime.packages:
         package_name = os.path.splitext(os.path.basename(package.path))[0].upper()
         package_path = Path(repository.game_directory) / package.path
-        # TODO: Reading these from the packages is expensive, especially with lots of packages. We should cache this
-        #  information in the manifest.
-        dependencies = read_package_dependencies(str(package_path))
+        stat = os.stat(package_path)
+        dependencies = manifest.get_package_dependencies(package.path, stat.st_size, stat.st_mtime_ns)
+        if dependencies is None:
+            read_time = datetime.now()
+            dependencies = sorted(read_package_dependencies(str(package_path)))
+            read_duration += datetime.now() - read_time
+            manifest.set_package_dependencies(package.path, stat.st_size, stat.st_mtime_ns, dependencies)
+            cache_miss_count += 1
+        else:
+            cache_hit_count += 1
         for dependency in dependencies:
             dependency = dependency.upper()
             graph.add_edge(package_name, dependency)
 
-    # Find any cycles in the graph and remove them.
-    cycles = list(networkx.simple_cycles(graph))
-    edges = set()
-    for cycle in cycles:
-        edges |= set([(cycle[i], cycle[i + 1]) for i in range(len(cycle) - 1)] + [(cycle[-1], cycle[0])])
-    for u, v in edges:
-        graph.remove_edge(u, v)
+    if cache_miss_count > 0:
+        manifest.write()
+
+    package_count = cache_hit_count + cache_miss_count
+    if package_count > 0:
+        # Estimate the time saved by the cache hits using the average time it took to read a package.
+        estimated_time_saved = (read_duration / cache_miss_count) * cache_hit_count if cache_miss_count > 0 else None
+        print(f'Package dependencies: {cache_hit_count}/{package_count} cache hits '
+              f'({cache_hit_count / package_count:.1%}), {cache_miss_count} packages read in {read_duration}, '
+              f'total {datetime.now() - time}' +
+              (f', estimated {estimated_time_saved} saved' if estimated_time_saved is not None else ''))
+
+    # Break the cycles in the graph by condensing each group of packages that depend on each other into one unit.
+    time = datetime.now()
+    cycles = condense_dependency_cycles(graph)
+    if cycles:
+        print(f'Found {len(cycles)} package dependency cycles in {datetime.now() - time}:')
+        for cycle in cycles:
+            print(f'  {len(cycle)} packages: {", ".join(cycle)}')
+    graph.graph['cycles'] = cycles
 
     return graph
 
@@ -497,7 +900,15 @@ def get_umodel_path() -> Path:
             raise ValueError(f'Unhandled platform "{sys.platform}"')
 
 
-def build_cube_map(cube_map_file_path: Path, exports_directory: Path):
+class CubeMapResult:
+    def __init__(self, cube_map_file_path: Path, output_path: Path, success: bool, error: str | None = None):
+        self.cube_map_file_path = cube_map_file_path
+        self.output_path = output_path
+        self.success = success
+        self.error = error
+
+
+def get_cube_map_face_paths(cube_map_file_path: Path, exports_directory: Path) -> list[Path]:
     import re
     with open(cube_map_file_path, 'r') as f:
         contents = f.read()
@@ -507,7 +918,34 @@ def build_cube_map(cube_map_file_path: Path, exports_directory: Path):
             face_reference = UReference.from_string(texture)
             image_path = exports_directory / face_reference.type_name / f'{face_reference.object_name}.tga'
             face_paths.append(image_path)
-        output_path = cube_map_file_path.parent / cube_map_file_path.name.replace('.props.txt', '.png')
+        return face_paths
+
+
+def get_cube_map_output_path(cube_map_file_path: Path) -> Path:
+    return cube_map_file_path.parent / cube_map_file_path.name.replace('.props.txt', '.png')
+
+
+def _build_cube_map_batch(cube_maps: list[tuple[Path, Path]]) -> list[CubeMapResult]:
+    """
+    Converts a batch of cube maps to equirectangular images in a single Blender process.
+    """
+    import tempfile
+
+    face_names = ['front', 'back', 'right', 'left', 'top', 'bottom']
+    jobs = []
+    for cube_map_file_path, exports_directory in cube_maps:
+        face_paths = get_cube_map_face_paths(cube_map_file_path, exports_directory)
+        jobs.append({
+            'faces': {face_name: str(face_path) for face_name, face_path in zip(face_names, face_paths)},
+            'output': str(get_cube_map_output_path(cube_map_file_path)),
+        })
+
+    with tempfile.TemporaryDirectory() as temp_directory:
+        jobs_path = Path(temp_directory) / 'jobs.json'
+        results_path = Path(temp_directory) / 'results.json'
+        with open(jobs_path, 'w') as f:
+            json.dump(jobs, f)
+
         cube2sphere_blend_path = get_addon_path() / 'bin' / 'cube2sphere.blend'
         cube2sphere_script_path = get_addon_path() / 'bin' / 'cube2sphere.py'
         args = [
@@ -516,15 +954,109 @@ def build_cube_map(cube_map_file_path: Path, exports_directory: Path):
             '--background',
             '--python',
             cube2sphere_script_path,
-            '--'
+            '--',
+            '--jobs', str(jobs_path),
+            '--results', str(results_path),
         ]
-        face_args =['front', 'back', 'right', 'left', 'top', 'bottom']
-        for face_arg, face_path in zip(face_args, face_paths):
-            args.extend([f'--{face_arg}', str(face_path)])
-        args.extend(['--output', str(output_path)])
         process = subprocess.run(args, capture_output=True)
-        print(process.stdout.decode())
-        return process, output_path
+
+        if results_path.is_file():
+            with open(results_path, 'r') as f:
+                results = json.load(f)
+        else:
+            # The process failed before it could write the results, so every cube map in the batch has failed.
+            try:
+                error = process.stderr.decode().strip()
+            except UnicodeDecodeError:
+                error = ''
+            error = error or f'Blender exited with code {process.returncode}'
+            results = [{'success': False, 'error': error}] * len(jobs)
+
+    return [CubeMapResult(cube_map_file_path, get_cube_map_output_path(cube_map_file_path), result['success'],
+                          result['error'])
+            for (cube_map_file_path, _), result in zip(cube_maps, results)]
+
+
+def build_cube_maps(cube_maps: list[tuple[Path, Path]], max_workers: int = 1) -> list[CubeMapResult]:
+    """
+    Converts cube maps to equirectangular images.
+    Each cube map is a tuple of the cube map's .props.txt file path and the exports directory of its package.
+    Rather than starting a Blender process for each cube map, the cube maps are split into at most `max_workers`
+    batches, each of which is converted in a single Blender process.
+    """
+    if not cube_maps:
+        return []
+
+    batch_count = max(1, min(max_workers, len(cube_maps)))
+    batches = [cube_maps[i::batch_count] for i in range(batch_count)]
+
+    if batch_count == 1:
+        return _build_cube_map_batch(batches[0])
+
+    results = []
+    with ThreadPoolExecutor(max_workers=batch_count) as executor:
+        for batch_results in executor.map(_build_cube_map_batch, batches):
+            results.extend(batch_results)
+    return results
+
+
+def get_repository_package_cube_map_file_paths(repository: BDK_PG_repository, package_path: str) -> list[Path]:
+    package_exports_directory = get_repository_package_export_directory(repository, package_path)
+    return list(package_exports_directory.glob('**/Cubemap/*.props.txt'))
+
+
+def write_cube_map_results_to_log(results: list[CubeMapResult], log_path: Path):
+    """
+    Appends the errors of any cube maps that failed to convert to the log file.
+    """
+    failed_results = [result for result in results if not result.success]
+    if not failed_results:
+        return
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(log_path, 'a') as f:
+        f.write('\n' + '=' * 80 + '\n')
+        f.write('cubemaps\n')
+        f.write('=' * 80 + '\n\n')
+        for result in failed_results:
+            f.write(f'Failed to convert {result.cube_map_file_path.name}: {result.error}\n')
+
+
+def get_repository_package_export_log_path(repository: BDK_PG_repository, package_path: str) -> Path:
+    package_filename = os.path.splitext(os.path.basename(package_path))[0]
+    return get_repository_cache_directory(repository) / 'exports' / 'logs' / f'{package_filename}.log'
+
+
+def _get_windows_process_peak_memory(process_handle: int) -> int | None:
+    # The build script is only imported here, since it is otherwise run in its own Blender process.
+    from ...bin.blend import get_windows_process_memory_counters
+    # The counters are all zero if they could not be queried.
+    return get_windows_process_memory_counters(process_handle).PeakWorkingSetSize or None
+
+
+def run_process_with_peak_memory(args: list[str]) -> tuple[subprocess.CompletedProcess, int | None]:
+    """
+    Runs a process to completion with its output captured, like `subprocess.run(args, capture_output=True)`.
+    Returns the completed process and the peak resident memory of the process in bytes, or None if it is unknown.
+    """
+    import tempfile
+
+    # NOTE: The output is written to temporary files rather than pipes, since the process is reaped manually below
+    #  (which `Popen.communicate` would otherwise do).
+    with tempfile.TemporaryFile() as stdout, tempfile.TemporaryFile() as stderr:
+        popen = subprocess.Popen(args, stdout=stdout, stderr=stderr)
+        if sys.platform == 'win32':
+            popen.wait()
+            # The process handle stays open until the Popen object is destroyed, so it can still be queried.
+            peak_memory = _get_windows_process_peak_memory(int(popen._handle))
+        else:
+            # Reap the process with `wait4` instead of `Popen.wait` to get the resource usage of the process.
+            _, status, resource_usage = os.wait4(popen.pid, 0)
+            popen.returncode = os.waitstatus_to_exitcode(status)
+            # NOTE: `ru_maxrss` is in bytes on macOS and in kilobytes elsewhere.
+            peak_memory = resource_usage.ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+        stdout.seek(0)
+        stderr.seek(0)
+        return subprocess.CompletedProcess(args, popen.returncode, stdout.read(), stderr.read()), peak_memory
 
 
 def write_process_log_to_file(process: subprocess.CompletedProcess, log_path: Path):
@@ -548,7 +1080,15 @@ def write_process_log_to_file(process: subprocess.CompletedProcess, log_path: Pa
             f.write('Failed to decode stderr')
 
 
-def repository_package_export(repository: BDK_PG_repository, package: BDK_PG_repository_package):
+def repository_package_export(repository: BDK_PG_repository, package: BDK_PG_repository_package,
+                              should_build_cube_maps: bool = True):
+    """
+    Exports the contents of the package with umodel.
+    Returns the process, the package, the content hash of the package file, the hash of the export output and the
+    telemetry of the export.
+    If `should_build_cube_maps` is False, the caller is responsible for converting the cube maps of the package (e.g.,
+    by batching the cube maps of multiple packages with `build_cube_maps`).
+    """
     cache_directory = Path(repository.cache_directory).resolve()
     game_directory = Path(repository.game_directory).resolve()
     exports_directory = cache_directory / repository.id / 'exports'
@@ -563,27 +1103,40 @@ def repository_package_export(repository: BDK_PG_repository, package: BDK_PG_rep
         if process.returncode == 0:
             raise PermissionError('umodel executable is not be made executable')
 
+    # Hash the package before exporting it, so that if it changes during the export, it will be exported again.
+    content_hash = get_package_content_hash(package_path)
+
     args = [umodel_path, '-export', '-nolinked', f'-out="{package_build_directory}"',
             f'-path="{repository.game_directory}"', str(package_path)]
-    process = subprocess.run(args, capture_output=True)
-
-    log_directory = get_repository_cache_directory(repository) / 'exports' / 'logs' / f'{package_path.stem}.log'
-    write_process_log_to_file(process, log_directory)
+    time = perf_counter()
+    process, peak_memory = run_process_with_peak_memory(args)
+    duration = perf_counter() - time
 
-    # Build any cube maps that were exported.
-    cubemap_file_paths = []
+    log_path = get_repository_package_export_log_path(repository, package.path)
+    write_process_log_to_file(process, log_path)
 
     package_exports_directory = Path(package_build_directory) / os.path.splitext(package.filename)[0]
 
-    for cubemap_file_path in Path(package_exports_directory).glob('**/Cubemap/*.props.txt'):
-        cubemap_file_paths.append(cubemap_file_path)
+    # NOTE: The export hash is computed before the cube maps are converted, since the converted images are derived
+    #  entirely from the exported faces.
+    export_hash = get_directory_content_hash(package_exports_directory) if process.returncode == 0 else None
 
-    if cubemap_file_paths:
-        print(f'Building {len(cubemap_file_paths)} cubemaps in {package.filename}')
-        for cubemap_file_path in cubemap_file_paths:
-            process, _ = build_cube_map(cubemap_file_path, package_exports_directory)
+    file_count = get_directory_file_count(package_exports_directory) if process.returncode == 0 else 0
+    export_telemetry = Manifest.PackageExportTelemetry(duration, peak_memory, file_count)
 
-    return process, package
+    if process.returncode == 0 and should_build_cube_maps:
+        # Build any cube maps that were exported.
+        cube_maps = [(cube_map_file_path, package_exports_directory) for cube_map_file_path in
+                     package_exports_directory.glob('**/Cubemap/*.props.txt')]
+        if cube_maps:
+            print(f'Building {len(cube_maps)} cubemaps in {package.filename}')
+            cube_map_results = build_cube_maps(cube_maps)
+            write_cube_map_results_to_log(cube_map_results, log_path)
+            if not all(result.success for result in cube_map_results):
+                process = subprocess.CompletedProcess(process.args, 1, process.stdout, process.stderr)
+            export_telemetry.duration = perf_counter() - time
+
+    return process, package, content_hash, export_hash, export_telemetry
 
 
 def get_repository_cache_directory(repository: BDK_PG_repository) -> Path:
@@ -624,30 +1177,54 @@ def get_repository_package_catalog_id(repository: BDK_PG_repository, package_pat
     return str(uuid5(NAMESPACE_OID, repository.id + package_path))
 
 
-def repository_package_build(repository: BDK_PG_repository, package_path: str):
+def get_repository_package_build_log_path(repository: BDK_PG_repository, package_path: str) -> Path:
+    assets_directory = get_repository_package_asset_directory(repository, package_path)
+    package_filename = os.path.splitext(os.path.basename(package_path))[0]
+    return assets_directory / 'logs' / f'{package_filename}.log'
+
+
+def get_repository_build_worker_log_path(repository: BDK_PG_repository, worker_index: int) -> Path:
+    return get_repository_cache_directory(repository) / 'logs' / 'workers' / f'worker_{worker_index}.log'
+
+
+def get_package_build_telemetry(asset_path: Path, duration: float, peak_memory: int | None) \
+        -> Manifest.PackageBuildTelemetry:
+    try:
+        asset_size = os.path.getsize(asset_path)
+    except OSError:
+        asset_size = 0
+    return Manifest.PackageBuildTelemetry(duration, peak_memory, asset_size)
+
+
+def repository_package_build(repository: BDK_PG_repository, package_path: str, incremental: bool = False):
+    """
+    Builds the asset library of the package in a new Blender process.
+    If `incremental` is True, the existing .blend file of the package is updated, and only the assets that were added
+    or changed since it was last built are imported.
+    """
     # TODO: do not allow this if the package is not up-to-date.
     script_path = get_addon_path() / 'bin' / 'blend.py'
 
     # TODO: Refactor this to have just one function that takes the repository and package as arguments.
     input_directory = get_repository_package_export_directory(repository, package_path)
-    assets_directory = get_repository_package_asset_directory(repository, package_path)
     output_path = get_repository_package_asset_path(repository, package_path)
     catalog_id = get_repository_package_catalog_id(repository, package_path)
 
-    # TODO: It is relative expensive to spin up an entire Blender instance for each package build. We should consider
-    #  refactoring this so that package builds are dispatched to a pool of processes. This would likely be faster, but
-    #  would add quite a bit of complexity.
+    # NOTE: Spinning up an entire Blender instance for each package build is relatively expensive. Bulk builds should
+    #  use the PackageBuildWorkerPool instead, which dispatches builds to a pool of long-lived Blender processes.
     args = [
         bpy.app.binary_path, '--background', '--python', str(script_path), '--',
         'build', str(input_directory), repository.id, catalog_id, '--output_path', str(output_path)
     ]
+    if incremental:
+        args.append('--incremental')
 
-    process = subprocess.run(args, capture_output=True)
+    time = perf_counter()
+    process, peak_memory = run_process_with_peak_memory(args)
+    build_telemetry = get_package_build_telemetry(output_path, perf_counter() - time, peak_memory)
 
-    log_directory = assets_directory / 'logs'
-    log_directory.mkdir(parents=True, exist_ok=True)
-    package_filename = os.path.splitext(os.path.basename(package_path))[0]
-    log_path = log_directory / f'{package_filename}.log'
+    log_path = get_repository_package_build_log_path(repository, package_path)
+    log_path.parent.mkdir(parents=True, exist_ok=True)
 
     with open(str(log_path), 'w') as f:
         f.write('=' * 80 + '\n')
@@ -661,4 +1238,4 @@ def repository_package_build(repository: BDK_PG_repository, package_path: str):
         f.write('=' * 80 + '\n\n')
         f.write(process.stderr.decode())
 
-    return process, package_path
+    return process, package_path, build_telemetry
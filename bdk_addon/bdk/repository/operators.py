@@ -2,22 +2,28 @@ import bpy
 import json
 import os
 import uuid
+import subprocess
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
+from time import perf_counter
 
 from bpy.props import StringProperty, IntProperty, EnumProperty, BoolProperty
 from bpy.types import Operator, Context, Event
-from bpy_extras.io_utils import ImportHelper
+from bpy_extras.io_utils import ImportHelper, ExportHelper
 
 from .kernel import Manifest, get_repository_package_asset_path, repository_runtime_update, ensure_repository_asset_library, \
     ensure_default_repository_id, repository_asset_library_unlink, repository_remove, repository_cache_delete, \
     repository_metadata_delete, repository_package_build, get_repository_package_dependency_graph, \
-    layered_topographical_sort, repository_package_export, is_game_directory_and_mod_valid, repository_metadata_write, \
+    repository_package_export, is_game_directory_and_mod_valid, repository_metadata_write, \
     repository_metadata_read, repository_runtime_packages_update_rule_exclusions, get_repository_cache_directory, \
     get_repository_default_asset_library_directory, get_repository_package_asset_directory, \
-    get_repository_package_catalog_id
+    get_repository_package_catalog_id, get_repository_package_export_directory, \
+    get_repository_package_cube_map_file_paths, build_cube_maps, write_cube_map_results_to_log, \
+    get_repository_package_export_log_path, repository_telemetry_write
 from .properties import repository_rule_type_enum_items
+from .scheduler import run_dependency_schedule, get_dependent_nodes
+from .worker_pool import PackageBuildWorkerPool
 from ...catalog import AssetCatalogFile
 from ...helpers import get_addon_preferences, tag_redraw_all_windows
 
@@ -51,6 +57,10 @@ class BDK_OT_repository_scan(Operator):
     bl_description = 'Scan the repository and update the status of each package'
     bl_options = {'INTERNAL'}
 
+    use_scan_cache: BoolProperty(name='Use Scan Cache', default=True,
+                                 description='Skip listing directories that have not changed since the last scan. '
+                                             'Disable this to rebuild the scan cache from scratch')
+
     @classmethod
     def poll(cls, context):
         addon_prefs = get_addon_preferences(context)
@@ -63,7 +73,7 @@ class BDK_OT_repository_scan(Operator):
         # Update the runtime information.
         try:
             repository_metadata_read(repository)
-            repository_runtime_update(repository)
+            repository_runtime_update(repository, use_scan_cache=self.use_scan_cache)
         except Exception as e:
             self.report({'ERROR'}, f'Failed to scan repository: {e}')
             return {'CANCELLED'}
@@ -116,7 +126,7 @@ class BDK_OT_repository_package_build(Operator):
         # Build the export path.
         context.window_manager.progress_begin(0, 1)
 
-        process, _ = repository_package_build(repository, package.path)
+        process, _, _ = repository_package_build(repository, package.path)
 
         if process.returncode != 0:
             self.report({'ERROR'}, f'Failed to build package: {package.path}')
@@ -243,6 +253,17 @@ class BDK_OT_repository_build_asset_library(Operator):
 
     max_workers_auto: IntProperty(set=None)
 
+    use_worker_pool: BoolProperty(name='Use Worker Pool', default=True,
+                                  description='Build packages using a pool of long-lived Blender processes instead of '
+                                              'starting a new Blender process for each package')
+    worker_memory_limit: IntProperty(name='Worker Memory Limit', default=4096, min=256,
+                                     description='Build workers whose memory usage exceeds this limit (in megabytes) '
+                                                 'are restarted after finishing their current package')
+    use_incremental_build: BoolProperty(name='Incremental Build', default=True,
+                                        description='Update the existing asset library of each package, only '
+                                                    're-importing the assets that were added or changed since it was '
+                                                    'last built')
+
     @classmethod
     def poll(cls, context):
         addon_prefs = get_addon_preferences(context)
@@ -275,6 +296,10 @@ class BDK_OT_repository_build_asset_library(Operator):
                 row = flow.row()
                 row.enabled = False
                 row.prop(self, 'max_workers_auto', text=' ')
+        flow.prop(self, 'use_worker_pool')
+        if self.use_worker_pool:
+            flow.prop(self, 'worker_memory_limit', text='Memory Limit (MB)')
+        flow.prop(self, 'use_incremental_build')
 
     def execute(self, context):
         addon_prefs = get_addon_preferences(context)
@@ -294,33 +319,9 @@ class BDK_OT_repository_build_asset_library(Operator):
         package_dependency_graph = get_repository_package_dependency_graph(repository)
         print(f'Finished building package dependency graph in {datetime.now() - time}')
 
-        print('Determining build order')
-        time = datetime.now()
-        package_build_levels = layered_topographical_sort(package_dependency_graph)
-        print(f'Finished determining build order in {datetime.now() - time}')
-
         # Map the package names to the package objects.
         package_name_to_package = {os.path.splitext(os.path.basename(package.path))[0].upper(): package for package in
                                    repository.runtime.packages}
-        package_name_keys = set(package_name_to_package.keys())
-
-        # Some packages in the build levels may not be in the runtime packages, so we need to filter them out.
-        package_build_levels = [level & package_name_keys for level in package_build_levels]
-
-        # Convert the build levels to the package objects.
-        package_build_levels = [{package_name_to_package[package_name.upper()] for package_name in level} for level in
-                                package_build_levels]
-
-        # Remove the packages that do not need to be built from the build levels.
-        for level in package_build_levels:
-            level &= packages_to_build
-
-        # Remove any empty levels.
-        package_build_levels = [level for level in package_build_levels if level]
-
-        # Convert package_build_levels to a list of path and filename tuples.
-        package_build_levels = [[(x.path, os.path.splitext(x.filename)[0]) for x in level] for level in
-                                package_build_levels]
 
         # Count the number of commands that will be executed.
         command_count = len(packages_to_export) + len(packages_to_build)
@@ -364,6 +365,9 @@ class BDK_OT_repository_build_asset_library(Operator):
             catalog_file.write()
 
         packages_that_failed_to_export = []
+        exported_packages = []
+        packages_with_changed_exports = set()
+        packages_with_unchanged_exports = set()
 
         match self.max_workers_mode:
             case 'AUTO':
@@ -386,18 +390,56 @@ class BDK_OT_repository_build_asset_library(Operator):
                         if fp.read(4) == bytearray([0xC1, 0x83, 0x2a, 0x9e]):
                             manifest.mark_package_as_built(package.path)
                             continue
-                jobs.append(executor.submit(repository_package_export, repository, package))
+                jobs.append(executor.submit(repository_package_export, repository, package,
+                                            should_build_cube_maps=False))
             for future in as_completed(jobs):
-                process, package = future.result()
+                process, package, content_hash, export_hash, export_telemetry = future.result()
                 if process.returncode != 0:
                     failure_count += 1
                     packages_that_failed_to_export.append(package)
                 else:
-                    manifest.mark_package_as_exported(package.path)
-                    success_count += 1
+                    exported_packages.append((package, content_hash, export_hash, export_telemetry))
                 progress += 1
                 context.window_manager.progress_update(progress)
 
+        # Convert the cube maps of all the exported packages in as few Blender processes as possible.
+        cube_maps = []
+        cube_map_packages = dict()
+        for package, _, _, _ in exported_packages:
+            package_exports_directory = get_repository_package_export_directory(repository, package.path)
+            for cube_map_file_path in get_repository_package_cube_map_file_paths(repository, package.path):
+                cube_maps.append((cube_map_file_path, package_exports_directory))
+                cube_map_packages[cube_map_file_path] = package
+
+        if cube_maps:
+            print(f'Building {len(cube_maps)} cubemaps')
+            time = datetime.now()
+            cube_map_results = build_cube_maps(cube_maps, max_workers=min(max_workers, 4))
+            print(f'Finished building cubemaps in {datetime.now() - time}')
+
+            # Report the cube maps that failed to the export log of their package, and fail the export.
+            package_cube_map_results = dict()
+            for result in cube_map_results:
+                package_cube_map_results.setdefault(cube_map_packages[result.cube_map_file_path], []).append(result)
+            for package, results in package_cube_map_results.items():
+                write_cube_map_results_to_log(results, get_repository_package_export_log_path(repository, package.path))
+                if not all(result.success for result in results):
+                    print(f'Failed to build cubemaps for package: {package.path}')
+                    failure_count += 1
+                    packages_that_failed_to_export.append(package)
+
+        for package, content_hash, export_hash, export_telemetry in exported_packages:
+            if package in packages_that_failed_to_export:
+                continue
+            previous_export_hash = manifest.get_package(package.path).export_hash \
+                if manifest.has_package(package.path) else None
+            if export_hash is not None and export_hash == previous_export_hash:
+                packages_with_unchanged_exports.add(package)
+            else:
+                packages_with_changed_exports.add(package)
+            manifest.mark_package_as_exported(package.path, content_hash, export_hash, export_telemetry)
+            success_count += 1
+
         if failure_count > 0:
             self.report({'ERROR'},
                         f'Failed to export {failure_count} packages. Aborting build step. Check logs for more '
@@ -406,30 +448,106 @@ class BDK_OT_repository_build_asset_library(Operator):
             repository_runtime_update(repository)
             return {'CANCELLED'}
 
+        # Packages whose export output did not change do not need to be rebuilt, as long as they have been built before.
+        # Note that a package's build_time is only set if its asset file exists.
+        for package in packages_with_unchanged_exports:
+            if package.build_time != 0:
+                manifest.mark_package_as_built(package.path)
+                packages_to_build.discard(package)
+
+        # Packages that depend on a package whose export output changed must be rebuilt, since they may link to assets
+        # that were added, removed or changed.
+        # The members of a dependency cycle depend on each other, so they are rebuilt along with a changed member.
+        dependent_package_names = get_dependent_nodes(
+            package_dependency_graph,
+            [os.path.splitext(package.filename)[0].upper() for package in packages_with_changed_exports],
+            package_dependency_graph.graph.get('cycles', []),
+        )
+        packages_to_rebuild = set()
+        for dependent_package_name in dependent_package_names:
+            dependent_package = package_name_to_package.get(dependent_package_name, None)
+            if dependent_package is not None and not dependent_package.is_excluded_by_rule:
+                packages_to_rebuild.add(dependent_package)
+        packages_to_rebuild -= packages_to_build
+        if packages_to_rebuild:
+            print(f'Rebuilding {len(packages_to_rebuild)} packages that depend on packages whose exports changed')
+            packages_to_build |= packages_to_rebuild
+
+        print(f'{len(packages_with_unchanged_exports)} packages exported with unchanged output, '
+              f'{len(packages_with_changed_exports)} with changed output')
+
+        package_names_to_build = {os.path.splitext(package.filename)[0].upper() for package in packages_to_build}
+
+        # Use the duration of the previous build of each package to estimate the critical path of the build.
+        package_build_durations = dict()
+        for package_name in package_names_to_build:
+            package_path = package_name_to_package[package_name].path
+            if manifest.has_package(package_path):
+                build_telemetry = manifest.get_package(package_path).build_telemetry
+                if build_telemetry is not None:
+                    package_build_durations[package_name] = build_telemetry.duration
+
+        # Update the progress range now that the number of packages to build is known.
+        context.window_manager.progress_begin(0, progress + len(packages_to_build))
+
         # We must write the manifest here because the build step will read from it when linking the assets.
         manifest.write()
 
         success_count = 0
         failure_count = 0
 
-        for level_index, packages in enumerate(package_build_levels):
-            with ThreadPoolExecutor(max_workers=8) as executor:
-                jobs = []
-                for (package_path, package_filename) in packages:
-                    jobs.append(executor.submit(repository_package_build, repository, package_path))
-                for future in as_completed(jobs):
-                    process, package_path = future.result()
-                    if process.returncode != 0:
-                        print('Failed to build package:', package_path)
-                        failure_count += 1
-                    else:
-                        manifest.mark_package_as_built(package_path)
-                        success_count += 1
-                    progress += 1
-                    context.window_manager.progress_update(progress)
-
-            manifest.write()
-            repository_runtime_update(repository)
+        if self.use_worker_pool:
+            worker_pool = PackageBuildWorkerPool(max_workers, self.worker_memory_limit * 1024 ** 2)
+            build_function = worker_pool.build
+        else:
+            worker_pool = None
+            build_function = repository_package_build
+
+        # Packages that depend on a package whose exports changed are fully rebuilt, since their materials may be built
+        # from the changed exports, which the incremental build cannot detect.
+        def build_package(package_name: str):
+            incremental = self.use_incremental_build and package_name not in dependent_package_names
+            return build_function(repository, package_name_to_package[package_name].path, incremental)
+
+        # The manifest is written periodically so that the progress is not lost if Blender is closed mid-build.
+        manifest_write_interval = 30.0
+        manifest_write_time = perf_counter()
+
+        def on_package_built(package_name: str,
+                             result: tuple[subprocess.CompletedProcess, str, Manifest.PackageBuildTelemetry],
+                             duration: float):
+            nonlocal progress, success_count, failure_count, manifest_write_time
+            process, package_path, build_telemetry = result
+            if process.returncode != 0:
+                print('Failed to build package:', package_path)
+                failure_count += 1
+            else:
+                manifest.mark_package_as_built(package_path, build_telemetry)
+                success_count += 1
+            progress += 1
+            context.window_manager.progress_update(progress)
+            if perf_counter() - manifest_write_time > manifest_write_interval:
+                manifest.write()
+                manifest_write_time = perf_counter()
+
+        # Packages are started as soon as their dependencies have been built, rather than waiting for every package at
+        # the same depth of the dependency graph, and the packages with the longest chain of dependents go first.
+        # The workers are closed even if a build raises an exception, so that no headless Blender processes are left
+        # running.
+        try:
+            schedule_report = run_dependency_schedule(
+                package_dependency_graph,
+                package_names_to_build,
+                build_package,
+                max_workers=max_workers,
+                durations=package_build_durations,
+                on_complete=on_package_built,
+            )
+            print(schedule_report)
+        finally:
+            if worker_pool is not None:
+                worker_pool.close()
+                print(worker_pool.get_report())
 
         context.window_manager.progress_end()
 
@@ -947,6 +1065,43 @@ class BDK_OT_repository_purge_orphaned_assets(Operator):
         return {'FINISHED'}
 
 
+class BDK_OT_repository_telemetry_export(Operator, ExportHelper):
+    bl_idname = 'bdk.repository_telemetry_export'
+    bl_label = 'Export Telemetry'
+    bl_description = 'Export the export and build telemetry of each package (e.g., to track build regressions)'
+    bl_options = {'INTERNAL'}
+
+    # NOTE: The extension is determined by the format.
+    check_extension = None
+    filename_ext = '.csv'
+    filter_glob: StringProperty(default='*.csv;*.json', options={'HIDDEN'})
+    filepath: StringProperty(subtype='FILE_PATH')
+    format: EnumProperty(name='Format', items=(
+        ('CSV', 'CSV', 'Comma-separated values'),
+        ('JSON', 'JSON', 'JavaScript Object Notation'),
+    ), default='CSV')
+
+    @classmethod
+    def poll(cls, context):
+        return poll_has_repository_selected(context)
+
+    def execute(self, context):
+        addon_prefs = get_addon_preferences(context)
+        repository = addon_prefs.repositories[addon_prefs.repositories_index]
+
+        filepath = bpy.path.ensure_ext(self.filepath, '.' + self.format.lower())
+
+        try:
+            repository_telemetry_write(repository, Path(filepath), self.format)
+        except OSError as e:
+            self.report({'ERROR'}, f'Failed to write telemetry: {e}')
+            return {'CANCELLED'}
+
+        self.report({'INFO'}, f'Exported telemetry to {filepath}')
+
+        return {'FINISHED'}
+
+
 classes = (
     BDK_OT_repository_scan,
     BDK_OT_repository_cache_delete,
@@ -957,6 +1112,7 @@ classes = (
     BDK_OT_repository_build_asset_library,
     BDK_OT_repository_cache_invalidate,
     BDK_OT_repository_purge_orphaned_assets,
+    BDK_OT_repository_telemetry_export,
     BDK_OT_repository_link,
     BDK_OT_repository_create,
     BDK_OT_repository_unlink,
@@ -1,5 +1,6 @@
 from bpy.types import PropertyGroup
-from bpy.props import StringProperty, PointerProperty, CollectionProperty, IntProperty, BoolProperty, EnumProperty
+from bpy.props import StringProperty, PointerProperty, CollectionProperty, IntProperty, BoolProperty, EnumProperty, \
+    FloatProperty
 
 from ...helpers import get_repository_by_id
 
@@ -25,6 +26,16 @@ class BDK_PG_repository_package(PropertyGroup):
     modified_time: IntProperty(name='Modified Time', default=0)
     exported_time: IntProperty(name='Exported Time', default=0)
     build_time: IntProperty(name='Build Time', default=0)
+    # Telemetry of the last export and build, read from the manifest.
+    has_telemetry: BoolProperty(name='Has Telemetry', default=False)
+    export_duration: FloatProperty(name='Export Duration', default=0.0, description='Wall time of the last export, '
+                                                                                    'in seconds')
+    build_duration: FloatProperty(name='Build Duration', default=0.0, description='Wall time of the last build, '
+                                                                                  'in seconds')
+    peak_memory: FloatProperty(name='Peak Memory', default=0.0, description='Peak memory of the last export or '
+                                                                            'build process, in megabytes')
+    exported_file_count: IntProperty(name='Exported File Count', default=0)
+    asset_size: FloatProperty(name='Asset Size', default=0.0, description='Size of the .blend file, in megabytes')
 
 
 repository_rule_type_enum_items = (
@@ -74,6 +85,7 @@ class BDK_PG_repository_runtime(PropertyGroup):
     need_build_package_count: IntProperty(name='Need Build Package Count', default=0)
     orphaned_assets: CollectionProperty(type=BDK_PG_repository_orphaned_asset, name='Orphaned Assets')
     orphaned_assets_index: IntProperty(name='Index', default=-1)
+    telemetry_packages_index: IntProperty(name='Index', default=-1)
 
 
 class BDK_PG_repository(PropertyGroup):
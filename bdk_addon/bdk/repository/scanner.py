@@ -0,0 +1,182 @@
+import fnmatch
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from glob import glob, has_magic
+from pathlib import Path
+from typing import Callable
+
+
+def compile_fnmatch_pattern(pattern: str) -> Callable[[str], bool]:
+    """
+    Compiles a shell-style wildcard pattern into a match function with the same semantics as `fnmatch.fnmatch`
+    (i.e., both the pattern and the name are normalized with `os.path.normcase`), without the per-call overhead.
+    """
+    match = re.compile(fnmatch.translate(os.path.normcase(pattern))).match
+    if os.path.normcase('A') == 'A':
+        return lambda name: match(name) is not None
+    return lambda name: match(os.path.normcase(name)) is not None
+
+
+class DirectoryScanCache:
+    """
+    A persistent cache of directory listings, keyed by the modified time of the directory.
+
+    Adding, removing or renaming a file updates the modified time of its directory, so a directory whose modified time
+    has not changed since it was last listed is assumed to be unchanged and does not need to be listed again. Files that
+    are modified in-place do not update the modified time of their directory, so the files of a cached listing that
+    match a package pattern are still stat'ed to get their current size and modified time.
+    """
+    class Directory:
+        def __init__(self, modified_time: int, files: dict[str, tuple[int, int]]):
+            self.modified_time = modified_time
+            # File name to (size, modified time in nanoseconds).
+            self.files = files
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.directories: dict[str, DirectoryScanCache.Directory] = dict()
+
+    @staticmethod
+    def from_file(path: Path):
+        cache = DirectoryScanCache(path)
+        if path.is_file():
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+                for directory, directory_data in data['directories'].items():
+                    cache.directories[directory] = DirectoryScanCache.Directory(
+                        modified_time=directory_data['modified_time'],
+                        files={name: (size, modified_time) for name, size, modified_time in directory_data['files']}
+                    )
+            except (OSError, ValueError, KeyError, TypeError, AttributeError):
+                # The cache is truncated or malformed, so it will be rebuilt from scratch.
+                return DirectoryScanCache(path)
+        return cache
+
+    def write(self):
+        data = {
+            'directories': {
+                directory: {
+                    'modified_time': cached_directory.modified_time,
+                    'files': [[name, size, modified_time] for name, (size, modified_time) in
+                              cached_directory.files.items()],
+                }
+                for directory, cached_directory in self.directories.items()
+            }
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # NOTE: The cache is written to a temporary file first and then moved into place, so that an interrupted write
+        #  does not leave a truncated cache behind.
+        temporary_path = f'{self.path}.tmp'
+        with open(temporary_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(temporary_path, self.path)
+
+
+class PackageScanResult:
+    def __init__(self):
+        # Absolute path, size and modified time (in nanoseconds) of each package, in pattern order.
+        self.packages: list[tuple[str, int, int]] = []
+        self.directory_count = 0
+        self.skipped_directory_count = 0
+
+
+def _scan_directory(directory: str) -> DirectoryScanCache.Directory | None:
+    try:
+        modified_time = os.stat(directory).st_mtime_ns
+        files = dict()
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.is_file():
+                    stat = entry.stat()
+                    files[entry.name] = (stat.st_size, stat.st_mtime_ns)
+        return DirectoryScanCache.Directory(modified_time, files)
+    except FileNotFoundError:
+        return None
+
+
+def scan_package_patterns(package_patterns: list[str], cache: DirectoryScanCache | None = None,
+                          max_workers: int | None = None) -> PackageScanResult:
+    """
+    Finds the files matching the package patterns (e.g., `C:/Game/Textures/*.utx`).
+
+    The directories of the patterns are listed concurrently with `os.scandir`. If a cache is provided, directories
+    whose modified time has not changed since the last scan are not listed again, and the cache is updated with the
+    new listings. The matching files of cached listings are stat'ed so that packages modified in-place are detected.
+    """
+    result = PackageScanResult()
+
+    # Find the unique directories of the patterns so that each directory is only listed once.
+    directories: dict[str, None] = dict()
+    for package_pattern in package_patterns:
+        directory = os.path.dirname(package_pattern)
+        if not has_magic(directory):
+            directories[directory] = None
+
+    directories_to_scan = []
+    for directory in directories.keys():
+        if cache is not None and directory in cache.directories:
+            try:
+                modified_time = os.stat(directory).st_mtime_ns
+            except FileNotFoundError:
+                del cache.directories[directory]
+                continue
+            if cache.directories[directory].modified_time == modified_time:
+                result.skipped_directory_count += 1
+                continue
+        directories_to_scan.append(directory)
+
+    # The listings that were read from the cache rather than listed.
+    cached_directories: set[str] = set()
+    listings: dict[str, DirectoryScanCache.Directory] = dict()
+    if cache is not None:
+        cached_directories.update(directory for directory in directories.keys() if directory in cache.directories)
+        listings.update({directory: cache.directories[directory] for directory in directories.keys()
+                         if directory in cache.directories})
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for directory, listing in zip(directories_to_scan, executor.map(_scan_directory, directories_to_scan)):
+            result.directory_count += 1
+            if listing is None:
+                listings.pop(directory, None)
+                if cache is not None:
+                    cache.directories.pop(directory, None)
+                continue
+            cached_directories.discard(directory)
+            listings[directory] = listing
+            if cache is not None:
+                cache.directories[directory] = listing
+
+    # Match the file names against the patterns, keeping the order of the patterns and removing duplicates.
+    seen_package_paths = set()
+    for package_pattern in package_patterns:
+        directory, file_name_pattern = os.path.split(package_pattern)
+        if has_magic(directory):
+            # Wildcards in the directory itself are not supported by the scanner, so fall back to a glob.
+            for package_path in sorted(glob(package_pattern)):
+                if package_path not in seen_package_paths and os.path.isfile(package_path):
+                    seen_package_paths.add(package_path)
+                    stat = os.stat(package_path)
+                    result.packages.append((package_path, stat.st_size, stat.st_mtime_ns))
+            continue
+        listing = listings.get(directory, None)
+        if listing is None:
+            continue
+        match_function = compile_fnmatch_pattern(file_name_pattern)
+        for file_name in sorted(filter(match_function, listing.files.keys())):
+            package_path = os.path.join(directory, file_name)
+            if package_path in seen_package_paths:
+                continue
+            seen_package_paths.add(package_path)
+            if directory in cached_directories:
+                try:
+                    stat = os.stat(package_path)
+                except FileNotFoundError:
+                    continue
+                listing.files[file_name] = (stat.st_size, stat.st_mtime_ns)
+            size, modified_time = listing.files[file_name]
+            result.packages.append((package_path, size, modified_time))
+
+    return result
@@ -0,0 +1,222 @@
+import heapq
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, Future
+from typing import Callable, Hashable, Iterable, Any
+
+import networkx
+
+
+class DependencyScheduleReport:
+    def __init__(self, worker_count: int):
+        self.worker_count = worker_count
+        self.wall_time = 0.0
+        self.busy_time = 0.0
+        # The nodes in the order that they were started.
+        self.start_order: list[Hashable] = []
+        self.durations: dict[Hashable, float] = dict()
+
+    @property
+    def utilization(self) -> float:
+        """
+        The fraction of the available worker time that was spent running jobs.
+        """
+        if self.wall_time <= 0.0 or self.worker_count == 0:
+            return 0.0
+        return self.busy_time / (self.wall_time * self.worker_count)
+
+    def __str__(self):
+        return (f'Ran {len(self.durations)} jobs on {self.worker_count} workers in {self.wall_time:.1f}s '
+                f'({self.busy_time:.1f}s of work, {self.utilization:.0%} utilization)')
+
+
+def condense_dependency_cycles(graph: networkx.DiGraph) -> list[list[Hashable]]:
+    """
+    Breaks the cycles in the graph in linear time so that it becomes a Directed Acyclic Graph (DAG), and returns the
+    nodes that formed each cycle. Edges point from a node to its dependencies.
+
+    Each strongly connected component with more than one node (i.e., a group of nodes that depend on each other) is
+    condensed so that its members are ordered as one unit: the edges within the component are removed, the edges to
+    the rest of the graph are routed through a new `('CYCLE_DEPENDENCIES', index)` node that all the members depend on,
+    and the edges from the rest of the graph are routed through a new `('CYCLE', index)` node that depends on all the
+    members. The members therefore come after everything that any of them depends on, and before everything that
+    depends on any of them.
+    """
+    cycles: list[list[Hashable]] = []
+    # The components must be found up-front since the graph is modified below.
+    for component in list(networkx.strongly_connected_components(graph)):
+        if len(component) == 1:
+            node = next(iter(component))
+            if graph.has_edge(node, node):
+                graph.remove_edge(node, node)
+                cycles.append([node])
+            continue
+
+        cycle_node = ('CYCLE', len(cycles))
+        cycle_dependencies_node = ('CYCLE_DEPENDENCIES', len(cycles))
+        edges_to_remove = []
+        dependencies = set()
+        dependents = set()
+        for node in component:
+            for dependency in graph.successors(node):
+                edges_to_remove.append((node, dependency))
+                if dependency not in component:
+                    dependencies.add(dependency)
+            for dependent in graph.predecessors(node):
+                if dependent not in component:
+                    edges_to_remove.append((dependent, node))
+                    dependents.add(dependent)
+        graph.remove_edges_from(edges_to_remove)
+        graph.add_edges_from((node, cycle_dependencies_node) for node in component)
+        graph.add_edges_from((cycle_dependencies_node, dependency) for dependency in dependencies)
+        graph.add_edges_from((cycle_node, node) for node in component)
+        graph.add_edges_from((dependent, cycle_node) for dependent in dependents)
+        cycles.append(sorted(component))
+    return cycles
+
+
+def get_dependent_nodes(graph: networkx.DiGraph, nodes: Iterable[Hashable],
+                        cycles: Iterable[list[Hashable]] = ()) -> set[Hashable]:
+    """
+    Returns the nodes that depend, directly or indirectly, on any of the nodes. Edges point from a node to its
+    dependencies.
+
+    The members of each of the `cycles` (as returned by `condense_dependency_cycles`) depend on each other, but there are
+    no edges between them once the graph has been condensed, so when a member is reached, the other members of its cycle
+    are treated as its dependents.
+    """
+    cycle_members = {node: cycle for cycle in cycles for node in cycle}
+    dependents = set()
+    nodes_to_visit = list(nodes)
+    while nodes_to_visit:
+        node = nodes_to_visit.pop()
+        if node not in graph:
+            continue
+        for dependent in itertools.chain(graph.predecessors(node), cycle_members.get(node, ())):
+            if dependent != node and dependent not in dependents:
+                dependents.add(dependent)
+                nodes_to_visit.append(dependent)
+    return dependents
+
+
+def get_critical_path_priorities(graph: networkx.DiGraph, durations: dict[Hashable, float]) -> dict[Hashable, float]:
+    """
+    Returns the priority of each node in the graph, which is the estimated duration of the longest chain of work that
+    is blocked by the node (including the node itself). Edges point from a node to its dependencies. Nodes without a
+    duration are assumed to take no time.
+    """
+    priorities: dict[Hashable, float] = dict()
+    # The topological order visits the dependents of each node before the node itself.
+    for node in networkx.topological_sort(graph):
+        dependent_priority = max((priorities[dependent] for dependent in graph.predecessors(node)), default=0.0)
+        priorities[node] = durations.get(node, 0.0) + dependent_priority
+    return priorities
+
+
+def run_dependency_schedule(graph: networkx.DiGraph,
+                            nodes: Iterable[Hashable],
+                            job_function: Callable[[Hashable], Any],
+                            max_workers: int,
+                            durations: dict[Hashable, float] | None = None,
+                            on_complete: Callable[[Hashable, Any, float], None] | None = None) \
+        -> DependencyScheduleReport:
+    """
+    Runs `job_function` for each of the nodes on a pool of `max_workers` threads, starting each node as soon as all of
+    its dependencies have completed, instead of waiting for every node at the same depth of the graph to complete.
+
+    Edges point from a node to its dependencies, and the graph must be acyclic. Nodes of the graph that are not in
+    `nodes` do not run a job, but still order the nodes that depend on them after the nodes they depend on.
+
+    When more nodes are ready than there are idle workers, the nodes with the longest estimated chain of dependent work
+    are started first. The estimate uses the historical `durations` of the nodes where available, and the median of the
+    known durations otherwise.
+
+    `on_complete` is called on the calling thread with the node, the return value of `job_function` and the duration of
+    the job, in the order that the jobs complete. Failures should be signalled through the return value, since
+    dependents are still run after a failed dependency. An exception raised by `job_function` stops any further jobs
+    from being started, and is re-raised once the running jobs have finished.
+    """
+    nodes = set(nodes)
+    if durations is None:
+        durations = dict()
+
+    graph = graph.copy()
+    graph.add_nodes_from(nodes)
+
+    known_durations = sorted(durations[node] for node in nodes if node in durations)
+    default_duration = known_durations[len(known_durations) // 2] if known_durations else 1.0
+    priorities = get_critical_path_priorities(graph, {node: durations.get(node, default_duration) for node in nodes})
+
+    remaining_dependency_counts = {node: graph.out_degree(node) for node in graph.nodes}
+
+    # Python's heap is a min-heap, so the priorities are negated. The counter breaks ties in a stable manner.
+    counter = itertools.count()
+    ready: list[tuple[float, int, Hashable]] = []
+
+    def complete(node: Hashable):
+        """
+        Releases the dependents of a node, passing straight through the nodes that do not run a job.
+        """
+        nodes_to_complete = [node]
+        while nodes_to_complete:
+            node = nodes_to_complete.pop()
+            for dependent in graph.predecessors(node):
+                remaining_dependency_counts[dependent] -= 1
+                if remaining_dependency_counts[dependent] == 0:
+                    if dependent in nodes:
+                        heapq.heappush(ready, (-priorities[dependent], next(counter), dependent))
+                    else:
+                        nodes_to_complete.append(dependent)
+
+    for node, count in list(remaining_dependency_counts.items()):
+        if count == 0:
+            if node in nodes:
+                heapq.heappush(ready, (-priorities[node], next(counter), node))
+            else:
+                complete(node)
+
+    report = DependencyScheduleReport(max_workers)
+    start_time = time.perf_counter()
+
+    def run_job(node: Hashable) -> tuple[Any, float]:
+        job_start_time = time.perf_counter()
+        result = job_function(node)
+        return result, time.perf_counter() - job_start_time
+
+    running: dict[Future, Hashable] = dict()
+    exception: BaseException | None = None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while True:
+            while ready and len(running) < max_workers and exception is None:
+                _, _, node = heapq.heappop(ready)
+                report.start_order.append(node)
+                running[executor.submit(run_job, node)] = node
+
+            if not running:
+                break
+
+            done, _ = wait(running.keys(), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                node = running.pop(future)
+                try:
+                    result, duration = future.result()
+                except BaseException as e:
+                    exception = e
+                    continue
+
+                report.busy_time += duration
+                report.durations[node] = duration
+
+                if on_complete is not None:
+                    on_complete(node, result, duration)
+
+                complete(node)
+
+    report.wall_time = time.perf_counter() - start_time
+
+    if exception is not None:
+        raise exception
+
+    return report
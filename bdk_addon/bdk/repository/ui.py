@@ -3,7 +3,7 @@ from bpy.props import EnumProperty, BoolProperty
 from bpy.types import UIList, Menu, UILayout
 from fnmatch import fnmatch
 
-from .operators import BDK_OT_repository_delete, BDK_OT_repository_cache_invalidate, BDK_OT_repository_package_blend_open, BDK_OT_repository_package_build, \
+from .operators import BDK_OT_repository_scan, BDK_OT_repository_delete, BDK_OT_repository_cache_invalidate, BDK_OT_repository_package_blend_open, BDK_OT_repository_package_build, \
     BDK_OT_repository_purge_orphaned_assets, BDK_OT_repository_set_default, BDK_OT_repository_rule_package_add, BDK_OT_repository_package_cache_invalidate
 from .properties import repository_package_status_enum_items
 from ..operators import BDK_OT_scene_repository_set
@@ -75,6 +75,73 @@ class BDK_UL_repository_packages(UIList):
         return flt_flags, flt_neworder
 
 
+repository_package_telemetry_sort_enum_items = (
+    ('TOTAL_DURATION', 'Total Time', 'Sort by the combined export and build time'),
+    ('EXPORT_DURATION', 'Export Time', 'Sort by the export time'),
+    ('BUILD_DURATION', 'Build Time', 'Sort by the build time'),
+    ('PEAK_MEMORY', 'Peak Memory', 'Sort by the peak memory of the export or build process'),
+    ('EXPORTED_FILE_COUNT', 'Exported Files', 'Sort by the number of exported files'),
+    ('ASSET_SIZE', 'Asset Size', 'Sort by the size of the .blend file'),
+)
+
+
+def get_package_telemetry_sort_value(package, sort_by: str) -> float:
+    match sort_by:
+        case 'TOTAL_DURATION':
+            return package.export_duration + package.build_duration
+        case 'EXPORT_DURATION':
+            return package.export_duration
+        case 'BUILD_DURATION':
+            return package.build_duration
+        case 'PEAK_MEMORY':
+            return package.peak_memory
+        case 'EXPORTED_FILE_COUNT':
+            return package.exported_file_count
+        case 'ASSET_SIZE':
+            return package.asset_size
+    return 0.0
+
+
+class BDK_UL_repository_package_telemetry(UIList):
+    """
+    Lists the packages that have telemetry, with the slowest (or largest) packages first.
+    """
+    bl_idname = 'BDK_UL_repository_package_telemetry'
+
+    sort_by: EnumProperty(name='Sort By', items=repository_package_telemetry_sort_enum_items,
+                          default='TOTAL_DURATION')
+    use_filter_show: BoolProperty(default=True)
+
+    def draw_filter(self, context, layout):
+        col = layout.column()
+        col.use_property_split = True
+        col.prop(self, 'filter_name', text='Pattern')
+        col.prop(self, 'sort_by')
+
+    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, **kwargs):
+        split = layout.split(factor=0.4)
+        split.label(text=item.path)
+        row = split.row(align=True)
+        row.enabled = False
+        row.label(text=f'{item.export_duration:.1f}s', icon='EXPORT')
+        row.label(text=f'{item.build_duration:.1f}s', icon='MOD_BUILD')
+        row.label(text=f'{item.peak_memory:.0f} MB', icon='MEMORY')
+        row.label(text=f'{item.exported_file_count}', icon='FILE')
+        row.label(text=f'{item.asset_size:.1f} MB', icon='BLENDER')
+
+    def filter_items(self, context, data, property_):
+        packages = getattr(data, property_)
+        bitflag_filter_item = 1 << 30
+        flt_flags = [bitflag_filter_item if package.has_telemetry else 0 for package in packages]
+        if self.filter_name:
+            for i, package in enumerate(packages):
+                if not fnmatch(package.path.lower(), f'*{self.filter_name.lower()}*'):
+                    flt_flags[i] &= ~bitflag_filter_item
+        sort_data = [(i, get_package_telemetry_sort_value(package, self.sort_by)) for i, package in enumerate(packages)]
+        flt_neworder = bpy.types.UI_UL_list.sort_items_helper(sort_data, lambda x: x[1], reverse=True)
+        return flt_flags, flt_neworder
+
+
 class BDK_UL_repositories(UIList):
     bl_idname = 'BDK_UL_repositories'
 
@@ -100,6 +167,8 @@ class BDK_MT_repository_special(Menu):
         layout = self.layout
         layout.operator(BDK_OT_repository_package_blend_open.bl_idname, icon='BLENDER')
         layout.separator()
+        op = layout.operator(BDK_OT_repository_scan.bl_idname, text='Full Rescan', icon='FILE_REFRESH')
+        op.use_scan_cache = False
         layout.operator_menu_enum(BDK_OT_repository_cache_invalidate.bl_idname, 'mode', icon='FILE_REFRESH')
         layout.operator(BDK_OT_repository_purge_orphaned_assets.bl_idname, icon='X')
         layout.separator()
@@ -166,6 +235,7 @@ classes = (
     BDK_UL_repositories,
     BDK_MT_repositories_special,
     BDK_UL_repository_packages,
+    BDK_UL_repository_package_telemetry,
     BDK_MT_repository_special,
     BDK_MT_repository_add,
     BDK_MT_repository_remove,
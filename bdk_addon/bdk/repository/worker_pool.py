@@ -0,0 +1,218 @@
+import json
+import subprocess
+import time
+from pathlib import Path
+from queue import Queue
+
+import bpy
+
+from .kernel import Manifest, get_addon_path, get_repository_package_export_directory, \
+    get_repository_package_asset_path, get_repository_package_catalog_id, get_repository_package_build_log_path, \
+    get_package_build_telemetry, get_repository_build_worker_log_path
+from .properties import BDK_PG_repository
+
+# This must match the prefix used in `bin/blend.py`.
+WORKER_MESSAGE_PREFIX = 'BDK_WORKER:'
+
+
+class PackageBuildWorker:
+    """
+    A long-lived headless Blender process that builds packages using the `worker` command of `bin/blend.py`.
+
+    The standard error of the worker (e.g., Python tracebacks and crash reports) is written to `log_path`, which is
+    appended to if `append` is set.
+    """
+    def __init__(self, log_path: Path, append: bool = False):
+        script_path = get_addon_path() / 'bin' / 'blend.py'
+        args = [bpy.app.binary_path, '--background', '--python', str(script_path), '--', 'worker']
+        self.log_path = log_path
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        # NOTE: The worker inherits its own handle to the log file, so ours can be closed once the worker is started.
+        with open(log_path, 'a' if append else 'w') as log_file:
+            self.process = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                            stderr=log_file, text=True, errors='replace', bufsize=1)
+        self.memory = 0
+        message = self._receive()
+        if message is None or message['type'] != 'READY':
+            self.terminate()
+            raise RuntimeError('Build worker failed to start')
+        self.memory = message['memory']
+
+    def _receive(self) -> dict | None:
+        """
+        Reads the next protocol message from the worker, skipping over any other output. Returns None if the worker
+        has exited.
+        """
+        for line in self.process.stdout:
+            if line.startswith(WORKER_MESSAGE_PREFIX):
+                return json.loads(line[len(WORKER_MESSAGE_PREFIX):])
+        return None
+
+    def is_alive(self) -> bool:
+        return self.process.poll() is None
+
+    def run(self, job: dict) -> dict | None:
+        """
+        Sends a job to the worker and waits for the result. Returns None if the worker died while running the job.
+        """
+        try:
+            self.process.stdin.write(json.dumps(job) + '\n')
+            self.process.stdin.flush()
+        except OSError:
+            return None
+        message = self._receive()
+        if message is not None:
+            self.memory = message['memory']
+        return message
+
+    def terminate(self):
+        if self.is_alive():
+            try:
+                self.process.stdin.write(json.dumps({'type': 'EXIT'}) + '\n')
+                self.process.stdin.flush()
+                self.process.wait(timeout=10)
+            except (OSError, subprocess.TimeoutExpired):
+                self.process.kill()
+                self.process.wait()
+
+
+class PackageBuildWorkerSlot:
+    """
+    A slot in the pool. The worker occupying the slot may be replaced when it is recycled, but the statistics are
+    accumulated across the lifetime of the slot.
+    """
+    def __init__(self, index: int):
+        self.index = index
+        self.worker: PackageBuildWorker | None = None
+        # The log file of the workers that have occupied the slot, which is appended to when a worker is replaced.
+        self.log_path: Path | None = None
+        self.job_count = 0
+        self.failure_count = 0
+        self.busy_time = 0.0
+        self.startup_time = 0.0
+        self.recycle_count = 0
+        self.peak_memory = 0
+
+
+class PackageBuildWorkerPool:
+    """
+    A pool of long-lived Blender processes used to build packages. This avoids paying the cost of starting Blender and
+    registering the add-ons for every package that is built.
+
+    Workers are started lazily and are recycled (i.e., terminated and replaced) if their resident memory exceeds
+    `memory_limit` bytes after a job, or if they die unexpectedly.
+
+    The `build` method is thread-safe and can be called from up to `worker_count` threads concurrently.
+    """
+    def __init__(self, worker_count: int, memory_limit: int):
+        self.memory_limit = memory_limit
+        self.slots = [PackageBuildWorkerSlot(index) for index in range(worker_count)]
+        self._idle_slots: Queue[PackageBuildWorkerSlot] = Queue()
+        for slot in self.slots:
+            self._idle_slots.put(slot)
+        self._start_time = time.perf_counter()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @staticmethod
+    def _recycle(slot: PackageBuildWorkerSlot):
+        if slot.worker is not None:
+            slot.worker.terminate()
+            slot.worker = None
+            slot.recycle_count += 1
+
+    @staticmethod
+    def _write_worker_failure_to_log(job: dict, message: str):
+        log_path = Path(job['log_path'])
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(log_path, 'a') as f:
+            f.write(f'\n{message}\n')
+
+    def build(self, repository: BDK_PG_repository, package_path: str, incremental: bool = False) \
+            -> tuple[subprocess.CompletedProcess, str, Manifest.PackageBuildTelemetry]:
+        """
+        Builds the package using one of the workers in the pool. The arguments and return value mirror those of
+        `repository_package_build`.
+        """
+        job = {
+            'type': 'BUILD',
+            'input_directory': str(get_repository_package_export_directory(repository, package_path)),
+            'repository_id': repository.id,
+            'catalog_id': get_repository_package_catalog_id(repository, package_path),
+            'output_path': str(get_repository_package_asset_path(repository, package_path)),
+            'log_path': str(get_repository_package_build_log_path(repository, package_path)),
+            'incremental': incremental,
+        }
+
+        duration = 0.0
+        peak_memory = None
+
+        slot = self._idle_slots.get()
+        try:
+            if slot.worker is None or not slot.worker.is_alive():
+                log_path = get_repository_build_worker_log_path(repository, slot.index)
+                startup_time = time.perf_counter()
+                slot.worker = PackageBuildWorker(log_path, append=slot.log_path == log_path)
+                slot.log_path = log_path
+                slot.startup_time += time.perf_counter() - startup_time
+
+            job_time = time.perf_counter()
+            result = slot.worker.run(job)
+            duration = time.perf_counter() - job_time
+            slot.busy_time += duration
+            slot.job_count += 1
+            slot.peak_memory = max(slot.peak_memory, slot.worker.memory)
+
+            if result is None:
+                # The worker died while running the job.
+                self._recycle(slot)
+                returncode = 1
+                self._write_worker_failure_to_log(job, f'The build worker exited unexpectedly. '
+                                                       f'See {slot.log_path} for its output.')
+            else:
+                returncode = 0 if result['success'] else 1
+                peak_memory = result.get('peak_memory', None)
+                if slot.worker.memory > self.memory_limit:
+                    print(f'Recycling build worker {slot.index} '
+                          f'({slot.worker.memory / 1024 ** 2:.0f} MB exceeds limit of '
+                          f'{self.memory_limit / 1024 ** 2:.0f} MB)')
+                    self._recycle(slot)
+
+            if returncode != 0:
+                slot.failure_count += 1
+        except RuntimeError:
+            returncode = 1
+            slot.failure_count += 1
+            self._write_worker_failure_to_log(job, f'The build worker failed to start. '
+                                                   f'See {slot.log_path} for its output.')
+        finally:
+            self._idle_slots.put(slot)
+
+        build_telemetry = get_package_build_telemetry(Path(job['output_path']), duration, peak_memory)
+
+        return subprocess.CompletedProcess(args=[], returncode=returncode), package_path, build_telemetry
+
+    def close(self):
+        for slot in self.slots:
+            if slot.worker is not None:
+                slot.worker.terminate()
+                slot.worker = None
+
+    def get_report(self) -> str:
+        """
+        Returns a human-readable report of the throughput of each worker in the pool.
+        """
+        elapsed_time = time.perf_counter() - self._start_time
+        lines = [f'Build worker pool ({len(self.slots)} workers, {elapsed_time:.1f}s elapsed)']
+        for slot in self.slots:
+            throughput = slot.job_count / slot.busy_time if slot.busy_time > 0 else 0.0
+            utilization = slot.busy_time / elapsed_time if elapsed_time > 0 else 0.0
+            lines.append(f'  Worker {slot.index}: {slot.job_count} jobs ({slot.failure_count} failed), '
+                         f'{throughput:.2f} jobs/s, {utilization:.0%} busy, '
+                         f'{slot.startup_time:.1f}s starting up, {slot.recycle_count} recycled, '
+                         f'peak {slot.peak_memory / 1024 ** 2:.0f} MB')
+        return '\n'.join(lines)
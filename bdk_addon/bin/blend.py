@@ -6,7 +6,16 @@ from typing import List
 import bpy
 import os
 import glob
-from argparse import ArgumentParser
+import hashlib
+import importlib
+import json
+import re
+import traceback
+from argparse import ArgumentParser, Namespace
+
+# Prefix for lines written to the worker's protocol channel. Blender writes its own output to stdout as well, so the
+# pool ignores any line that does not start with this prefix.
+WORKER_MESSAGE_PREFIX = 'BDK_WORKER:'
 
 material_class_names = [
     'ColorModifier',
@@ -26,89 +35,308 @@ material_class_names = [
 ]
 
 
+# The name of the scene property that records the hashes of the assets that the .blend file was built from.
+BUILD_PROPERTY_NAME = 'bdk_build'
+
+_builder_version: str | None = None
+
+
+def get_builder_version() -> str:
+    """
+    Returns a hash of the Blender version and the source code of the add-on, so that the assets of a package are fully
+    rebuilt when the code that builds them changes.
+    """
+    global _builder_version
+    if _builder_version is None:
+        hash_ = hashlib.blake2b(bpy.app.version_string.encode(), digest_size=16)
+        addon_directory = Path(__file__).resolve().parent.parent
+        for file_path in sorted(addon_directory.rglob('*.py')):
+            hash_.update(file_path.relative_to(addon_directory).as_posix().encode())
+            hash_.update(file_path.read_bytes())
+        _builder_version = hash_.hexdigest()
+    return _builder_version
+
+
+class PackageAsset:
+    def __init__(self, class_type: str, object_name: str):
+        self.class_type = class_type
+        self.object_name = object_name
+        # The paths of the exported files of the asset, relative to the input directory.
+        self.files: list[str] = []
+
+    @property
+    def key(self) -> str:
+        return f'{self.class_type}/{self.object_name}'
+
+
+def get_package_assets(input_directory: Path) -> dict[str, PackageAsset]:
+    """
+    Groups the exported files of a package by asset. Each asset has a `.props.txt` file and any number of other files
+    with the same object name (e.g., the image of a texture or the mesh of a static mesh).
+    """
+    files = [Path(file) for file in glob.glob('*/*', root_dir=input_directory)]
+    assets: dict[str, PackageAsset] = dict()
+    for file in files:
+        if file.name.endswith('.props.txt'):
+            # The class type of the object is the directory name of the parent folder.
+            asset = PackageAsset(file.parent.name, file.name[:-len('.props.txt')])
+            assets[asset.key] = asset
+    for file in files:
+        # NOTE: Unreal object names cannot contain periods, so everything before the first period is the object name.
+        asset = assets.get(f'{file.parent.name}/{file.name.split(".")[0]}', None)
+        if asset is not None and (input_directory / file).is_file():
+            asset.files.append(file.as_posix())
+    return assets
+
+
+def get_package_asset_hashes(input_directory: Path, package_name: str, assets: dict[str, PackageAsset]) \
+        -> dict[str, str]:
+    """
+    Returns a hash of the exported files of each asset. The hash of a material also covers the materials in the same
+    package that it references (directly or indirectly), since they are built into it.
+    """
+    file_hashes: dict[str, bytes] = dict()
+    references: dict[str, list[str]] = dict()
+    for key, asset in assets.items():
+        hash_ = hashlib.blake2b(digest_size=16)
+        for file in sorted(asset.files):
+            hash_.update(file.encode())
+            with open(input_directory / file, 'rb') as f:
+                hash_.update(hashlib.file_digest(f, 'blake2b').digest())
+        file_hashes[key] = hash_.digest()
+
+        references[key] = []
+        if asset.class_type in material_class_names:
+            with open(input_directory / f'{key}.props.txt', 'r', errors='replace') as f:
+                for class_type, object_path in re.findall(r"(\w+)'([\w.\-]+)'", f.read()):
+                    object_path_parts = object_path.split('.')
+                    if object_path_parts[0].lower() != package_name.lower():
+                        continue
+                    reference_key = f'{class_type}/{object_path_parts[-1]}'
+                    if reference_key in assets and reference_key != key:
+                        references[key].append(reference_key)
+
+    asset_hashes = dict()
+    for key in assets.keys():
+        # Gather the assets that this asset references, directly or indirectly.
+        visited = {key}
+        keys_to_visit = [key]
+        while keys_to_visit:
+            for reference_key in references[keys_to_visit.pop()]:
+                if reference_key not in visited:
+                    visited.add(reference_key)
+                    keys_to_visit.append(reference_key)
+        hash_ = hashlib.blake2b(digest_size=16)
+        for visited_key in sorted(visited):
+            hash_.update(visited_key.encode())
+            hash_.update(file_hashes[visited_key])
+        asset_hashes[key] = hash_.hexdigest()
+    return asset_hashes
+
+
+def get_parsed_material_disk_cache_report() -> str | None:
+    """
+    Returns the hit and miss counts of the parsed material disk caches that were used by this process.
+    """
+    # This script does not import the add-on directly, so find the module name that the add-on was registered under.
+    addon_directory_name = Path(__file__).resolve().parent.parent.name
+    for addon_module_name in bpy.context.preferences.addons.keys():
+        if addon_module_name.split('.')[-1] == addon_directory_name:
+            cache_module = importlib.import_module(f'{addon_module_name}.material.cache')
+            return cache_module.get_parsed_material_disk_cache_report()
+    return None
+
+
+def import_material_assets(input_directory: Path, assets: list[PackageAsset], repository_id: str) \
+        -> dict[str, bpy.types.Material | None]:
+    """
+    Imports the materials as a single batch so that the material cache, and therefore the parsed materials that they
+    share, are reused across the whole package. Returns the imported material of each asset key, or None if the
+    material failed to import.
+    """
+    files = [{'name': f'{asset.key}.props.txt'} for asset in assets]
+    try:
+        bpy.ops.bdk.import_material(directory=str(input_directory), files=files, repository_id=repository_id)
+    except Exception as e:
+        print(e)
+    return {asset.key: bpy.data.materials.get(asset.object_name, None) for asset in assets}
+
+
+def import_static_mesh_asset(input_directory: Path, package_name: str, asset: PackageAsset, repository_id: str) \
+        -> bpy.types.Collection | None:
+    object_name = asset.object_name
+    extensions = ['.pskx', '.psk']
+    filenames = [os.path.join(input_directory, 'StaticMesh', f'{object_name}{extension}') for extension in extensions]
+    filename = next((filename for filename in filenames if os.path.isfile(filename)), None)
+
+    if filename is None:
+        warnings.warn(f'Could not find a static mesh file for {object_name}')
+        return None
+
+    bpy.ops.psk.import_file(
+        filepath=filename,
+        components='MESH',
+        should_import_materials=True,
+        bdk_repository_id=repository_id
+    )
+
+    package_reference = f'StaticMesh\'{package_name}.{object_name}\''
+
+    new_object = bpy.data.objects[object_name]
+    new_object.data.name = package_reference
+
+    # Provide a "stable" reference to the object in the package.
+    # The name of the data block is not stable because the object & data can be duplicated in Blender fairly
+    # easily, thus changing the name of the data block.
+    new_object.bdk.package_reference = package_reference
+
+    new_object['Class'] = 'StaticMeshActor'
+
+    # Add the object to a collection with the name of the object.
+    collection = bpy.data.collections.new(name=object_name)
+
+    # Link the object and its children to the collection.
+    collection.objects.link(new_object)
+
+    for child in new_object.children_recursive:
+        collection.objects.link(child)
+
+    # Link the collection to the scene.
+    bpy.context.scene.collection.children.link(collection)
+
+    return collection
+
+
+def remove_static_mesh_asset(asset: PackageAsset):
+    collection = bpy.data.collections.get(asset.object_name, None)
+    if collection is None:
+        return
+    for obj in list(collection.all_objects):
+        data = obj.data
+        bpy.data.objects.remove(obj)
+        if isinstance(data, bpy.types.Mesh) and data.users == 0:
+            bpy.data.meshes.remove(data)
+    bpy.data.collections.remove(collection)
+
+
+def read_previous_asset_hashes(output_path: str) -> dict[str, str] | None:
+    """
+    Opens the existing .blend file of the package and returns the hashes of the assets that it was built from, or None
+    (with an empty file loaded) if it cannot be built incrementally.
+    """
+    if os.path.isfile(output_path):
+        bpy.ops.wm.open_mainfile(filepath=output_path, load_ui=False)
+        build_data = bpy.context.scene.get(BUILD_PROPERTY_NAME, None)
+        if build_data is not None:
+            build_data = json.loads(build_data)
+            if build_data.get('builder_version', None) == get_builder_version():
+                return build_data['assets']
+            print('The package was built with a different version of the builder; rebuilding all assets')
+        else:
+            print('The package has no record of its assets; rebuilding all assets')
+        bpy.ops.wm.read_homefile(use_empty=True, use_factory_startup=True)
+    return None
+
+
 def build(args):
     input_directory = Path(args.input_directory).resolve()
 
     package_name = input_directory.parts[-1]
 
+    if args.output_path is None:
+        args.output_path = os.path.join(args.input_directory, f'{package_name}.blend')
+
+    output_path = str(Path(args.output_path).resolve())
+
+    assets = get_package_assets(input_directory)
+    asset_hashes = get_package_asset_hashes(input_directory, package_name, assets)
+
+    # In incremental mode, the existing .blend file is opened and only the assets that were added or changed since it
+    # was built are imported. Assets that were not changed are left untouched, along with their previews.
+    previous_asset_hashes = read_previous_asset_hashes(output_path) if getattr(args, 'incremental', False) else None
+    if previous_asset_hashes is None:
+        previous_asset_hashes = dict()
+
+    changed_asset_keys = {key for key, hash_ in asset_hashes.items() if previous_asset_hashes.get(key, None) != hash_}
+    removed_asset_keys = set(previous_asset_hashes.keys()) - set(asset_hashes.keys())
+
+    if previous_asset_hashes:
+        print(f'Incremental build: {len(asset_hashes) - len(changed_asset_keys)} unchanged, '
+              f'{len(changed_asset_keys & previous_asset_hashes.keys())} changed, '
+              f'{len(changed_asset_keys - previous_asset_hashes.keys())} added, {len(removed_asset_keys)} removed')
+
+    # Remove the assets that were removed from the package, and the static meshes that are going to be re-imported.
+    for key in removed_asset_keys:
+        class_type, object_name = key.split('/', 1)
+        asset = PackageAsset(class_type, object_name)
+        if class_type == 'StaticMesh':
+            remove_static_mesh_asset(asset)
+        elif class_type in material_class_names:
+            material = bpy.data.materials.get(object_name, None)
+            if material is not None:
+                bpy.data.materials.remove(material)
+
+    # Materials that are going to be re-imported are kept until their replacements exist, so that the static meshes
+    # that use them can be remapped to the replacements.
+    replaced_materials: dict[str, bpy.types.Material] = dict()
+    # Assets that fail to import are not recorded, so that they are attempted again by the next build.
+    failed_asset_keys = set()
+    for key in changed_asset_keys:
+        asset = assets[key]
+        if asset.class_type == 'StaticMesh':
+            remove_static_mesh_asset(asset)
+        elif asset.class_type in material_class_names:
+            material = bpy.data.materials.get(asset.object_name, None)
+            if material is not None:
+                # Free up the name for the replacement.
+                material.name = f'{asset.object_name}.replaced'
+                replaced_materials[asset.object_name] = material
+
     # Packages can hold basically any kind of asset in them.
     # As a result, static meshes can reference textures residing in the same package.
     # Because the PSK importer tries to link existing materials from the same file
     # first before loading it from an asset library, we must make sure all the materials
     # are in the .blend file before it evaluates any static meshes.
-    material_files = []
-    static_mesh_files = []
+    material_assets = []
+    static_mesh_assets = []
     new_ids: list[bpy.types.ID] = []
 
-    for file in glob.glob('**/*.props.txt', root_dir=args.input_directory):
-        # The class type of the object is the directory name of the parent folder.
-        class_type = Path(os.path.join(args.input_directory, file)).parent.parts[-1]
-
-        if class_type == 'StaticMesh':
-            static_mesh_files.append(file)
-        elif class_type in material_class_names:
-            material_files.append(file)
+    for key in sorted(changed_asset_keys):
+        asset = assets[key]
+        if asset.class_type == 'StaticMesh':
+            static_mesh_assets.append(asset)
+        elif asset.class_type in material_class_names:
+            material_assets.append(asset)
         else:
-            warnings.warn(f'Unhandled class type: {class_type}')
+            warnings.warn(f'Unhandled class type: {asset.class_type}')
 
     # Materials.
-    for file in material_files:
-        filepath = os.path.join(args.input_directory, file)
-        object_name = os.path.basename(file).replace('.props.txt', '')
-
-        try:
-            bpy.ops.bdk.import_material(filepath=filepath, repository_id=args.repository_id)
-        except Exception as e:
-            print(e)
+    new_materials = import_material_assets(input_directory, material_assets, args.repository_id) \
+        if material_assets else dict()
+    for asset in material_assets:
+        new_material = new_materials[asset.key]
+        replaced_material = replaced_materials.pop(asset.object_name, None)
+        if new_material is None:
+            failed_asset_keys.add(asset.key)
+            if replaced_material is not None:
+                bpy.data.materials.remove(replaced_material)
             continue
-
-        new_material = bpy.data.materials[object_name]
+        if replaced_material is not None:
+            replaced_material.user_remap(new_material)
+            bpy.data.materials.remove(replaced_material)
         new_ids.append(new_material)
 
+    if material_assets:
+        print(f'Parsed material cache: {get_parsed_material_disk_cache_report()}')
+
     # TODO: add support for Unreal 1 VertMeshes
 
     # Static Meshes.
-    for file in static_mesh_files:
-        object_name = os.path.basename(file).replace('.props.txt', '')
-        extensions = ['.pskx', '.psk']
-        filenames = [os.path.join(args.input_directory, 'StaticMesh', f'{object_name}{extension}') for extension in extensions]
-        filename = next((filename for filename in filenames if os.path.isfile(filename)), None)
-
-        if filename is None:
-            warnings.warn(f'Could not find a static mesh file for {object_name}')
+    for asset in static_mesh_assets:
+        collection = import_static_mesh_asset(input_directory, package_name, asset, args.repository_id)
+        if collection is None:
+            failed_asset_keys.add(asset.key)
             continue
-
-        bpy.ops.psk.import_file(
-            filepath=filename,
-            components='MESH',
-            should_import_materials=True,
-            bdk_repository_id=args.repository_id
-        )
-
-        package_reference = f'StaticMesh\'{package_name}.{object_name}\''
-
-        new_object = bpy.data.objects[object_name]
-        new_object.data.name = package_reference
-
-        # Provide a "stable" reference to the object in the package.
-        # The name of the data block is not stable because the object & data can be duplicated in Blender fairly
-        # easily, thus changing the name of the data block.
-        new_object.bdk.package_reference = package_reference
-
-        new_object['Class'] = 'StaticMeshActor'
-
-        # Add the object to a collection with the name of the object.
-        collection = bpy.data.collections.new(name=object_name)
-
-        # Link the object and its children to the collection.
-        collection.objects.link(new_object)
-
-        for child in new_object.children_recursive:
-            collection.objects.link(child)
-
-        # Link the collection to the scene.
-        bpy.context.scene.collection.children.link(collection)
-
         # Add the collection to the new_ids list.
         new_ids.append(collection)
 
@@ -118,20 +346,187 @@ def build(args):
         new_id.asset_data.catalog_id = args.catalog_id
         new_id.asset_generate_preview()
 
-    # Save the file to disk.
-    if args.output_path is None:
-        args.output_path = os.path.join(args.input_directory, f'{package_name}.blend')
+    # Record the hashes of the assets so that the next build can be incremental.
+    bpy.context.scene[BUILD_PROPERTY_NAME] = json.dumps({
+        'builder_version': get_builder_version(),
+        'assets': {key: hash_ for key, hash_ in asset_hashes.items() if key not in failed_asset_keys},
+    })
 
+    # Save the file to disk.
     output_directory = os.path.join(os.path.dirname(args.output_path))
     os.makedirs(output_directory, exist_ok=True)
 
     # Note that even if there are no new objects, we still save the file.
     bpy.ops.wm.save_as_mainfile(
-        filepath=str(Path(args.output_path).resolve()),
+        filepath=output_path,
         copy=True
     )
 
 
+def get_windows_process_memory_counters(process_handle: int | None = None):
+    """
+    Returns the memory counters of the process with the given handle, or of this process if no handle is given. The
+    counters are all zero if they could not be queried.
+    """
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [
+            ('cb', wintypes.DWORD),
+            ('PageFaultCount', wintypes.DWORD),
+            ('PeakWorkingSetSize', ctypes.c_size_t),
+            ('WorkingSetSize', ctypes.c_size_t),
+            ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+            ('QuotaPagedPoolUsage', ctypes.c_size_t),
+            ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+            ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+            ('PagefileUsage', ctypes.c_size_t),
+            ('PeakPagefileUsage', ctypes.c_size_t),
+        ]
+
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+    if process_handle is None:
+        get_current_process = ctypes.windll.kernel32.GetCurrentProcess
+        get_current_process.restype = wintypes.HANDLE
+        process_handle = get_current_process()
+    ctypes.windll.psapi.GetProcessMemoryInfo(wintypes.HANDLE(process_handle), ctypes.byref(counters), counters.cb)
+    return counters
+
+
+def get_process_resident_memory() -> int:
+    """
+    Returns the resident memory of this process in bytes.
+    """
+    match sys.platform:
+        case 'linux':
+            with open('/proc/self/statm') as f:
+                return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        case 'win32':
+            return get_windows_process_memory_counters().WorkingSetSize
+        case 'darwin':
+            import resource
+            # NOTE: This is the peak resident memory, not the current resident memory. It is reported in bytes.
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        case _:
+            import resource
+            # NOTE: This is the peak resident memory, not the current resident memory. It is reported in kilobytes.
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def reset_process_peak_memory():
+    """
+    Resets the peak resident memory of this process, so that the peak of each job can be measured. This is only
+    supported on Linux; elsewhere, the peak is the peak over the lifetime of the process.
+    """
+    if sys.platform == 'linux':
+        try:
+            with open('/proc/self/clear_refs', 'w') as f:
+                f.write('5')
+        except OSError:
+            pass
+
+
+def get_process_peak_memory() -> int:
+    """
+    Returns the peak resident memory of this process in bytes (since the last call to `reset_process_peak_memory`,
+    where supported).
+    """
+    match sys.platform:
+        case 'linux':
+            with open('/proc/self/status') as f:
+                for line in f:
+                    if line.startswith('VmHWM:'):
+                        return int(line.split()[1]) * 1024
+            return get_process_resident_memory()
+        case 'win32':
+            return get_windows_process_memory_counters().PeakWorkingSetSize
+        case 'darwin':
+            import resource
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        case _:
+            import resource
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def worker(args):
+    """
+    Runs as a long-lived build worker. Jobs are read as JSON lines from stdin and results are written as JSON lines to
+    stdout, prefixed with WORKER_MESSAGE_PREFIX. While a job is running, the process's stdout and stderr are redirected
+    to the job's log file. The file is reset to the factory startup file between jobs.
+    """
+    # Keep a handle to the original stdout for the protocol channel, since the stdout file descriptor is redirected to
+    # the log file while a job is running.
+    protocol = os.fdopen(os.dup(sys.stdout.fileno()), 'w')
+
+    def send(message: dict):
+        protocol.write(WORKER_MESSAGE_PREFIX + json.dumps(message) + '\n')
+        protocol.flush()
+
+    send({'type': 'READY', 'memory': get_process_resident_memory()})
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+
+        job = json.loads(line)
+
+        if job['type'] == 'EXIT':
+            break
+
+        log_path = Path(job['log_path'])
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+
+        sys.stdout.flush()
+        sys.stderr.flush()
+        stdout_fd = os.dup(sys.stdout.fileno())
+        stderr_fd = os.dup(sys.stderr.fileno())
+
+        error = None
+
+        reset_process_peak_memory()
+
+        with open(log_path, 'w') as log_file:
+            os.dup2(log_file.fileno(), sys.stdout.fileno())
+            os.dup2(log_file.fileno(), sys.stderr.fileno())
+            try:
+                build(Namespace(
+                    input_directory=job['input_directory'],
+                    repository_id=job['repository_id'],
+                    catalog_id=job['catalog_id'],
+                    output_path=job['output_path'],
+                    incremental=job.get('incremental', False),
+                ))
+            except Exception as e:
+                print('An error occurred while running the script.\n\n', file=sys.stderr)
+                traceback.print_exc()
+                error = str(e)
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os.dup2(stdout_fd, sys.stdout.fileno())
+                os.dup2(stderr_fd, sys.stderr.fileno())
+                os.close(stdout_fd)
+                os.close(stderr_fd)
+
+        peak_memory = get_process_peak_memory()
+
+        # Reset to the factory startup file so that the next job starts from a clean slate. Unlike
+        # `read_factory_settings`, this leaves the preferences (and therefore the enabled add-ons and repositories)
+        # untouched.
+        bpy.ops.wm.read_homefile(use_empty=True, use_factory_startup=True)
+
+        send({
+            'type': 'RESULT',
+            'success': error is None,
+            'error': error,
+            'memory': get_process_resident_memory(),
+            'peak_memory': peak_memory,
+        })
+
+
 if __name__ == '__main__':
     parser = ArgumentParser()
     subparsers = parser.add_subparsers(title='command')
@@ -140,7 +535,12 @@ if __name__ == '__main__':
     build_subparser.add_argument('repository_id')
     build_subparser.add_argument('catalog_id')
     build_subparser.add_argument('--output_path', required=False, default=None)
+    build_subparser.add_argument('--incremental', action='store_true',
+                                 help='Only import the assets that were added or changed since the package was last '
+                                      'built')
     build_subparser.set_defaults(func=build)
+    worker_subparser = subparsers.add_parser('worker')
+    worker_subparser.set_defaults(func=worker)
     args = sys.argv[sys.argv.index('--')+1:]
     args = parser.parse_args(args)
 
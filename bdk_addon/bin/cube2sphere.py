@@ -1,6 +1,8 @@
 import sys
 import bpy
 import argparse
+import json
+import os
 
 faces = ['front', 'back', 'right', 'left', 'top', 'bottom']
 
@@ -8,16 +10,16 @@ parser = argparse.ArgumentParser()
 for face in faces:
     parser.add_argument(f'--{face}', required=False, default=None)
 parser.add_argument('--output', required=False, default='./output.png')
+# Batch mode: a JSON file containing a list of jobs, each with a `faces` dictionary and an `output` path.
+parser.add_argument('--jobs', required=False, default=None)
+# Batch mode: the path of the JSON file that the result of each job is written to.
+parser.add_argument('--results', required=False, default=None)
 args = parser.parse_args(sys.argv[sys.argv.index('--')+1:])
 
 images = bpy.data.images
 
-for face in faces:
-    images[face].filepath = getattr(args, face)
-
 scene = bpy.context.scene
 assert scene
-scene.render.filepath = args.output
 scene.render.resolution_x = 512
 scene.render.resolution_y = 256
 scene.render.resolution_percentage = 100
@@ -26,4 +28,33 @@ assert scene.render.engine == 'CYCLES'
 assert scene.cycles
 scene.cycles.samples = 4
 
-bpy.ops.render.render(write_still=True)
+
+def convert(face_paths: dict[str, str], output: str):
+    for face in faces:
+        face_path = face_paths.get(face, None)
+        if face_path is None or not os.path.isfile(face_path):
+            raise FileNotFoundError(f'Missing {face} face: {face_path}')
+        images[face].filepath = face_path
+        images[face].reload()
+    scene.render.filepath = output
+    bpy.ops.render.render(write_still=True)
+
+
+if args.jobs is not None:
+    with open(args.jobs, 'r') as f:
+        jobs = json.load(f)
+
+    results = []
+    for job in jobs:
+        try:
+            convert(job['faces'], job['output'])
+            results.append({'output': job['output'], 'success': True, 'error': None})
+        except Exception as e:
+            print(f'Failed to convert cubemap {job["output"]}: {e}', file=sys.stderr)
+            results.append({'output': job['output'], 'success': False, 'error': str(e)})
+
+    if args.results is not None:
+        with open(args.results, 'w') as f:
+            json.dump(results, f)
+else:
+    convert({face: getattr(args, face) for face in faces}, args.output)
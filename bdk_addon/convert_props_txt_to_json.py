@@ -19,29 +19,36 @@ def get_line_key(line):
         return res.group("key").strip()
 
 
-def get_text_until_closing_bracket(lines, lines_starting_index):
-    """
-    Get text from first opening bracket to corresponding closing bracket, return line numbers for this text block
-    """
-    text = ""
-    bracket_detected = False
-    bracket_counter = 0
-    lines_to_skip = []
-
-    for i, line in enumerate(lines):
-        for char in line:
-            if char == "{":
-                bracket_detected = True
-                bracket_counter += 1
-            if char == "}":
-                bracket_counter -= 1
-            text += char
-            if bracket_detected and bracket_counter == 0:
-                lines_to_skip.append(lines_starting_index + i)
-                return text, lines_to_skip
-        lines_to_skip.append(lines_starting_index + i)
-        text += "\n"
-    raise ValueError("Bracket not closed")
+# Characters that make up the key of a property line (i.e., `[a-zA-Z\d\[\]\s]` in `get_line_key`).
+def _is_key_character(char):
+    return ('a' <= char <= 'z') or ('A' <= char <= 'Z') or char in '[]' or char.isdecimal() or char.isspace()
+
+
+def get_line_key_fast(line):
+    """
+    Same as `get_line_key`, but without a regular expression. The key is the run of key characters in front of the
+    first "=" that has any.
+    """
+    index = line.find("=")
+    while index != -1:
+        start = index
+        while start > 0 and _is_key_character(line[start - 1]):
+            start -= 1
+        if start != index:
+            return line[start:index].strip()
+        index = line.find("=", index + 1)
+    return None
+
+
+_TOKEN_PATTERN = re.compile(r"[{}\n]")
+
+
+def tokenize_props_txt_content(content):
+    """
+    Return the positions of the brackets and line breaks in the content, in order. The parser only ever looks at the
+    text between two of these, so the content is only scanned once.
+    """
+    return [match.start() for match in _TOKEN_PATTERN.finditer(content)]
 
 
 def strip_brackets_from_string_once_if_needed (string):
@@ -83,8 +90,15 @@ def boolify_nullify(s):
     raise ValueError(f"Couldn't boolify-nullify {s}")
 
 
+_KEYWORD_VALUES = {'true': True, 'false': False, 'none': None, 'null': None}
+
+
 def auto_convert(s):
-    for fn in (boolify_nullify, int, float):
+    # Same as trying `boolify_nullify` first, without raising and catching an exception for every other value.
+    keyword = s.lower()
+    if keyword in _KEYWORD_VALUES:
+        return _KEYWORD_VALUES[keyword]
+    for fn in (int, float):
         try:
             return fn(s)
         except ValueError:
@@ -141,36 +155,130 @@ def parse_props_txt_file_content(content):
     FlattenedTexture = None
     '''
     """
+    tokens = tokenize_props_txt_content(content)
+    data, _ = parse_props_txt_block(content, tokens, 0, 0, None, len(content))
+    return data
+
+
+def parse_props_txt_block(content, tokens, index, start, count, stop):
+    """
+    Parse the properties of a block that starts at `start` in the content, where tokens[index] is the first token at or
+    after `start`. If `count` is None, the block ends at `stop`. Otherwise, `count` is the number of brackets that are
+    open at `start`, and the block ends at the bracket that closes the last of them, which must come before `stop`.
+    Return the properties and the index of the token that ends the block.
+    """
     data = {}
-    lines = content.split("\n")
-
-    lines_to_skip = []
-    for i, line in enumerate(lines):
-        if i in lines_to_skip:
-            continue
-        key = get_line_key(line)
-        if not key:
-            continue
-        value_raw = "=".join(line.split("=")[1:]).strip()
-
-        if not value_raw:
-            # Is nested structure, start from next line
-            content, t_lines_to_skip = get_text_until_closing_bracket(lines[i + 1:], i + 1)
-            # Don't iterate through lines that are inside nested block
-            lines_to_skip += t_lines_to_skip
-
-            content = strip_brackets_from_string_once_if_needed(content)
-            value = parse_props_txt_file_content(content)
-        else:
-            if "{" in value_raw:
-                # Still nested structure, but 1-line
-                content = strip_brackets_from_string_once_if_needed(value_raw)
-                value = parse_inline_value(content)
-            else:
-                value = auto_convert(value_raw)
-        data[key] = value
+    token_count = len(tokens)
+    line_start = start
+    skip_line = False
+    while True:
+        # Find the end of the line, which is either a line break or the end of the block.
+        block_ended = False
+        while True:
+            if index == token_count or tokens[index] >= stop:
+                if count is not None:
+                    raise ValueError("Bracket not closed")
+                line_end = stop
+                block_ended = True
+                break
+            line_end = tokens[index]
+            char = content[line_end]
+            if char == "\n":
+                break
+            if count is not None:
+                count += 1 if char == "{" else -1
+                if count == 0:
+                    block_ended = True
+                    break
+            index += 1
 
-    return data
+        if not skip_line:
+            line = content[line_start:line_end]
+            key = get_line_key_fast(line)
+            if key:
+                value_raw = line[line.index("=") + 1:].strip()
+                if not value_raw:
+                    # Is nested structure, start from next line
+                    if block_ended:
+                        raise ValueError("Bracket not closed")
+                    opening_index, closed = find_opening_bracket(content, tokens, index + 1, count, stop)
+                    opening = tokens[opening_index]
+                    if closed == 0:
+                        data[key], index = parse_props_txt_block(content, tokens, opening_index + 1, opening + 1, 1,
+                                                                 stop)
+                    else:
+                        closing_index, index = find_unbalanced_block_end(content, tokens, opening_index, closed, count,
+                                                                         stop)
+                        data[key], _ = parse_props_txt_block(content, tokens, opening_index + 1, opening + 1, None,
+                                                             tokens[closing_index])
+                    # Don't parse the rest of the line that the nested block ends on
+                    line_start = tokens[index] + 1
+                    index += 1
+                    skip_line = True
+                    continue
+                if "{" in value_raw:
+                    # Still nested structure, but 1-line
+                    data[key] = parse_inline_value(strip_brackets_from_string_once_if_needed(value_raw))
+                else:
+                    data[key] = auto_convert(value_raw)
+
+        if block_ended:
+            return data, index
+        line_start = line_end + 1
+        index += 1
+        skip_line = False
+
+
+def find_opening_bracket(content, tokens, index, limit, stop):
+    """
+    Find the first opening bracket from tokens[index] on, which starts a nested block. `limit` is the number of brackets
+    that are open in the enclosing block (or None if it isn't closed by a bracket) and `stop` is where the enclosing
+    block ends at the latest.
+    Return the index of the opening bracket's token and the number of closing brackets in front of it.
+    """
+    token_count = len(tokens)
+    closed = 0
+    while True:
+        if index == token_count or tokens[index] >= stop:
+            raise ValueError("Bracket not closed")
+        char = content[tokens[index]]
+        if char == "{":
+            return index, closed
+        if char == "}":
+            closed += 1
+            if closed == limit:
+                # This closes the enclosing block before the nested block has started.
+                raise ValueError("Bracket not closed")
+        index += 1
+
+
+def find_unbalanced_block_end(content, tokens, opening_index, closed, limit, stop):
+    """
+    Find the end of a nested block that has closing brackets in front of its opening bracket.
+    NOTE: The closing brackets in front are counted too, so the brackets only balance again at a later opening bracket,
+     and the block is what comes before the last closing bracket in between. This only happens in malformed files, so
+     these blocks are found before they are parsed.
+    Return the index of the token of the last closing bracket and the index of the token that ends the block.
+    """
+    token_count = len(tokens)
+    count = 1 - closed
+    closing_index = None
+    index = opening_index
+    while count != 0:
+        index += 1
+        if index == token_count or tokens[index] >= stop:
+            raise ValueError("Bracket not closed")
+        char = content[tokens[index]]
+        if char == "{":
+            count += 1
+        elif char == "}":
+            count -= 1
+            closing_index = index
+            if limit is not None and count == -limit:
+                raise ValueError("Bracket not closed")
+    if closing_index is None:
+        raise ValueError("Closing bracket missing")
+    return closing_index, index
 
 
 def parse_props_txt_file(filepath):
@@ -1,6 +1,9 @@
 from typing import Self
 from pathlib import Path
+from weakref import WeakValueDictionary
+import functools
 import re
+import threading
 from .units import unreal_to_radians
 
 
@@ -13,14 +16,58 @@ class UColor:
 
 
 class UReference:
-    def __init__(self, package_name: str, object_name: str, type_name: str | None, group_name: str | None = None):
-        self.type_name = type_name
-        self.package_name = package_name
-        self.object_name = object_name
-        self.group_name = group_name
+    """
+    A reference to an Unreal object (e.g., `Texture'MyPackage.MyGroup.MyName'`).
+
+    References are interned, so there is only ever one instance for each distinct reference that is in use. They can
+    therefore be compared and hashed by identity, which makes them cheap to use as dictionary keys. References are
+    immutable.
+    """
+    __slots__ = ('type_name', 'package_name', 'object_name', 'group_name', '_string', '__weakref__')
+
+    # The interned references, keyed by their fields. A reference is dropped once nothing else refers to it.
+    _references: WeakValueDictionary[tuple[str, str, str | None, str | None], Self] = WeakValueDictionary()
+    _references_lock = threading.Lock()
+
+    _type_qualified_pattern = re.compile(r'(\w+)\'([\w\.\d\-\_ ]+)\'')
+    _name_pattern = re.compile(r'([\w\d\-\_ ]+)')
+
+    def __new__(cls, package_name: str, object_name: str, type_name: str | None, group_name: str | None = None):
+        key = (package_name, object_name, type_name, group_name)
+        reference = cls._references.get(key, None)
+        if reference is not None:
+            return reference
+        # NOTE: Unlike dict.setdefault, WeakValueDictionary.setdefault is not atomic, so the lock makes sure that threads
+        #  that race to intern the same reference all get the same instance.
+        with cls._references_lock:
+            reference = cls._references.get(key, None)
+            if reference is not None:
+                return reference
+            reference = super().__new__(cls)
+            object.__setattr__(reference, 'type_name', type_name)
+            object.__setattr__(reference, 'package_name', package_name)
+            object.__setattr__(reference, 'object_name', object_name)
+            object.__setattr__(reference, 'group_name', group_name)
+            object.__setattr__(reference, '_string', None)
+            cls._references[key] = reference
+            return reference
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __reduce__(self):
+        # Make sure that copied and unpickled references are interned as well.
+        return type(self), (self.package_name, self.object_name, self.type_name, self.group_name)
 
     @classmethod
-    def from_string(cls,string: str) -> Self | None:
+    def from_string(cls, string: str) -> Self | None:
+        return cls._parse_string(string)
+
+    @classmethod
+    @functools.lru_cache(maxsize=32768)
+    def _parse_string(cls, string: str) -> Self | None:
+        # NOTE: The results are cached for the most recently parsed strings, since the same strings come up over and over
+        #  (e.g., the textures of the materials in a map). The cache keeps its references alive.
         if string == 'None' or string == '':
             return None
 
@@ -28,8 +75,7 @@ class UReference:
         type_name = None
         group_name = None
 
-        pattern = r'(\w+)\'([\w\.\d\-\_ ]+)\''
-        match = re.match(pattern, string)
+        match = cls._type_qualified_pattern.match(string)
 
         if match is not None:
             # Type-qualified reference match succeeded.
@@ -39,8 +85,7 @@ class UReference:
             # Type-qualified reference match failed, try to parse the incoming string as an object path.
             object_path = string
 
-        reference_pattern = r'([\w\d\-\_ ]+)'
-        values = re.findall(reference_pattern, object_path)
+        values = cls._name_pattern.findall(object_path)
         package_name = values[0]
         object_name = values[-1]
 
@@ -55,11 +100,16 @@ class UReference:
         return cls(package_name, object_name, type_name)
 
     def __str__(self):
-        string = f"{self.type_name}'{self.package_name}"
-        if self.group_name is not None:
-            string += f'.{self.group_name}'
-        string += f".{self.object_name}'"
-        return string
+        if self._string is None:
+            string = f"{self.type_name}'{self.package_name}"
+            if self.group_name is not None:
+                string += f'.{self.group_name}'
+            string += f".{self.object_name}'"
+            object.__setattr__(self, '_string', string)
+        return self._string
+
+    def __repr__(self):
+        return f'UReference({str(self)})'
 
 
 class URotator:
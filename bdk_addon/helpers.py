@@ -1,11 +1,14 @@
 from mathutils import Matrix
 
 from .data import UReference
-from bpy.types import Material, Object, Context, ByteColorAttribute, ViewLayer, LayerCollection, Collection, Mesh
+from .node_helpers import ensure_geometry_node_tree, ensure_input_and_output_nodes
+from bpy.types import Material, Object, Context, ByteColorAttribute, ViewLayer, LayerCollection, Collection, Mesh, \
+    NodeTree
 from pathlib import Path
-from typing import Iterable, Optional, cast as typing_cast
+from typing import Iterable, Optional, Sequence, cast as typing_cast
 import bpy
 import numpy
+import os
 import re
 
 
@@ -109,6 +112,68 @@ def get_repository_by_id(context: Context, repository_id: str) -> Optional['BDK_
     return None
 
 
+class PackageBlendFileIndex:
+    """
+    An index of the .blend files in an asset library directory (and its subdirectories), keyed by package name.
+
+    The index is stale once the modified time of any of the indexed directories changes, which happens when a file or
+    directory is added to, removed from or renamed within it.
+    """
+    def __init__(self, directory: Path):
+        self.directory = directory
+        # The modified time of each directory in the tree, or None if the root directory does not exist.
+        self.directory_modified_times: dict[str, int | None] = dict()
+        self.blend_files: dict[str, str] = dict()
+
+        try:
+            self.directory_modified_times[str(directory)] = os.stat(directory).st_mtime_ns
+        except FileNotFoundError:
+            self.directory_modified_times[str(directory)] = None
+            return
+
+        for root, _, file_names in os.walk(directory):
+            self.directory_modified_times[root] = os.stat(root).st_mtime_ns
+            for file_name in file_names:
+                package_name, extension = os.path.splitext(file_name)
+                if extension == '.blend':
+                    # NOTE: Package names are normalized with `normcase` so that the lookup is case-insensitive on
+                    #  case-insensitive file systems, just like a glob would be.
+                    self.blend_files.setdefault(os.path.normcase(package_name), os.path.join(root, file_name))
+
+    def is_stale(self) -> bool:
+        for directory, modified_time in self.directory_modified_times.items():
+            try:
+                if os.stat(directory).st_mtime_ns != modified_time:
+                    return True
+            except FileNotFoundError:
+                if modified_time is not None:
+                    return True
+        return False
+
+    def get(self, package_name: str) -> str | None:
+        return self.blend_files.get(os.path.normcase(package_name), None)
+
+
+# Package .blend file indices, keyed by the asset library directory.
+_package_blend_file_indices: dict[str, PackageBlendFileIndex] = dict()
+
+
+def invalidate_package_blend_file_indices():
+    """
+    Discards the package .blend file indices so that they are rebuilt on the next lookup (e.g., when the manifest of a
+    repository is written).
+    """
+    _package_blend_file_indices.clear()
+
+
+def get_package_blend_file_index(directory: Path) -> PackageBlendFileIndex:
+    index = _package_blend_file_indices.get(str(directory), None)
+    if index is None or index.is_stale():
+        index = PackageBlendFileIndex(directory)
+        _package_blend_file_indices[str(directory)] = index
+    return index
+
+
 def get_blend_file_for_package(context: Context, package_name: str, repository_id: str | None = None) -> str | None:
     from .bdk.repository.kernel import get_repository_cache_directory
     if repository_id is None:
@@ -117,10 +182,7 @@ def get_blend_file_for_package(context: Context, package_name: str, repository_i
     if repository is None:
         return None
     asset_library_path = get_repository_cache_directory(repository) / 'assets'
-    blend_files = [fp for fp in asset_library_path.glob(f'**/{package_name}.blend') if fp.is_file()]
-    if len(blend_files) > 0:
-        return str(blend_files[0])
-    return None
+    return get_package_blend_file_index(asset_library_path).get(package_name)
 
 
 def get_addon_preferences(context: Context):
@@ -153,112 +215,209 @@ def get_active_repository(context: Context) -> Optional['BDK_PG_repository']:
     return get_repository_by_id(context, repository_id)
 
 
-def load_bdk_material(context: Context, reference_string: str, repository_id: str | None = None) -> Material | None:
+def _get_package_asset_key(package_name: str, object_name: str) -> tuple[str, str]:
+    # Unreal package and object names are case-insensitive.
+    return package_name.upper(), object_name.upper()
+
+
+def _get_loaded_material_index() -> dict[tuple[str, str], Material]:
     """
-    Loads a material from a BDK repository.
-    :param context: The Blender context.
-    :param reference: The reference to the material.
-    :param repository_id: The ID of the repository to load the material from. If None, the repository ID from the scene.
+    Returns the materials that have already been loaded, keyed by their package reference. Linked materials take
+    precedence over local materials with the same package reference.
     """
-    reference = UReference.from_string(reference_string)
+    index = dict()
+    for material in bpy.data.materials:
+        reference = UReference.from_string(material.bdk.package_reference)
+        if reference is None:
+            continue
+        key = _get_package_asset_key(reference.package_name, reference.object_name)
+        if key not in index or material.library is not None:
+            index[key] = material
+    return index
+
 
-    if reference is None:
+def _get_linked_collection_package_name(collection: Collection) -> str | None:
+    if collection.library is None:
         return None
+    # The package libraries are named after their package (e.g., `.../StaticMeshes.blend`).
+    return Path(collection.library.filepath).stem
 
-    # Strip the group name (useless for materials).
-    reference.group_name = None
 
-    if reference.package_name == 'myLevel':
-        # The second argument is a library, which we pass as None to get the local material.
-        # https://blender.stackexchange.com/questions/238342/how-to-recognize-local-and-linked-material-with-python
-        material = bpy.data.materials.get((reference.object_name, None), None)
-    else:
-        # See if we already have the material linked from elsewhere.
-        material = bpy.data.materials.get(reference.object_name, None)
-        if material is not None:
-            # Make sure the material reference matches the package reference.
-            # TODO: for some reason I can't remember, the full reference is not passed in here (the class type is missing).
-            #  Which is why we only check the package name and object name.
-            material_package_reference = UReference.from_string(material.bdk.package_reference)
-            if material_package_reference.package_name == reference.package_name and material_package_reference.object_name == reference.object_name:
-                return material
-        # TODO: There is a bug here where if you linked a material with the same name as another package, depending on the
-        #  order it may try to load the "wrong" one, then it will always go and fetch the linked material instead of the
-        #  local one. Not the end of the world, but it makes things slightly slower.
-        #  A strategy here would be to traverse all the materials and check if the package reference matches, then return
-        #  that material if it does. Traversing all the materials is still faster than trying to load from a file.
+def _get_linked_collection_index() -> dict[tuple[str, str], Collection]:
+    """
+    Returns the collections that have already been linked from package libraries, keyed by package and object name.
+    """
+    index = dict()
+    for collection in bpy.data.collections:
+        package_name = _get_linked_collection_package_name(collection)
+        if package_name is not None:
+            index[_get_package_asset_key(package_name, collection.name)] = collection
+    return index
+
+
+def load_bdk_assets(context: Context,
+                    material_reference_strings: Iterable[str] = (),
+                    static_mesh_reference_strings: Iterable[str] = (),
+                    repository_id: str | None = None) \
+        -> tuple[dict[str, Material | None], dict[str, Collection | None]]:
+    """
+    Loads materials and static meshes from a BDK repository in a single batch.
+
+    References that are already loaded are resolved without any file I/O. The remaining references are grouped by the
+    package .blend file that they are in, and each of those files is opened exactly once to link everything that is
+    needed from it, so the cost scales with the number of distinct packages rather than the number of references.
 
-    if material is not None and material.bdk.package_reference == str(reference):
-        return material
+    :param context: The Blender context.
+    :param material_reference_strings: The references to the materials.
+    :param static_mesh_reference_strings: The references to the static meshes.
+    :param repository_id: The ID of the repository to load the assets from. If None, the repository ID from the scene.
+    :return: The materials and the static mesh collections, keyed by their reference strings. References that could
+        not be resolved map to None.
+    """
+    materials: dict[str, Material | None] = dict()
+    collections: dict[str, Collection | None] = dict()
 
     if repository_id is None:
         repository_id = get_active_repository_id(context)
 
-    blend_file = get_blend_file_for_package(context, reference.package_name, repository_id)
+    # The unresolved references in each package .blend file, as a (material names, collection names) pair. The names
+    # are mapped to the reference strings that they resolve.
+    library_requests: dict[str, tuple[dict[str, list[str]], dict[str, list[str]]]] = dict()
+    blend_files: dict[str, str | None] = dict()
+
+    def get_library_request(package_name: str):
+        if package_name not in blend_files:
+            blend_files[package_name] = get_blend_file_for_package(context, package_name, repository_id)
+            if blend_files[package_name] is None:
+                print('Failed to find blend file for package reference: ' + package_name)
+        blend_file = blend_files[package_name]
+        if blend_file is None:
+            return None
+        if blend_file not in library_requests:
+            library_requests[blend_file] = (dict(), dict())
+        return library_requests[blend_file]
 
-    if blend_file is None:
-        print('Failed to find blend file for package reference: ' + reference.package_name)
-        return None
+    # The indices of the loaded data are only built if a reference misses the lookup by name.
+    material_index: dict[tuple[str, str], Material] | None = None
+    collection_index: dict[tuple[str, str], Collection] | None = None
 
-    print(f'Loading material {reference} from blend file: {blend_file}')
+    for reference_string in material_reference_strings:
+        if reference_string in materials:
+            continue
+        materials[reference_string] = None
 
-    blend_file = Path(blend_file).resolve().absolute()
+        reference = UReference.from_string(reference_string)
+        if reference is None:
+            continue
 
-    with bpy.data.libraries.load(str(blend_file), link=True, relative=True, assets_only=True) as (data_in, data_out):
-        if reference.object_name in data_in.materials:
-            data_out.materials = [reference.object_name]
-        else:
-            return None
+        if reference.package_name == 'myLevel':
+            # The second argument is a library, which we pass as None to get the local material.
+            # https://blender.stackexchange.com/questions/238342/how-to-recognize-local-and-linked-material-with-python
+            materials[reference_string] = bpy.data.materials.get((reference.object_name, None), None)
+            continue
+
+        # See if we already have the material, checking the material with the same name first.
+        key = _get_package_asset_key(reference.package_name, reference.object_name)
+        material = bpy.data.materials.get(reference.object_name, None)
+        if material is not None:
+            # TODO: for some reason I can't remember, the full reference is not passed in here (the class type is
+            #  missing). Which is why we only check the package name and object name.
+            material_package_reference = UReference.from_string(material.bdk.package_reference)
+            if material_package_reference is None or \
+                    _get_package_asset_key(material_package_reference.package_name,
+                                           material_package_reference.object_name) != key:
+                material = None
+        if material is None:
+            # A material with the same name from another package may be shadowing it.
+            if material_index is None:
+                material_index = _get_loaded_material_index()
+            material = material_index.get(key, None)
+        if material is not None:
+            materials[reference_string] = material
+            continue
 
-    # The bug here is that NAMES are the same! You can have a material with the same name as another material, but
-    #  only if one is linked and the other is local. So we need to check if the material is local or not.
-    materials = [material for material in bpy.data.materials if material.name == reference.object_name]
+        library_request = get_library_request(reference.package_name)
+        if library_request is not None:
+            library_request[0].setdefault(reference.object_name, []).append(reference_string)
 
-    if len(materials) == 0:
-        return None
+    for reference_string in static_mesh_reference_strings:
+        if reference_string in collections:
+            continue
+        collections[reference_string] = None
 
-    # If there are multiple materials with the same name, we need to find the one that is linked.
-    # If there are no linked materials, we just return the first one.
-    for material in materials:
-        if material.library is not None:
-            return material
+        reference = UReference.from_string(reference_string)
+        if reference is None:
+            continue
 
-    return materials[0]
+        if reference.package_name == 'myLevel':
+            # Failed to find object in myLevel package. (handle reporting this error downstream)
+            collections[reference_string] = bpy.data.collections.get(reference.object_name, None)
+            continue
 
+        # See if we already have the collection linked from the package library.
+        key = _get_package_asset_key(reference.package_name, reference.object_name)
+        collection = bpy.data.collections.get(reference.object_name, None)
+        if collection is not None:
+            package_name = _get_linked_collection_package_name(collection)
+            if package_name is None or _get_package_asset_key(package_name, collection.name) != key:
+                collection = None
+        if collection is None:
+            if collection_index is None:
+                collection_index = _get_linked_collection_index()
+            collection = collection_index.get(key, None)
+        if collection is not None:
+            collections[reference_string] = collection
+            continue
 
-# TODO: should actually do the object, not the mesh data
-def load_bdk_static_mesh(context: Context, reference_string: str, repository_id: str | None = None) -> Collection | None:
-    reference = UReference.from_string(reference_string)
+        library_request = get_library_request(reference.package_name)
+        if library_request is not None:
+            library_request[1].setdefault(reference.object_name, []).append(reference_string)
 
-    if reference is None:
-        return None
+    for blend_file, (material_names, collection_names) in library_requests.items():
+        print(f'Linking {len(material_names)} material(s) and {len(collection_names)} static mesh(es) from blend file: '
+              f'{blend_file}')
 
-    if reference.package_name == 'myLevel':
-        # Failed to find object in myLevel package. (handle reporting this error downstream)
-        return bpy.data.collections.get(reference.object_name, None)
+        blend_file = Path(blend_file).resolve().absolute()
 
-    # TODO: we need to check if the collection is already linked into the scene (make sure the package reference matches as well!)
-    # This will dramatically improve the performance of this because it won't need to do any File I/O.
+        # Static meshes are stored as collections, which are not marked as assets.
+        with bpy.data.libraries.load(str(blend_file), link=True, relative=True, assets_only=not collection_names) \
+                as (data_in, data_out):
+            material_names_in = set(data_in.materials)
+            collection_names_in = set(data_in.collections)
+            material_names_out = [name for name in material_names if name in material_names_in]
+            collection_names_out = [name for name in collection_names if name in collection_names_in]
+            data_out.materials = list(material_names_out)
+            data_out.collections = list(collection_names_out)
 
-    # Strip the group name since we don't use it in the BDK library files.
-    reference.group_name = None
+        # Once the library is loaded, the lists contain the linked data-blocks instead of their names.
+        for name, material in zip(material_names_out, data_out.materials):
+            for reference_string in material_names[name]:
+                materials[reference_string] = material
 
-    blend_file = get_blend_file_for_package(context, reference.package_name, repository_id)
+        for name, collection in zip(collection_names_out, data_out.collections):
+            for reference_string in collection_names[name]:
+                collections[reference_string] = collection
 
-    if blend_file is None:
-        return None
+    return materials, collections
 
-    blend_file = Path(blend_file).resolve().absolute()
 
-    with bpy.data.libraries.load(str(blend_file), link=True, relative=True, assets_only=False) as (data_in, data_out):
-        if reference.object_name in data_in.collections:
-            data_out.collections = [reference.object_name]
-        else:
-            return None
+def load_bdk_material(context: Context, reference_string: str, repository_id: str | None = None) -> Material | None:
+    """
+    Loads a material from a BDK repository.
+    :param context: The Blender context.
+    :param reference_string: The reference to the material.
+    :param repository_id: The ID of the repository to load the material from. If None, the repository ID from the scene.
+    """
+    materials, _ = load_bdk_assets(context, material_reference_strings=[reference_string],
+                                   repository_id=repository_id)
+    return materials[reference_string]
 
-    collection = bpy.data.collections[reference.object_name]
 
-    return collection
+# TODO: should actually do the object, not the mesh data
+def load_bdk_static_mesh(context: Context, reference_string: str, repository_id: str | None = None) -> Collection | None:
+    _, collections = load_bdk_assets(context, static_mesh_reference_strings=[reference_string],
+                                     repository_id=repository_id)
+    return collections[reference_string]
 
 
 # https://blenderartists.org/t/duplicating-pointerproperty-propertygroup-and-collectionproperty/1419096/2
@@ -475,16 +634,130 @@ def humanize_time(seconds: float):
         return f"{hours}h {minutes}m {seconds:.2f}s"
 
 
-def get_vertex_group_weights(obj: Object, vertex_group_name: str):
-    vertex_group = obj.vertex_groups.get(vertex_group_name)
-    assert vertex_group
+def get_vertex_group_weights(context: Context, obj: Object, vertex_group_names: Sequence[str]) \
+        -> dict[str, numpy.ndarray]:
+    """
+    Reads the weight of every vertex for each of the vertex groups, with a weight of 0 for unassigned vertices.
+
+    The weights of a vertex group can only be read one vertex at a time through the Python API. Instead, a temporary
+    object that shares the mesh is evaluated with a geometry node tree that stores the vertex groups as float
+    attributes, which are then read in bulk with `foreach_get`.
+
+    The temporary object is evaluated in a temporary scene, so that only it is evaluated, and not the other objects of
+    the scene (e.g., the modifiers of the terrain info object). The cost is therefore a single evaluation of the mesh
+    with the node tree, which is linear in the number of vertices and vertex groups.
+    """
+    attribute_names = [f'bdk_vertex_group_weights_{index}' for index in range(len(vertex_group_names))]
+
+    def build_function(node_tree: NodeTree):
+        input_node, output_node = ensure_input_and_output_nodes(node_tree)
+        geometry_socket = input_node.outputs['Geometry']
+        for vertex_group_name, attribute_name in zip(vertex_group_names, attribute_names):
+            named_attribute_node = node_tree.nodes.new(type='GeometryNodeInputNamedAttribute')
+            named_attribute_node.data_type = 'FLOAT'
+            named_attribute_node.inputs['Name'].default_value = vertex_group_name
+
+            store_named_attribute_node = node_tree.nodes.new(type='GeometryNodeStoreNamedAttribute')
+            store_named_attribute_node.data_type = 'FLOAT'
+            store_named_attribute_node.domain = 'POINT'
+            store_named_attribute_node.inputs['Name'].default_value = attribute_name
+
+            node_tree.links.new(store_named_attribute_node.inputs['Geometry'], geometry_socket)
+            node_tree.links.new(store_named_attribute_node.inputs['Value'], named_attribute_node.outputs['Attribute'])
+            geometry_socket = store_named_attribute_node.outputs['Geometry']
+        node_tree.links.new(output_node.inputs['Geometry'], geometry_socket)
+
+    items = (
+        ('INPUT', 'NodeSocketGeometry', 'Geometry'),
+        ('OUTPUT', 'NodeSocketGeometry', 'Geometry'),
+    )
+    node_tree = ensure_geometry_node_tree('BDK Vertex Group Weights', items, build_function, should_force_build=True)
+
     mesh_data = typing_cast(Mesh, obj.data)
-    weights = numpy.zeros(len(mesh_data.vertices), dtype=float)
-    # TODO: This is MASSIVELY inefficient but as far as I can tell there's no way to just dump out
-    #  a nice flat list of indexed vertex weights.
-    for i in range(len(mesh_data.vertices)):
-        try:
-            weights[i] = vertex_group.weight(i)
-        except RuntimeError:
-            continue
-    return vertex_group, weights
+    weights_object = bpy.data.objects.new('BDK Vertex Group Weights', mesh_data)
+    modifier = weights_object.modifiers.new(name='Vertex Group Weights', type='NODES')
+    modifier.node_group = node_tree
+    weights_scene = bpy.data.scenes.new('BDK Vertex Group Weights')
+    weights_scene.collection.objects.link(weights_object)
+
+    try:
+        with context.temp_override(scene=weights_scene, view_layer=weights_scene.view_layers[0]):
+            depsgraph = context.evaluated_depsgraph_get()
+            evaluated_mesh_data = typing_cast(Mesh, weights_object.evaluated_get(depsgraph).data)
+            vertex_group_weights = dict()
+            for vertex_group_name, attribute_name in zip(vertex_group_names, attribute_names):
+                weights = numpy.zeros(len(mesh_data.vertices), dtype=numpy.float32)
+                evaluated_mesh_data.attributes[attribute_name].data.foreach_get('value', weights)
+                vertex_group_weights[vertex_group_name] = weights
+    finally:
+        bpy.data.objects.remove(weights_object)
+        bpy.data.scenes.remove(weights_scene)
+        bpy.data.node_groups.remove(node_tree)
+
+    return vertex_group_weights
+
+
+def set_vertex_group_weights(context: Context, obj: Object, vertex_group_weights: dict[str, numpy.ndarray]):
+    """
+    Sets the weight of every vertex for each of the vertex groups, creating the vertex groups that do not exist. Vertices
+    with a weight of 0 are not assigned to the vertex groups.
+
+    The weights are written in bulk with `foreach_set` to temporary float attributes, which are then converted to
+    vertex groups. The existing vertex groups are only replaced once all the conversions have succeeded, so the weights
+    are left unchanged if a conversion fails. Replaced vertex groups keep their
+    position in the list of vertex groups, and new vertex groups are added to the end.
+    """
+    if obj.mode == 'EDIT':
+        raise RuntimeError('Vertex group weights cannot be set while the object is in edit mode')
+
+    mesh_data = typing_cast(Mesh, obj.data)
+    vertex_group_names = [vertex_group.name for vertex_group in obj.vertex_groups]
+    active_vertex_group = obj.vertex_groups.active
+    active_vertex_group_name = active_vertex_group.name if active_vertex_group is not None else None
+
+    # Convert the weights to vertex groups with temporary names.
+    temporary_names = dict()
+    try:
+        for vertex_group_name, weights in vertex_group_weights.items():
+            temporary_name = ensure_name_unique(f'bdk_vertex_group_weights_{len(temporary_names)}',
+                                                [*vertex_group_names, *temporary_names.values(),
+                                                 *(attribute.name for attribute in mesh_data.attributes)])
+            attribute = mesh_data.attributes.new(temporary_name, 'FLOAT', 'POINT')
+            try:
+                attribute.data.foreach_set('value', numpy.ascontiguousarray(weights, dtype=numpy.float32).ravel())
+                mesh_data.attributes.active = attribute
+                with context.temp_override(object=obj, active_object=obj):
+                    bpy.ops.geometry.attribute_convert(mode='VERTEX_GROUP')
+            finally:
+                # The attribute is removed by the conversion, unless it failed.
+                attribute = mesh_data.attributes.get(temporary_name, None)
+                if attribute is not None:
+                    mesh_data.attributes.remove(attribute)
+            if temporary_name not in obj.vertex_groups:
+                raise RuntimeError(f'Failed to convert the weights of vertex group "{vertex_group_name}"')
+            temporary_names[vertex_group_name] = temporary_name
+    except Exception:
+        for temporary_name in temporary_names.values():
+            obj.vertex_groups.remove(obj.vertex_groups[temporary_name])
+        raise
+
+    # Replace the existing vertex groups.
+    for vertex_group_name, temporary_name in temporary_names.items():
+        vertex_group = obj.vertex_groups.get(vertex_group_name, None)
+        if vertex_group is not None:
+            obj.vertex_groups.remove(vertex_group)
+        obj.vertex_groups[temporary_name].name = vertex_group_name
+
+    # The replaced vertex groups were added to the end, so restore the original order. The vertex groups are given
+    # names that sort in the original order so that they can be reordered with a single sort.
+    vertex_group_names += [name for name in vertex_group_weights.keys() if name not in vertex_group_names]
+    if [vertex_group.name for vertex_group in obj.vertex_groups] != vertex_group_names:
+        for index, vertex_group_name in enumerate(vertex_group_names):
+            obj.vertex_groups[vertex_group_name].name = f'bdk_vertex_group_order_{index:06d}'
+        with context.temp_override(object=obj, active_object=obj):
+            bpy.ops.object.vertex_group_sort(sort_type='NAME')
+        for index, vertex_group_name in enumerate(vertex_group_names):
+            obj.vertex_groups[f'bdk_vertex_group_order_{index:06d}'].name = vertex_group_name
+
+    if active_vertex_group_name is not None:
+        obj.vertex_groups.active_index = obj.vertex_groups[active_vertex_group_name].index
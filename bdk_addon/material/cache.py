@@ -4,16 +4,161 @@ from .data import UMaterial
 from .reader import read_material
 from ..bdk.repository.kernel import Manifest
 
+import hashlib
 import os
+import pickle
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, Future
+from typing import Any, Iterable
 
 from ..data import UReference
 
 
+class ParsedMaterialDiskCache:
+    """
+    An on-disk cache of parsed materials that is shared by all the processes that use the same repository cache
+    directory (e.g., the package build workers), so that the props files of commonly referenced packages are only parsed
+    once. Entries are keyed by the path, size and modification time of the props file.
+
+    Entries are written to a temporary file and moved into place, so concurrent readers never see a partially written
+    entry. Reading an entry marks it as recently used, and the least recently used entries are evicted once there are
+    more than `max_entries` of them.
+    """
+    # Increment this when the material data classes change so that stale entries are ignored.
+    VERSION = 3
+    # The number of entries written by this process between checks of the size of the cache.
+    EVICTION_INTERVAL = 256
+
+    def __init__(self, directory: Path, max_entries: int = 16384):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._writes_until_eviction = 0
+
+    def __str__(self):
+        return f'{self.hits} hits, {self.misses} misses'
+
+    def _get_entry_path(self, path: str) -> Path:
+        return self.directory / f'{hashlib.sha1(path.encode()).hexdigest()}.pickle'
+
+    def load_material(self, path: str) -> UMaterial:
+        stat = os.stat(path)
+        normalized_path = os.path.normcase(os.path.abspath(path))
+        key = (normalized_path, stat.st_size, stat.st_mtime_ns)
+        entry_path = self._get_entry_path(normalized_path)
+
+        try:
+            with open(entry_path, 'rb') as file:
+                version, entry_key, material = pickle.load(file)
+            if version == self.VERSION and entry_key == key:
+                self.hits += 1
+                # Mark the entry as recently used.
+                try:
+                    os.utime(entry_path)
+                except OSError:
+                    pass
+                return material
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            # The entry is corrupt or refers to classes that no longer exist; it will be overwritten below.
+            print(f'Failed to read parsed material cache entry {entry_path}: {e}')
+
+        self.misses += 1
+        material = read_material(path)
+        self._write_entry(entry_path, key, material)
+        return material
+
+    def _write_entry(self, entry_path: Path, key: tuple[str, int, int], material: UMaterial):
+        temp_path = None
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as file:
+                pickle.dump((self.VERSION, key, material), file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, entry_path)
+        except (OSError, pickle.PicklingError) as e:
+            # NOTE: On Windows, replacing an entry that another process is reading fails; the entry is simply not
+            #  cached this time.
+            print(f'Failed to write parsed material cache entry {entry_path}: {e}')
+            if temp_path is not None and os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+
+        if self._writes_until_eviction == 0:
+            self.evict()
+            self._writes_until_eviction = self.EVICTION_INTERVAL
+        self._writes_until_eviction -= 1
+
+    def evict(self):
+        """
+        Removes the least recently used entries until there are at most `max_entries` entries.
+        """
+        entries = []
+        try:
+            with os.scandir(self.directory) as iterator:
+                for entry in iterator:
+                    if entry.name.endswith('.pickle'):
+                        try:
+                            entries.append((entry.stat().st_mtime_ns, entry.path))
+                        except OSError:
+                            continue
+        except OSError:
+            return
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort()
+        for _, path in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                # Another process may have already removed or replaced the entry.
+                pass
+
+
+# Parsed material disk caches, keyed by their directory, so that the hit and miss counts cover the whole process.
+_parsed_material_disk_caches: dict[str, ParsedMaterialDiskCache] = dict()
+
+
+def get_parsed_material_disk_cache(directory: Path) -> ParsedMaterialDiskCache:
+    cache = _parsed_material_disk_caches.get(str(directory), None)
+    if cache is None:
+        cache = ParsedMaterialDiskCache(directory)
+        _parsed_material_disk_caches[str(directory)] = cache
+    return cache
+
+
+def get_parsed_material_disk_cache_report() -> str:
+    return '\n'.join(f'{directory}: {cache}' for directory, cache in _parsed_material_disk_caches.items())
+
+
+def get_material_references(material: UMaterial) -> Iterable[UReference]:
+    """
+    Yields the references of a material to other materials, including those in lists and structs.
+    """
+    values: list[Any] = list(vars(material).values())
+    while values:
+        value = values.pop()
+        if isinstance(value, UReference):
+            if value is not material.Reference:
+                yield value
+        elif isinstance(value, list):
+            values.extend(value)
+        elif hasattr(value, '__dict__') and not isinstance(value, (type, UMaterial)):
+            values.extend(vars(value).values())
+
+
 class MaterialCache:
     def __init__(self, root_directory: Path):
         self._root_directory = root_directory
-        self._materials: dict[str, UMaterial] = {}
+        self._materials: dict[UReference, UMaterial] = {}
         self._package_paths: dict[str, Path] = {}
+        self._disk_cache = get_parsed_material_disk_cache(root_directory / 'materials')
+        # The time spent reading and parsing materials, either when prefetching or when they are first loaded.
+        self.load_time = 0.0
+        self.manifest_modified_time = get_manifest_modified_time(root_directory)
 
         self._build_package_paths()
 
@@ -39,12 +184,83 @@ class MaterialCache:
         return None
 
     def load_material(self, reference: UReference) -> UMaterial | None:
-        key = str(reference)
-        if key in self._materials:
-            return self._materials[str(reference)]
+        if reference in self._materials:
+            return self._materials[reference]
         path = self.resolve_path_for_reference(reference)
         if path is None:
             return None
-        material = read_material(str(path))
-        self._materials[key] = material
+        load_time = time.perf_counter()
+        material = self._disk_cache.load_material(str(path))
+        self.load_time += time.perf_counter() - load_time
+        self._materials[reference] = material
         return material
+
+    def prefetch(self, references: Iterable[UReference], max_workers: int | None = None) -> int:
+        """
+        Reads and parses the materials and everything that they reference (transitively) on a pool of threads, so that
+        building the materials afterward does not wait on sequential disk reads.
+
+        Materials that fail to load are skipped here, so that the error is raised when they are loaded while building.
+        Returns the number of materials that were read.
+        """
+        prefetch_time = time.perf_counter()
+        visited: set[UReference] = set()
+        running: dict[Future, UReference] = dict()
+        read_count = 0
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            def visit(reference: UReference):
+                if reference in visited or reference.type_name is None:
+                    return
+                visited.add(reference)
+                if reference in self._materials:
+                    for dependency in get_material_references(self._materials[reference]):
+                        visit(dependency)
+                    return
+                path = self.resolve_path_for_reference(reference)
+                if path is not None:
+                    running[executor.submit(self._disk_cache.load_material, str(path))] = reference
+
+            for reference in references:
+                visit(reference)
+
+            while running:
+                done, _ = wait(running.keys(), return_when=FIRST_COMPLETED)
+                for future in done:
+                    reference = running.pop(future)
+                    try:
+                        material = future.result()
+                    except Exception:
+                        continue
+                    read_count += 1
+                    self._materials[reference] = material
+                    for dependency in get_material_references(material):
+                        visit(dependency)
+
+        self.load_time += time.perf_counter() - prefetch_time
+
+        return read_count
+
+
+def get_manifest_modified_time(root_directory: Path) -> int | None:
+    try:
+        return os.stat(root_directory / 'manifest.json').st_mtime_ns
+    except OSError:
+        return None
+
+
+# Material caches, keyed by their repository cache directory.
+_material_caches: dict[str, MaterialCache] = dict()
+
+
+def get_material_cache(root_directory: Path) -> MaterialCache:
+    """
+    Returns the material cache of a repository that is shared by everything in the process, so that its package paths
+    and parsed materials are reused across imports. The cache is replaced when the manifest changes (e.g., when packages
+    are exported), since the exported materials may have changed as well.
+    """
+    cache = _material_caches.get(str(root_directory), None)
+    if cache is None or cache.manifest_modified_time != get_manifest_modified_time(root_directory):
+        cache = MaterialCache(root_directory)
+        _material_caches[str(root_directory)] = cache
+    return cache
@@ -1,15 +1,17 @@
 import math
 import copy
 import os
+import time
 from typing import cast, Callable, Any
 
 import bpy
-from bpy.props import StringProperty
-from bpy.types import ShaderNodeTexImage, NodeTree, NodeSocket, Context, Node, Operator
+from bpy.props import StringProperty, CollectionProperty
+from bpy.types import ShaderNodeTexImage, NodeTree, NodeSocket, Context, Node, Operator, Material, \
+    OperatorFileListElement
 from bpy_extras.io_utils import ImportHelper
 from pathlib import Path
 
-from .cache import MaterialCache
+from .cache import MaterialCache, get_material_cache
 from .data import UColorModifier, UCombiner, UConstantColor, UCubemap, UFinalBlend, UTexCoordSource, UTexEnvMap, \
     UTexOscillator, UTexPanner, UTexRotator, UTexScaler, UTexture, UShader, UVariableTexPanner, UVertexColor, \
     UFadeColor, UMaterialSwitch, EAlphaOperation, EColorOperation, EColorFadeType, UMaterial, ETexCoordSrc, \
@@ -18,6 +20,7 @@ from ..bdk.repository.kernel import get_repository_cache_directory
 from ..bdk.repository.properties import BDK_PG_repository
 from ..data import UReference
 from ..helpers import get_addon_preferences
+from ..node_helpers import ensure_shader_node_tree, ensure_input_and_output_nodes, add_math_operation_nodes
 
 
 class MaterialSocketOutputs:
@@ -33,12 +36,46 @@ class MaterialSocketInputs:
     uv_socket: NodeSocket | None = None
 
 
+def ensure_scene_time_node_tree() -> NodeTree:
+    items = (
+        ('OUTPUT', 'NodeSocketFloat', 'Time'),
+    )
+
+    def build_function(node_tree: NodeTree):
+        _, output_node = ensure_input_and_output_nodes(node_tree)
+
+        # This is the only driver that is evaluated when the frame changes, no matter how many materials use the group.
+        value_node = node_tree.nodes.new('ShaderNodeValue')
+        value_node.label = 'Time'
+        value_node.outputs[0].driver_add('default_value').driver.expression = 'frame / bpy.context.scene.render.fps'
+
+        node_tree.links.new(output_node.inputs['Time'], value_node.outputs[0])
+
+    return ensure_shader_node_tree('BDK Scene Time', items, build_function)
+
+
+def _get_socket_key(socket: NodeSocket | None) -> int | None:
+    return socket.as_pointer() if socket is not None else None
+
+
 class MaterialBuilder:
-    def __init__(self, material_caches: list[MaterialCache], node_tree: NodeTree):
+    def __init__(self, material_caches: list[MaterialCache], node_tree: NodeTree, use_shared_time: bool = False):
+        """
+        :param use_shared_time: Whether to animate materials from the shared scene time node group instead of adding
+            drivers to each animated node.
+        """
         self._material_caches = material_caches
         self._node_tree = node_tree
+        self._use_shared_time = use_shared_time
+        self._time_socket: NodeSocket | None = None
+        self._animated_vector_nodes: dict[int, Node] = {}
         self._material_type_importers: dict[
             type, Callable[[Any, MaterialSocketInputs], MaterialSocketOutputs | None]] = {}
+        # The subgraphs that have already been built, keyed by the material reference and the UV sockets that they were
+        # built from. The values are the outputs of the subgraph and the UV sockets that the inputs were left with.
+        self._subgraphs: dict[tuple[UReference, int | None, int | None],
+                              tuple[MaterialSocketOutputs | None, NodeSocket | None, NodeSocket | None]] = {}
+        self.reused_subgraph_count = 0
 
         self._register_material_importers()
 
@@ -88,6 +125,54 @@ class MaterialBuilder:
                     return image
         raise RuntimeError(f'Could not find file for reference {reference} in {len(self._material_caches)} material caches')
 
+    def _get_time_socket(self) -> NodeSocket:
+        """
+        Returns a socket with the scene time in seconds, read from the shared scene time node group.
+        """
+        if self._time_socket is None:
+            time_node = self._node_tree.nodes.new('ShaderNodeGroup')
+            time_node.node_tree = ensure_scene_time_node_tree()
+            self._time_socket = time_node.outputs['Time']
+        return self._time_socket
+
+    def _add_time_function_nodes(self, operations: list[tuple[str, float]]) -> NodeSocket:
+        """
+        Adds math nodes that apply the operations (e.g., `('MULTIPLY', 2.0)`) to the scene time, in order.
+        """
+        socket = self._get_time_socket()
+        for operation, value in operations:
+            socket = add_math_operation_nodes(self._node_tree, operation, [socket, value])
+        return socket
+
+    def _animate_input(self, socket: NodeSocket, expression: str, operations: list[tuple[str, float]],
+                       index: int | None = None):
+        """
+        Animates an input socket, or one component of a vector input socket, as a function of the scene time.
+        The function is given both as a driver expression, where `frame / bpy.context.scene.render.fps` is the time, and
+        as the equivalent math operations on the time for when the shared scene time is used.
+        """
+        if not self._use_shared_time:
+            fcurve = socket.driver_add('default_value', -1 if index is None else index)
+            fcurve.driver.expression = expression
+            return
+
+        value_socket = self._add_time_function_nodes(operations)
+
+        if index is None:
+            self._node_tree.links.new(socket, value_socket)
+            return
+
+        # Vector inputs are fed by a Combine XYZ node that keeps the default values of the components that are not
+        # animated.
+        combine_xyz_node = self._animated_vector_nodes.get(socket.as_pointer(), None)
+        if combine_xyz_node is None:
+            combine_xyz_node = self._node_tree.nodes.new('ShaderNodeCombineXYZ')
+            for component_index, value in enumerate(socket.default_value):
+                combine_xyz_node.inputs[component_index].default_value = value
+            self._node_tree.links.new(socket, combine_xyz_node.outputs['Vector'])
+            self._animated_vector_nodes[socket.as_pointer()] = combine_xyz_node
+        self._node_tree.links.new(combine_xyz_node.inputs[index], value_socket)
+
     def load_material(self, reference: UReference | None):
         if reference is None:
             return None
@@ -272,9 +357,14 @@ class MaterialBuilder:
         node_tree.links.new(mix_rgb_node.inputs[6], color_1_rgb_node.outputs['Color'])
         node_tree.links.new(mix_rgb_node.inputs[7], color_2_rgb_node.outputs['Color'])
 
-        time_value_node = node_tree.nodes.new('ShaderNodeValue')
-        time_value_node.label = 'Time'
-        time_value_node.outputs[0].driver_add('default_value').driver.expression = 'frame/bpy.context.scene.render.fps'
+        if self._use_shared_time:
+            time_socket = self._get_time_socket()
+        else:
+            time_value_node = node_tree.nodes.new('ShaderNodeValue')
+            time_value_node.label = 'Time'
+            time_value_node.outputs[0].driver_add('default_value').driver.expression = \
+                'frame/bpy.context.scene.render.fps'
+            time_socket = time_value_node.outputs[0]
 
         fade_offset_value_node = node_tree.nodes.new('ShaderNodeValue')
         fade_offset_value_node.label = 'FadeOffset'
@@ -291,7 +381,7 @@ class MaterialBuilder:
                 time_multiply_node = node_tree.nodes.new('ShaderNodeMath')
                 time_multiply_node.operation = 'MULTIPLY'
                 time_multiply_node.inputs[1].default_value = 2.0
-                node_tree.links.new(time_value_node.outputs[0], time_multiply_node.inputs[0])
+                node_tree.links.new(time_socket, time_multiply_node.inputs[0])
 
                 frequency_divide_node = node_tree.nodes.new('ShaderNodeMath')
                 frequency_divide_node.operation = 'DIVIDE'
@@ -319,14 +409,24 @@ class MaterialBuilder:
                 def get_sinusoidal_driver_expression(phase: float, period: float) -> str:
                     return f'(cos({phase}+(1/{period})*2*pi*(frame/bpy.context.scene.render.fps))+1)/2'
 
-                sinusoidal_factor_value_node = node_tree.nodes.new('ShaderNodeValue')
-                sinusoidal_factor_value_node.outputs[0].driver_add('default_value').driver.expression = get_sinusoidal_driver_expression(fade_color.FadeOffset, fade_color.FadePeriod)
+                if self._use_shared_time:
+                    frequency = 1.0 / fade_color.FadePeriod if fade_color.FadePeriod != 0.0 else 0.0
+                    factor_socket = self._add_time_function_nodes([
+                        ('MULTIPLY', frequency * 2 * math.pi),
+                        ('ADD', fade_color.FadeOffset),
+                        ('COSINE', 0.0),
+                        ('ADD', 1.0),
+                        ('DIVIDE', 2.0),
+                    ])
+                else:
+                    sinusoidal_factor_value_node = node_tree.nodes.new('ShaderNodeValue')
+                    sinusoidal_factor_value_node.outputs[0].driver_add('default_value').driver.expression = get_sinusoidal_driver_expression(fade_color.FadeOffset, fade_color.FadePeriod)
 
-                # TODO: For consistency, we should not be using a driver for the whole expression.
-                #  Make this a series of nodes instead. (sure would be nice to have code that could take a math expression
-                #  and turn it into a node tree)
+                    # TODO: For consistency, we should not be using a driver for the whole expression.
+                    #  Make this a series of nodes instead. (sure would be nice to have code that could take a math
+                    #  expression and turn it into a node tree)
 
-                factor_socket = sinusoidal_factor_value_node.outputs[0]
+                    factor_socket = sinusoidal_factor_value_node.outputs[0]
             case _:
                 raise ValueError(f'Unknown color fade type {fade_color.ColorFadeType}')
 
@@ -542,28 +642,24 @@ class MaterialBuilder:
             offset_node.inputs['X'].default_value = tex_oscillator.UOffset / material_outputs.size[0]
             offset_node.inputs['Y'].default_value = tex_oscillator.VOffset / material_outputs.size[1]
 
-        def get_driver_expression_for_pan(rate, amplitude):
-            return f'sin((frame / bpy.context.scene.render.fps) * {rate * math.pi * 2}) * {amplitude}'
-
-        def get_driver_expression_for_stretch(rate, amplitude):
-            return f'1.0 + sin((frame / bpy.context.scene.render.fps) * {rate * math.pi * 2}) * {amplitude}'
+        def animate_pan(rate, amplitude, index: int):
+            self._animate_input(vector_transform_node.inputs[1],
+                                f'sin((frame / bpy.context.scene.render.fps) * {rate * math.pi * 2}) * {amplitude}',
+                                [('MULTIPLY', rate * math.pi * 2), ('SINE', 0.0), ('MULTIPLY', amplitude)], index)
 
-        # TODO: make this generic for the whole thing (just a socket + expression)
-        def add_driver_to_vector_transform_input(expression: str, index: int):
-            fcurve = vector_transform_node.inputs[1].driver_add('default_value', index)
-            fcurve.driver.expression = expression
+        def animate_stretch(rate, amplitude, index: int):
+            self._animate_input(vector_transform_node.inputs[1],
+                                f'1.0 + sin((frame / bpy.context.scene.render.fps) * {rate * math.pi * 2}) * {amplitude}',
+                                [('MULTIPLY', rate * math.pi * 2), ('SINE', 0.0), ('MULTIPLY', amplitude),
+                                 ('ADD', 1.0)], index)
 
         match tex_oscillator.UOscillationType:
             case ETexOscillationType.OT_Pan:
                 vector_transform_node.operation = 'ADD'
                 if tex_oscillator.UOscillationRate != 0 and tex_oscillator.UOscillationAmplitude != 0:
-                    add_driver_to_vector_transform_input(
-                        get_driver_expression_for_pan(tex_oscillator.UOscillationRate,
-                                                    tex_oscillator.UOscillationAmplitude), 0)
+                    animate_pan(tex_oscillator.UOscillationRate, tex_oscillator.UOscillationAmplitude, 0)
                 if tex_oscillator.VOscillationRate != 0 and tex_oscillator.VOscillationAmplitude != 0:
-                    add_driver_to_vector_transform_input(
-                        get_driver_expression_for_pan(tex_oscillator.VOscillationRate,
-                                                    tex_oscillator.VOscillationAmplitude), 1)
+                    animate_pan(tex_oscillator.VOscillationRate, tex_oscillator.VOscillationAmplitude, 1)
             case ETexOscillationType.OT_Jitter:
                 vector_transform_node.operation = 'ADD'
                 # same as add, but weird
@@ -571,13 +667,9 @@ class MaterialBuilder:
             case ETexOscillationType.OT_Stretch:
                 vector_transform_node.operation = 'MULTIPLY'
                 if tex_oscillator.UOscillationRate != 0 and tex_oscillator.UOscillationAmplitude != 0:
-                    add_driver_to_vector_transform_input(
-                        get_driver_expression_for_stretch(tex_oscillator.UOscillationRate,
-                                                        tex_oscillator.UOscillationAmplitude), 0)
+                    animate_stretch(tex_oscillator.UOscillationRate, tex_oscillator.UOscillationAmplitude, 0)
                 if tex_oscillator.VOscillationRate != 0 and tex_oscillator.VOscillationAmplitude != 0:
-                    add_driver_to_vector_transform_input(
-                        get_driver_expression_for_stretch(tex_oscillator.VOscillationRate,
-                                                        tex_oscillator.VOscillationAmplitude), 1)
+                    animate_stretch(tex_oscillator.VOscillationRate, tex_oscillator.VOscillationAmplitude, 1)
             case ETexOscillationType.OT_StretchRepeat:
                 vector_transform_node.operation = 'MULTIPLY'
                 # same as stretch, but weird...
@@ -593,8 +685,8 @@ class MaterialBuilder:
         vector_add_node = self._node_tree.nodes.new('ShaderNodeVectorMath')
         vector_add_node.operation = 'ADD'
 
-        fcurve = vector_add_node.inputs[1].driver_add('default_value', 0)
-        fcurve.driver.expression = f'(frame / bpy.context.scene.render.fps) * {tex_panner.PanRate}'
+        self._animate_input(vector_add_node.inputs[1], f'(frame / bpy.context.scene.render.fps) * {tex_panner.PanRate}',
+                            [('MULTIPLY', tex_panner.PanRate)], 0)
 
         # TODO: there are strange interactions with stacking multiple UV modifiers, handle this later
         self._node_tree.links.new(vector_add_node.inputs[0], vector_rotate_node.outputs['Vector'])
@@ -628,10 +720,6 @@ class MaterialBuilder:
 
         rotation_radians = tex_rotator.Rotation.get_radians()
 
-        def add_driver_to_vector_rotate_rotation_input(expression: str, index: int):
-            fcurve = vector_rotate_node.inputs['Rotation'].driver_add('default_value', index)
-            fcurve.driver.expression = expression
-
         match tex_rotator.TexRotationType:
             case ETexRotationType.TR_FixedRotation:
                 vector_rotate_node.inputs['Rotation'].default_value = rotation_radians
@@ -640,12 +728,15 @@ class MaterialBuilder:
                 rate_radians = tex_rotator.OscillationRate.get_radians()
                 for i, (amplitude, rate) in enumerate(zip(amplitude_radians, rate_radians)):
                     if amplitude != 0 or rate != 0:
-                        add_driver_to_vector_rotate_rotation_input(
-                            f'sin(frame / bpy.context.scene.render.fps * {rate}) * {amplitude}', i)
+                        self._animate_input(vector_rotate_node.inputs['Rotation'],
+                                            f'sin(frame / bpy.context.scene.render.fps * {rate}) * {amplitude}',
+                                            [('MULTIPLY', rate), ('SINE', 0.0), ('MULTIPLY', amplitude)], i)
             case ETexRotationType.TR_ConstantlyRotating:
                 for i, radians in enumerate(rotation_radians):
                     if radians != 0:
-                        add_driver_to_vector_rotate_rotation_input(f'(frame / bpy.context.scene.render.fps) * {radians}', i)
+                        self._animate_input(vector_rotate_node.inputs['Rotation'],
+                                            f'(frame / bpy.context.scene.render.fps) * {radians}',
+                                            [('MULTIPLY', radians)], i)
 
         self._node_tree.links.new(vector_rotate_node.inputs['Vector'], socket_inputs.uv_source_socket)
 
@@ -803,12 +894,17 @@ class MaterialBuilder:
         multiply_node.operation = 'MULTIPLY'
         multiply_node.inputs[1].default_value = variable_tex_panner.PanRate
 
-        value_node = self._node_tree.nodes.new('ShaderNodeValue')
+        if self._use_shared_time:
+            time_socket = self._get_time_socket()
+        else:
+            value_node = self._node_tree.nodes.new('ShaderNodeValue')
+
+            fcurve = value_node.outputs[0].driver_add('default_value')
+            fcurve.driver.expression = 'frame / bpy.context.scene.render.fps'
 
-        fcurve = value_node.outputs[0].driver_add('default_value')
-        fcurve.driver.expression = 'frame / bpy.context.scene.render.fps'
+            time_socket = value_node.outputs['Value']
 
-        self._node_tree.links.new(multiply_node.inputs[0], value_node.outputs['Value'])
+        self._node_tree.links.new(multiply_node.inputs[0], time_socket)
         self._node_tree.links.new(combine_xyz_node.inputs['X'], multiply_node.outputs['Value'])
         self._node_tree.links.new(vector_rotate_node.inputs['Vector'], combine_xyz_node.outputs['Vector'])
 
@@ -849,10 +945,27 @@ class MaterialBuilder:
     def _import_material(self, material: UMaterial, inputs: MaterialSocketInputs) -> MaterialSocketOutputs | None:
         if material is None:
             return None
+        # A material that is referenced more than once (e.g., the same texture used as both the diffuse and the
+        # opacity of a shader) is only built once for each set of UV sockets, and its outputs are reused.
+        key = (material.Reference, _get_socket_key(inputs.uv_source_socket), _get_socket_key(inputs.uv_socket))
+        subgraph = self._subgraphs.get(key, None)
+        if subgraph is not None:
+            outputs, uv_source_socket, uv_socket = subgraph
+            # Some importers change the inputs that they are given, so the changes are replayed as well.
+            inputs.uv_source_socket = uv_source_socket
+            inputs.uv_socket = uv_socket
+            self.reused_subgraph_count += 1
+            return copy.copy(outputs)
+
         material_import_function = self._material_type_importers.get(type(material), None)
         if material_import_function is None:
             raise NotImplementedError(f'No importer registered for type "{type(material)}"')
-        return material_import_function(material, inputs)
+        outputs = material_import_function(material, inputs)
+
+        # The callers are free to modify the outputs, so a copy is kept.
+        self._subgraphs[key] = (copy.copy(outputs), inputs.uv_source_socket, inputs.uv_socket)
+
+        return outputs
 
     def build(self, material: UMaterial, uv_source_socket: NodeSocket | None) -> MaterialSocketOutputs | None:
         inputs = MaterialSocketInputs()
@@ -877,6 +990,83 @@ def _add_shader_from_outputs(node_tree: NodeTree, outputs: MaterialSocketOutputs
         return diffuse_node.outputs['BSDF']
 
 
+def import_material(material_cache: MaterialCache, path: str, use_shared_time: bool = False) -> Material:
+    """
+    Imports a material from a .props.txt file as a new Blender material.
+    """
+    # Get an Unreal reference from the file path.
+    reference = UReference.from_path(Path(path))
+
+    # Create the material and prepare it.
+    material_data = bpy.data.materials.new(reference.object_name)
+    material_data.use_nodes = True
+    material_data.preview_render_type = 'FLAT'
+
+    # Add custom property with Unreal reference.
+    material_data.bdk.package_reference = str(reference)
+
+    node_tree = material_data.node_tree
+    node_tree.nodes.clear()
+
+    # Try to load the material from the cache.
+    unreal_material = material_cache.load_material(reference)
+
+    tex_coord_node = node_tree.nodes.new('ShaderNodeTexCoord')
+
+    # Build the material.
+    build_time = time.perf_counter()
+    load_time = material_cache.load_time
+    material_builder = MaterialBuilder([material_cache], node_tree, use_shared_time=use_shared_time)
+    outputs = material_builder.build(unreal_material, uv_source_socket=tex_coord_node.outputs['UV'])
+    # Exclude any materials that were loaded lazily (e.g., if they failed to prefetch) from the build time.
+    build_time = time.perf_counter() - build_time - (material_cache.load_time - load_time)
+    print(f'Built material {reference} with {len(node_tree.nodes)} nodes '
+          f'({material_builder.reused_subgraph_count} reused subgraphs) in {build_time:.3f}s')
+
+    # Make a new function to do the conversion from Color & Alpha socket to Shader.
+    if outputs:
+        material_data.bdk.size_x = outputs.size[0]
+        material_data.bdk.size_y = outputs.size[1]
+        material_data.use_backface_culling = outputs.use_backface_culling
+        material_data.show_transparent_back = not outputs.use_backface_culling
+        material_data.blend_method = outputs.blend_method
+
+        # For material switch this may be a bit harder!
+        shader_socket = _add_shader_from_outputs(node_tree, outputs)
+
+        output_node = node_tree.nodes.new('ShaderNodeOutputMaterial')
+        node_tree.links.new(output_node.inputs['Surface'], shader_socket)
+
+    return material_data
+
+
+def import_materials(material_cache: MaterialCache, paths: list[str], use_shared_time: bool = False) \
+        -> dict[str, Material | None]:
+    """
+    Imports a batch of materials from .props.txt files, sharing the material cache (and therefore the parsed
+    dependencies) across the whole batch. Materials that fail to import are reported and map to None.
+    """
+    # Read and parse the materials and everything that they reference up-front, so that building the node trees does
+    # not wait on sequential disk reads.
+    load_time = material_cache.load_time
+    material_cache.prefetch([UReference.from_path(Path(path)) for path in paths])
+    print(f'Read {len(paths)} material(s) and their references in {material_cache.load_time - load_time:.3f}s')
+
+    materials: dict[str, Material | None] = dict()
+    for path in paths:
+        existing_materials = set(bpy.data.materials)
+        try:
+            materials[path] = import_material(material_cache, path, use_shared_time=use_shared_time)
+        except Exception as e:
+            print(f'Failed to import material {path}: {e}')
+            materials[path] = None
+            # Remove the partially built material. The materials are sorted by name, not by when they were created, so
+            # it is found by comparing against the materials that existed before the import.
+            for material in set(bpy.data.materials) - existing_materials:
+                bpy.data.materials.remove(material)
+    return materials
+
+
 class BDK_OT_material_import(Operator, ImportHelper):
     bl_idname = 'bdk.import_material'
     bl_label = 'Import Unreal Material'
@@ -888,6 +1078,9 @@ class BDK_OT_material_import(Operator, ImportHelper):
         description='File path used for importing the PSA file',
         maxlen=1024,
         default='')
+    # When multiple files are given, they are imported as one batch.
+    files: CollectionProperty(type=OperatorFileListElement, options={'HIDDEN', 'SKIP_SAVE'})
+    directory: StringProperty(subtype='DIR_PATH', options={'HIDDEN', 'SKIP_SAVE'})
     repository_id: StringProperty(
         name='Repository ID',
         description='The ID of the repository to search for the material in',
@@ -913,44 +1106,18 @@ class BDK_OT_material_import(Operator, ImportHelper):
             self.report({'ERROR_INVALID_CONTEXT'}, f'Repository with ID "{self.repository_id}" not found.')
             return {'CANCELLED'}
 
-        material_cache = MaterialCache(get_repository_cache_directory(repository))
-
-        # Get an Unreal reference from the file path.
-        reference = UReference.from_path(Path(self.filepath))
+        material_cache = get_material_cache(get_repository_cache_directory(repository))
+        use_shared_time = addon_prefs.material_animation_mode == 'SHARED_TIME'
 
-        # Create the material and prepare it.
-        material_data = bpy.data.materials.new(reference.object_name)
-        material_data.use_nodes = True
-        material_data.preview_render_type = 'FLAT'
-
-        # Add custom property with Unreal reference.
-        material_data.bdk.package_reference = str(reference)
-
-        node_tree = material_data.node_tree
-        node_tree.nodes.clear()
-
-        # Try to load the material from the cache.
-        unreal_material = material_cache.load_material(reference)
-
-        tex_coord_node = node_tree.nodes.new('ShaderNodeTexCoord')
-
-        # Build the material.
-        material_builder = MaterialBuilder([material_cache], node_tree)
-        outputs = material_builder.build(unreal_material, uv_source_socket=tex_coord_node.outputs['UV'])
-
-        # Make a new function to do the conversion from Color & Alpha socket to Shader.
-        if outputs:
-            material_data.bdk.size_x = outputs.size[0]
-            material_data.bdk.size_y = outputs.size[1]
-            material_data.use_backface_culling = outputs.use_backface_culling
-            material_data.show_transparent_back = not outputs.use_backface_culling
-            material_data.blend_method = outputs.blend_method
-
-            # For material switch this may be a bit harder!
-            shader_socket = _add_shader_from_outputs(node_tree, outputs)
-
-            output_node = node_tree.nodes.new('ShaderNodeOutputMaterial')
-            node_tree.links.new(output_node.inputs['Surface'], shader_socket)
+        if len(self.files) > 0 and self.files[0].name:
+            paths = [os.path.join(self.directory, file.name) for file in self.files]
+            materials = import_materials(material_cache, paths, use_shared_time=use_shared_time)
+            failed_count = sum(1 for material in materials.values() if material is None)
+            if failed_count > 0:
+                self.report({'WARNING'}, f'Failed to import {failed_count} of {len(paths)} materials')
+        else:
+            material_cache.prefetch([UReference.from_path(Path(self.filepath))])
+            import_material(material_cache, self.filepath, use_shared_time=use_shared_time)
 
         return {'FINISHED'}
 
@@ -1,42 +1,185 @@
 import enum
+import re
+import types
 import typing
 from pathlib import Path
-from typing import get_type_hints, Any
+from typing import get_type_hints, Any, Callable
 from ..convert_props_txt_to_json import parse_props_txt_file_content
 from .data import UMaterial, URotator, MaterialTypeRegistry, UReference, UColor
 
 
-def transform_value(property_type: type, value: Any) -> typing.Any | None:
-    # TODO: this function is a catastrophe and needs to be reworked.
-    if property_type == int:
-        return int(value)
-    elif property_type == bool:
-        return bool(value)
-    elif property_type == float:
-        return float(value)
-    elif property_type == str:
-        return value
-    elif property_type.__class__ == enum.EnumMeta:
-        return property_type[str(value).split(' ')[0]]
-    elif property_type.__class__ == typing._UnionGenericAlias and len(property_type.__args__) == 2 and \
-            property_type.__args__[1] == type(None):
+ValueDecoder = Callable[[Any], Any]
+
+
+def _decode_rotator(value: Any) -> URotator:
+    rotator = URotator()
+    rotator.Roll = value['Roll']
+    rotator.Pitch = value['Pitch']
+    rotator.Yaw = value['Yaw']
+    return rotator
+
+
+def _decode_color(value: Any) -> UColor:
+    return UColor(r=value['R'], g=value['G'], b=value['B'], a=value['A'])
+
+
+def _decode_reference(value: Any) -> UReference | None:
+    if value is None:
+        return None
+    return UReference.from_string(value)
+
+
+def _decode_string(value: Any) -> Any:
+    return value
+
+
+_ARRAY_INDEX_PATTERN = re.compile(r'\[(\d+)]')
+
+
+def get_array_index(key: str) -> int | None:
+    """
+    Returns the index of an array element key (e.g., 3 for `Materials[3]`), or None if the key is not indexed.
+    """
+    match = _ARRAY_INDEX_PATTERN.search(key)
+    return int(match.group(1)) if match is not None else None
+
+
+def is_array_container(value: Any) -> bool:
+    """
+    Returns whether a value is the block that umodel writes for a dynamic array, which contains one indexed key per
+    element (e.g., `Materials[2] = { Materials[0] = ..., Materials[1] = ... }`).
+    """
+    return isinstance(value, dict) and all('[' in key for key in value.keys())
+
+
+def _compile_optional_decoder(decoder: ValueDecoder) -> ValueDecoder:
+    def decode(value: Any) -> Any:
         if value is None:
             return None
-        return transform_value(property_type.__args__[0], value)
+        return decoder(value)
+    return decode
+
+
+def _compile_enum_decoder(enum_type: type[enum.Enum]) -> ValueDecoder:
+    members = enum_type.__members__
+
+    def decode(value: Any) -> enum.Enum:
+        # Enum values are written with their numeric value as well (e.g., `OB_Masked (1)`).
+        return members[str(value).split(' ')[0]]
+    return decode
+
+
+def _compile_list_decoder(element_decoder: ValueDecoder) -> ValueDecoder:
+    def decode(value: Any) -> list:
+        if isinstance(value, dict):
+            items = sorted(value.items(), key=lambda item: get_array_index(item[0]) or 0)
+            return [element_decoder(element) for _, element in items]
+        if isinstance(value, list):
+            return [element_decoder(element) for element in value]
+        return [element_decoder(value)]
+    # Arrays can also be written one element at a time.
+    decode.element_decoder = element_decoder
+    return decode
+
+
+def _compile_struct_decoder(struct_type: type) -> ValueDecoder:
+    field_decoders = get_property_decoders(struct_type)
+
+    def decode(value: Any) -> Any:
+        struct = struct_type()
+        for name, field_value in value.items():
+            field_decoder = field_decoders.get(name, None)
+            if field_decoder is not None:
+                setattr(struct, name, field_decoder(field_value))
+        return struct
+    return decode
+
+
+def _compile_unhandled_decoder(property_type: Any) -> ValueDecoder:
+    def decode(value: Any):
+        raise RuntimeError(f'Unhandled type: {property_type}')
+    return decode
+
+
+def compile_value_decoder(property_type: Any) -> ValueDecoder:
+    """
+    Returns a function that converts a value parsed from a props file to the given property type.
+    """
+    if property_type in (int, float, bool):
+        return property_type
+    elif property_type == str:
+        return _decode_string
     elif property_type == URotator:
-        rotator = URotator()
-        rotator.Roll = value['Roll']
-        rotator.Pitch = value['Pitch']
-        rotator.Yaw = value['Yaw']
-        return rotator
-    elif property_type == UReference | None:
-        if value is None:
-            return None
-        return UReference.from_string(value)
+        return _decode_rotator
     elif property_type == UColor:
-        return UColor(r=value['R'], g=value['G'], b=value['B'], a=value['A'])
-    else:
-        raise RuntimeError(f'Unhandled type: {property_type}')
+        return _decode_color
+    elif property_type in (UReference, UReference | None):
+        return _decode_reference
+    elif isinstance(property_type, enum.EnumMeta):
+        return _compile_enum_decoder(property_type)
+
+    origin = typing.get_origin(property_type)
+    arguments = typing.get_args(property_type)
+    if origin in (typing.Union, types.UnionType) and len(arguments) == 2 and arguments[1] == type(None):
+        return _compile_optional_decoder(compile_value_decoder(arguments[0]))
+    elif origin == list and len(arguments) == 1:
+        return _compile_list_decoder(compile_value_decoder(arguments[0]))
+    elif isinstance(property_type, type) and get_type_hints(property_type):
+        return _compile_struct_decoder(property_type)
+
+    return _compile_unhandled_decoder(property_type)
+
+
+# The property decoders of each type, which are compiled on first use and kept for the life of the process.
+_property_decoders: dict[type, dict[str, ValueDecoder]] = dict()
+
+
+def get_property_decoders(type_: type) -> dict[str, ValueDecoder]:
+    """
+    Returns a map of the property names of the type to the functions that decode their values.
+    """
+    decoders = _property_decoders.get(type_, None)
+    if decoders is None:
+        decoders = {name: compile_value_decoder(property_type)
+                    for name, property_type in get_type_hints(type_).items()}
+        _property_decoders[type_] = decoders
+    return decoders
+
+
+def decode_material_properties(material: UMaterial, properties: dict[str, Any]):
+    """
+    Decodes the properties parsed from a props file and sets them on the material. Properties that the material type
+    does not have are ignored.
+    """
+    property_decoders = get_property_decoders(type(material))
+    for name, value in properties.items():
+        try:
+            decoder = property_decoders.get(name, None)
+            if decoder is not None:
+                setattr(material, name, decoder(value))
+                continue
+
+            # Array properties are written with an index, either as a block that contains all the elements or as
+            # one property per element (e.g., `Materials[2] = { ... }` or `Faces[0] = ...`).
+            index = get_array_index(name)
+            if index is None:
+                continue
+            array_name = name[:name.index('[')].strip()
+            decoder = property_decoders.get(array_name, None)
+            element_decoder = getattr(decoder, 'element_decoder', None)
+            if element_decoder is None:
+                continue
+            if is_array_container(value):
+                setattr(material, array_name, decoder(value))
+            else:
+                # Copy the array so that the default value of the class is not modified.
+                array = list(getattr(material, array_name))
+                if index >= len(array):
+                    array.extend([None] * (index + 1 - len(array)))
+                array[index] = element_decoder(value)
+                setattr(material, array_name, array)
+        except KeyError:
+            continue
 
 
 def read_material(path: str) -> UMaterial:
@@ -55,14 +198,5 @@ def read_material(path: str) -> UMaterial:
         properties = parse_props_txt_file_content(file.read())
         reference = UReference.from_path(Path(path))
         material = material_type(reference)
-        material_type_hints = get_type_hints(type(material))
-
-        for name, value in properties.items():
-            try:
-                property_type = material_type_hints[name]
-                value = transform_value(property_type, value)
-                setattr(material, name, value)
-            except KeyError:
-                continue
-
+        decode_material_properties(material, properties)
         return material
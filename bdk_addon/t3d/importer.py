@@ -20,10 +20,11 @@ from ..projector.properties import blending_op_unreal_to_blender_map
 from ..terrain.operators import add_terrain_layer_node
 from ..projector.builder import create_projector
 from ..terrain.builder import create_terrain_info_object
+from ..terrain.bitmap import decode_quad_bitmap, set_quad_visibility
 from ..terrain.layers import add_terrain_paint_layer, add_terrain_deco_layer
 from ..terrain.kernel import ensure_paint_layers, ensure_deco_layers
 from ..data import URotator, UReference
-from ..helpers import load_bdk_static_mesh, load_bdk_material
+from ..helpers import load_bdk_static_mesh, load_bdk_material, load_bdk_assets
 from ..units import unreal_to_radians
 
 
@@ -140,8 +141,6 @@ def poly_list_to_mesh(context: Context, name: str, poly_list: T3dObject, pre_piv
 
         if material_reference is not None:
             if material_reference not in materials:
-                # TODO: there are performance issues with load_bdk_material that probably make copy-pasting
-                #  large T3D brush payloads very slow because of the I/O bottleneck.
                 materials[material_reference] = load_bdk_material(context, material_reference)
         else:
             materials[None] = None
@@ -576,16 +575,7 @@ class TerrainInfoImporter(ActorImporter):
         for index, value in quad_visibility_bitmap_entries:
             quad_visibility_bitmap[index] = value
 
-        bitmap_index = 0
-        for y in reversed(range(resolution - 1)):
-            for x in range(resolution - 1):
-                polygon_index = (y * resolution) - y + x
-                array_index = bitmap_index >> 5
-                bit_mask = bitmap_index & 0x1F
-                if (quad_visibility_bitmap[array_index] & (1 << bit_mask)) == 0:
-                    mesh_data.polygons[polygon_index].material_index = 1
-                bitmap_index += 1
-            bitmap_index += 1
+        set_quad_visibility(mesh_data, decode_quad_bitmap(quad_visibility_bitmap, resolution, resolution))
 
         # Ensure the paint layers are set up correctly.
         ensure_paint_layers(terrain_info_object)
@@ -756,9 +746,48 @@ def set_custom_properties(t3d_actor: T3dObject, bpy_object: Object):
     bpy_object.scale = scale
 
 
+def get_t3d_object_asset_references(t3d_object: T3dObject, material_references: set[str],
+                                    static_mesh_references: set[str]):
+    """
+    Collects the references to the materials and static meshes that will be loaded when importing the T3D object and
+    its children.
+    """
+    match t3d_object.type_:
+        case 'Actor':
+            properties = t3d_object.properties
+            if 'StaticMesh' in properties:
+                static_mesh_references.add(str(properties['StaticMesh']))
+            for _, texture_reference in properties.get('Skins', []):
+                material_references.add(str(texture_reference))
+            if 'ProjTexture' in properties:
+                material_references.add(str(properties['ProjTexture']))
+            # Terrain layers.
+            for _, layer in properties.get('Layers', []):
+                if 'Texture' in layer:
+                    material_references.add(str(layer['Texture']))
+            for _, deco_layer in properties.get('DecoLayers', []):
+                if 'StaticMesh' in deco_layer:
+                    static_mesh_references.add(str(deco_layer['StaticMesh']))
+        case 'Polygon':
+            texture_reference = t3d_object.properties.get('Texture', None)
+            if texture_reference is not None:
+                material_references.add(str(texture_reference))
+
+    for child in t3d_object.children:
+        get_t3d_object_asset_references(child, material_references, static_mesh_references)
+
+
 def import_t3d(window_manager: WindowManager, contents: str, context: Context):
     t3d_objects: list[T3dObject] = read_t3d(contents)
 
+    # Link all the materials and static meshes up-front so that each package library is only loaded once. The actor
+    # importers will then find the data already loaded.
+    material_references = set()
+    static_mesh_references = set()
+    for t3d_object in t3d_objects:
+        get_t3d_object_asset_references(t3d_object, material_references, static_mesh_references)
+    load_bdk_assets(context, material_references, static_mesh_references)
+
     window_manager.progress_begin(0, len(t3d_objects))
 
     for object_index, t3d_object in enumerate(t3d_objects):
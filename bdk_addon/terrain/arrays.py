@@ -0,0 +1,130 @@
+"""
+Numpy views of the data of a terrain info mesh, in the shape of the terrain grid (i.e., indexed by [y, x]).
+
+The arrays are read with `foreach_get` and written back with `foreach_set` on the mesh attributes, so that operations
+on the whole terrain do not have to access each vertex or polygon from Python. The attributes are used rather than the
+vertex, loop and polygon collections, since they are much faster to access in bulk.
+"""
+
+import numpy as np
+from bpy.types import Attribute, Mesh
+
+from .bitmap import get_quad_edge_turn_bits, get_quad_material_indices, set_quad_material_indices
+
+
+# The name of the value of the data of each attribute type, the number of components of the value and its dtype.
+_attribute_value_types: dict[str, tuple[str, int, type]] = {
+    'FLOAT': ('value', 1, np.float32),
+    'INT': ('value', 1, np.int32),
+    'BOOLEAN': ('value', 1, bool),
+    'FLOAT_VECTOR': ('vector', 3, np.float32),
+    'FLOAT_COLOR': ('color', 4, np.float32),
+    'BYTE_COLOR': ('color', 4, np.float32),
+}
+
+
+def get_terrain_info_vertex_coordinates_array(mesh_data: Mesh, x_size: int, y_size: int) -> np.ndarray:
+    """
+    Returns the coordinates of the vertices of a terrain info mesh as a (y_size, x_size, 3) array.
+    """
+    coordinates = np.zeros(len(mesh_data.vertices) * 3, dtype=np.float32)
+    mesh_data.attributes['position'].data.foreach_get('vector', coordinates)
+    return coordinates.reshape((y_size, x_size, 3))
+
+
+def set_terrain_info_vertex_coordinates_array(mesh_data: Mesh, coordinates: np.ndarray):
+    mesh_data.attributes['position'].data.foreach_set('vector',
+                                                      np.ascontiguousarray(coordinates, dtype=np.float32).ravel())
+    mesh_data.update()
+
+
+def get_terrain_info_heights(mesh_data: Mesh, x_size: int, y_size: int) -> np.ndarray:
+    """
+    Returns the heights (Z coordinates) of the vertices of a terrain info mesh as a (y_size, x_size) array.
+    """
+    return get_terrain_info_vertex_coordinates_array(mesh_data, x_size, y_size)[:, :, 2].copy()
+
+
+def set_terrain_info_heights(mesh_data: Mesh, heights: np.ndarray):
+    """
+    Sets the heights (Z coordinates) of the vertices of a terrain info mesh, leaving the X and Y coordinates as they are.
+    """
+    position_data = mesh_data.attributes['position'].data
+    coordinates = np.zeros(len(mesh_data.vertices) * 3, dtype=np.float32)
+    position_data.foreach_get('vector', coordinates)
+    coordinates[2::3] = np.ravel(heights)
+    position_data.foreach_set('vector', coordinates)
+    mesh_data.update()
+
+
+def get_terrain_info_quad_material_indices(mesh_data: Mesh, x_size: int, y_size: int) -> np.ndarray:
+    """
+    Returns the material indices of the quads of a terrain info mesh (i.e., the terrain holes) as a
+    (y_size - 1, x_size - 1) array.
+    """
+    return get_quad_material_indices(mesh_data).reshape((y_size - 1, x_size - 1))
+
+
+def set_terrain_info_quad_material_indices(mesh_data: Mesh, material_indices: np.ndarray):
+    set_quad_material_indices(mesh_data, material_indices)
+    mesh_data.update()
+
+
+def get_terrain_info_quad_edge_turns(mesh_data: Mesh, x_size: int, y_size: int) -> np.ndarray:
+    """
+    Returns the edge turn bit of each quad of a terrain info mesh as a (y_size - 1, x_size - 1) array. The bit is clear
+    for quads that are turned.
+    """
+    return get_quad_edge_turn_bits(mesh_data, x_size).reshape((y_size - 1, x_size - 1))
+
+
+def set_terrain_info_quad_edge_turns(mesh_data: Mesh, x_size: int, y_size: int, edge_turns: np.ndarray):
+    """
+    Turns the quads of a terrain info mesh whose edge turn bit differs from `edge_turns`.
+    """
+    changed = (get_terrain_info_quad_edge_turns(mesh_data, x_size, y_size) != edge_turns).ravel()
+    if not np.any(changed):
+        return
+    corner_vert_data = mesh_data.attributes['.corner_vert'].data
+    loop_vertex_indices = np.zeros(len(mesh_data.loops), dtype=np.int32)
+    corner_vert_data.foreach_get('value', loop_vertex_indices)
+    # Terrain info quads are created with consecutive loops, so the loops can be viewed as one row per quad.
+    quad_vertex_indices = loop_vertex_indices.reshape((-1, 4))
+    # Starting the quad on the previous corner turns it.
+    quad_vertex_indices[changed] = np.roll(quad_vertex_indices[changed], 1, axis=1)
+    corner_vert_data.foreach_set('value', loop_vertex_indices)
+    # The edges of the turned quads change, so the edges (and the edges of the corners) have to be recalculated.
+    mesh_data.update(calc_edges=True)
+
+
+def _get_attribute_grid_shape(attribute: Attribute, x_size: int, y_size: int) -> tuple[int, int]:
+    match attribute.domain:
+        case 'POINT':
+            return y_size, x_size
+        case 'FACE':
+            return y_size - 1, x_size - 1
+        case _:
+            raise ValueError(f'Unsupported attribute domain for terrain info: {attribute.domain}')
+
+
+def get_terrain_info_attribute_array(attribute: Attribute, x_size: int, y_size: int) -> np.ndarray:
+    """
+    Returns the values of a point or face attribute of a terrain info mesh in the shape of the terrain grid, with an
+    extra axis for the components of vector and color attributes.
+    """
+    try:
+        value_name, component_count, dtype = _attribute_value_types[attribute.data_type]
+    except KeyError:
+        raise ValueError(f'Unsupported attribute data type for terrain info: {attribute.data_type}')
+    shape = _get_attribute_grid_shape(attribute, x_size, y_size)
+    values = np.zeros(len(attribute.data) * component_count, dtype=dtype)
+    attribute.data.foreach_get(value_name, values)
+    return values.reshape(shape if component_count == 1 else shape + (component_count,))
+
+
+def set_terrain_info_attribute_array(attribute: Attribute, values: np.ndarray):
+    try:
+        value_name, _, dtype = _attribute_value_types[attribute.data_type]
+    except KeyError:
+        raise ValueError(f'Unsupported attribute data type for terrain info: {attribute.data_type}')
+    attribute.data.foreach_set(value_name, np.ascontiguousarray(values, dtype=dtype).ravel())
@@ -0,0 +1,103 @@
+"""
+Unreal stores per-quad flags of a terrain (e.g., the edge turn and quad visibility bitmaps) as arrays of 32-bit
+integers, with one bit per quad. The bitmaps have a stride of one bit per vertex (i.e., there is an unused bit at the
+end of each row of quads) and are flipped over Y relative to the quads of the terrain info mesh.
+
+The functions here convert between these bitmaps and boolean arrays with one value per quad, in the order of the
+polygons of the terrain info mesh.
+"""
+
+import numpy as np
+from bpy.types import Mesh
+
+
+def get_quad_bitmap_size(x_size: int, y_size: int) -> int:
+    """
+    Returns the number of 32-bit integers in a quad bitmap for a terrain with the given number of vertices.
+    """
+    return max(1, int(x_size * y_size / 32))
+
+
+def get_quad_bitmap_bit_indices(x_size: int, y_size: int) -> np.ndarray:
+    """
+    Returns the index of the bit in the quad bitmap for each quad of the terrain info mesh.
+    """
+    quad_y, quad_x = np.divmod(np.arange((y_size - 1) * (x_size - 1)), x_size - 1)
+    return (y_size - 2 - quad_y) * x_size + quad_x
+
+
+def decode_quad_bitmap(bitmap: np.ndarray | list[int], x_size: int, y_size: int) -> np.ndarray:
+    """
+    Returns the value of the bit for each quad of the terrain info mesh. Bits beyond the end of the bitmap are clear.
+    """
+    bit_indices = get_quad_bitmap_bit_indices(x_size, y_size)
+    # NOTE: The values are wrapped to 32 bits, since they can be given as either signed or unsigned integers.
+    bitmap = np.asarray(bitmap, dtype=np.int64).astype('<i4')
+    bits = np.unpackbits(bitmap.view(np.uint8), bitorder='little').astype(bool)
+    bit_count = int(bit_indices.max(initial=-1)) + 1
+    if len(bits) < bit_count:
+        bits = np.pad(bits, (0, bit_count - len(bits)))
+    return bits[bit_indices]
+
+
+def encode_quad_bitmap(quad_bits: np.ndarray, x_size: int, y_size: int, fill_value: bool = False) -> np.ndarray:
+    """
+    Returns the quad bitmap of the bits for each quad of the terrain info mesh. The bits that do not correspond to a
+    quad are set to `fill_value`.
+    """
+    bit_indices = get_quad_bitmap_bit_indices(x_size, y_size)
+    bitmap_size = max(get_quad_bitmap_size(x_size, y_size), (int(bit_indices.max(initial=-1)) >> 5) + 1)
+    bits = np.full(bitmap_size * 32, fill_value=fill_value, dtype=bool)
+    bits[bit_indices] = quad_bits
+    return np.packbits(bits, bitorder='little').view('<i4').astype(np.int32)
+
+
+def get_quad_edge_turn_bits(mesh_data: Mesh, x_size: int) -> np.ndarray:
+    """
+    Returns the edge turn bit for each quad of a terrain info mesh. The bit is set when the quad starts on its natural
+    first vertex (or the vertex diagonal to it), and clear when the quad is turned.
+    """
+    loop_starts = np.zeros(len(mesh_data.polygons), dtype=np.int32)
+    mesh_data.polygons.foreach_get('loop_start', loop_starts)
+    # NOTE: The corner vertices are read through the attribute, which is much faster than through the loops.
+    loop_vertex_indices = np.zeros(len(mesh_data.loops), dtype=np.int32)
+    mesh_data.attributes['.corner_vert'].data.foreach_get('value', loop_vertex_indices)
+    first_vertex_indices = loop_vertex_indices[loop_starts]
+    quad_y, quad_x = np.divmod(np.arange(len(loop_starts)), x_size - 1)
+    vertex_indices = quad_y * x_size + quad_x
+    return (first_vertex_indices == vertex_indices) | (first_vertex_indices == vertex_indices + x_size + 1)
+
+
+def get_quad_material_indices(mesh_data: Mesh) -> np.ndarray:
+    """
+    Returns the material index of each quad of a terrain info mesh.
+    """
+    material_indices = np.zeros(len(mesh_data.polygons), dtype=np.int32)
+    # NOTE: Meshes only have a material index attribute once a face has a non-zero material index.
+    attribute = mesh_data.attributes.get('material_index')
+    if attribute is not None:
+        attribute.data.foreach_get('value', material_indices)
+    return material_indices
+
+
+def set_quad_material_indices(mesh_data: Mesh, material_indices: np.ndarray):
+    attribute = mesh_data.attributes.get('material_index')
+    if attribute is None:
+        attribute = mesh_data.attributes.new('material_index', 'INT', 'FACE')
+    attribute.data.foreach_set('value', np.ascontiguousarray(material_indices, dtype=np.int32).ravel())
+
+
+def get_quad_visibility(mesh_data: Mesh) -> np.ndarray:
+    """
+    Returns whether each quad of a terrain info mesh is visible. Hidden quads use the second (hidden) material.
+    """
+    return get_quad_material_indices(mesh_data) != 1
+
+
+def set_quad_visibility(mesh_data: Mesh, visibility: np.ndarray):
+    """
+    Hides the quads of a terrain info mesh that are not visible by assigning them the second (hidden) material.
+    """
+    material_indices = get_quad_material_indices(mesh_data)
+    material_indices[~visibility] = 1
+    set_quad_material_indices(mesh_data, material_indices)
@@ -1,6 +1,5 @@
 from pathlib import Path
 
-import bmesh
 import bpy
 from bpy.types import Mesh, Object, NodeTree
 from typing import cast, Union, Iterator
@@ -8,11 +7,12 @@ import uuid
 import numpy as np
 
 from ..bdk.repository.kernel import get_repository_cache_directory
-from ..helpers import get_terrain_info, get_active_repository
+from ..helpers import get_terrain_info, get_active_repository, get_addon_preferences
 from ..node_helpers import ensure_shader_node_tree, ensure_input_and_output_nodes
 from ..data import UReference
-from ..material.cache import MaterialCache
+from ..material.cache import get_material_cache
 from ..material.importer import MaterialBuilder
+from .bitmap import decode_quad_bitmap
 
 
 def _ensure_terrain_paint_layer_uv_group_node() -> NodeTree:
@@ -90,8 +90,9 @@ def build_terrain_material(terrain_info_object: Object):
 
     material_caches = []
     if repository is not None:
-        material_caches.append(MaterialCache(get_repository_cache_directory(repository)))
-    material_builder = MaterialBuilder(material_caches, node_tree)
+        material_caches.append(get_material_cache(get_repository_cache_directory(repository)))
+    use_shared_time = get_addon_preferences(bpy.context).material_animation_mode == 'SHARED_TIME'
+    material_builder = MaterialBuilder(material_caches, node_tree, use_shared_time=use_shared_time)
 
     def add_paint_layer_input_driver(node, input_prop: Union[str | int], paint_layer_prop: str):
         fcurve = node.inputs[input_prop].driver_add('default_value')
@@ -103,6 +104,17 @@ def build_terrain_material(terrain_info_object: Object):
         target.id = terrain_info_object
         target.data_path = f'bdk.terrain_info.paint_layers[{paint_layer_index}].{paint_layer_prop}'
 
+    # Read and parse the materials of all the paint layers up-front, so that building the node tree does not wait on
+    # sequential disk reads.
+    paint_layer_references = []
+    for paint_layer in paint_layers:
+        if paint_layer.material and paint_layer.material.bdk.package_reference:
+            reference = UReference.from_string(paint_layer.material.bdk.package_reference)
+            if reference is not None:
+                paint_layer_references.append(reference)
+    for material_cache in material_caches:
+        material_cache.prefetch(paint_layer_references)
+
     for paint_layer_index, paint_layer in enumerate(paint_layers):
         material = paint_layer.material
         material_outputs = None
@@ -173,58 +185,95 @@ def get_terrain_info_vertex_xy_coordinates(resolution: int, terrain_scale: float
             yield terrain_scale * x - size_half, terrain_scale * y - size_half + terrain_scale
 
 
-def create_terrain_info_mesh(resolution: int, size: float, heightmap: np.ndarray | None = None, edge_turn_bitmap: np.ndarray | None = None) -> Mesh:
-    bm = bmesh.new()
+def get_terrain_info_vertex_coordinates(resolution: int, terrain_scale: float, heightmap: np.ndarray) -> np.ndarray:
+    """
+    Gets the coordinates of the vertices for a terrain info object given the resolution, size and heightmap, as a
+    (resolution * resolution, 3) array. This is the vectorized equivalent of `get_terrain_info_vertex_xy_coordinates`.
+    """
+    # NOTE: There is a bug in Unreal where the terrain is off-center, so we deliberately
+    # have to miscalculate things in order to replicate the behavior seen in the engine.
+    size = resolution * terrain_scale
+    size_half = 0.5 * size
+    steps = np.arange(resolution, dtype=np.float64) * terrain_scale
+    coordinates = np.empty((resolution, resolution, 3), dtype=np.float64)
+    coordinates[:, :, 0] = (steps - size_half)[np.newaxis, :]
+    coordinates[:, :, 1] = (steps - size_half + terrain_scale)[:, np.newaxis]
+    coordinates[:, :, 2] = np.reshape(heightmap, (resolution, resolution))
+    return coordinates.reshape(-1, 3)
+
+
+def get_terrain_info_quad_vertex_indices(resolution: int, edge_turn_bitmap: np.ndarray | None = None) -> np.ndarray:
+    """
+    Gets the vertex indices of the corners of each quad of a terrain info object, in the order that the quads and
+    their corners are created, as a ((resolution - 1) * (resolution - 1), 4) array.
+
+    A quad whose edge turn bit is clear is turned, which starts the quad on a different corner so that it is
+    triangulated along the other diagonal.
+    """
+    quad_resolution = resolution - 1
+    base_indices = (np.arange(quad_resolution)[:, np.newaxis] * resolution + np.arange(quad_resolution)).ravel()
+    indices = np.array([0, 1, resolution + 1, resolution])
+    turned_indices = np.array([resolution, 0, 1, resolution + 1])
+    if edge_turn_bitmap is None:
+        return base_indices[:, np.newaxis] + indices
+    is_turned = ~decode_quad_bitmap(edge_turn_bitmap, resolution, resolution)
+    return base_indices[:, np.newaxis] + np.where(is_turned[:, np.newaxis], turned_indices, indices)
+
+
+def get_face_edges(face_vertex_indices: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Gets the edges of faces with the same number of corners, as a (edge_count, 2) array of vertex indices, and the
+    edge index of each corner (the edge from the corner to the next corner) as a (face_count, corner_count) array.
+
+    The edges are ordered and oriented the same way that BMesh creates them when the faces are added one after the
+    other, so that meshes built from these arrays are identical to meshes built with BMesh.
+    """
+    face_count, corner_count = face_vertex_indices.shape
+    # BMesh creates the edges of a new face starting with the edge that closes it (from the last corner to the first).
+    edge_starts = np.roll(face_vertex_indices, 1, axis=1).ravel()
+    edge_ends = face_vertex_indices.ravel()
+    vertex_count = int(face_vertex_indices.max(initial=-1)) + 1
+    edge_keys = np.minimum(edge_starts, edge_ends).astype(np.int64) * vertex_count + np.maximum(edge_starts, edge_ends)
+    # An edge that is shared between faces keeps the position and orientation of the first face that created it.
+    _, first_indices, inverse = np.unique(edge_keys, return_index=True, return_inverse=True)
+    order = np.argsort(first_indices)
+    edge_indices = np.empty_like(order)
+    edge_indices[order] = np.arange(len(order))
+    edges = np.stack((edge_starts[first_indices[order]], edge_ends[first_indices[order]]), axis=1)
+    face_edge_indices = edge_indices[inverse.ravel()].reshape(face_count, corner_count)
+    # The edge of each corner goes from it to the next corner, so it is the one created after the edge ending on it.
+    return edges, np.roll(face_edge_indices, -1, axis=1)
 
+
+def create_terrain_info_mesh(resolution: int, size: float, heightmap: np.ndarray | None = None, edge_turn_bitmap: np.ndarray | None = None) -> Mesh:
     if heightmap is None:
         heightmap = np.full(resolution * resolution, fill_value=0, dtype=float)
 
     terrain_scale = size / resolution
-    coordinates_iter = get_terrain_info_vertex_xy_coordinates(resolution, terrain_scale)
-    coordinates = np.fromiter(((x, y, z) for ((x, y), z) in zip(coordinates_iter, heightmap)), dtype=np.dtype((float, 3)))
-
-    for co in coordinates:
-        bm.verts.new(co)
-
-    bm.verts.ensure_lookup_table()
-
-    # Build the edge turn face indices set.
-    # TODO: Would be nice to make a common function that can do this for both the edge turn bitmap and the quad vis.
-    # TODO: Inefficient to be doing look-ups here I think. Would probably make more sense to build an actual bitmap
-    # and then flip it over Y so that the indexing of the edge turn bitmap and the quads lines up.
-    edge_turn_face_indices = set()
-    if edge_turn_bitmap is not None:
-        edge_turn_bitmap_index = 0
-        for y in reversed(range(resolution - 1)):
-            for x in range(resolution - 1):
-                face_index = (y * resolution) - y + x
-                array_index = edge_turn_bitmap_index >> 5
-                bit_mask = edge_turn_bitmap_index & 0x1F
-                if (edge_turn_bitmap[array_index] & (1 << bit_mask)) == 0:
-                    edge_turn_face_indices.add(face_index)
-                edge_turn_bitmap_index += 1
-            edge_turn_bitmap_index += 1
-
-    # Faces
-    vertex_index = 0
-    indices = [0, 1, resolution + 1, resolution]
-    turned_indices = [resolution, 0, 1, resolution + 1]
-    for y in range(resolution - 1):
-        for x in range(resolution - 1):
-            face_index = (y * resolution) - y + x
-            if face_index in edge_turn_face_indices:
-                face = bm.faces.new(tuple([bm.verts[vertex_index + i] for i in turned_indices]))
-            else:
-                face = bm.faces.new(tuple([bm.verts[vertex_index + i] for i in indices]))
-            face.smooth = True
-            vertex_index += 1
-            face_index += 1
-        vertex_index += 1
+    coordinates = get_terrain_info_vertex_coordinates(resolution, terrain_scale, heightmap)
+    quad_vertex_indices = get_terrain_info_quad_vertex_indices(resolution, edge_turn_bitmap)
+    edges, quad_edge_indices = get_face_edges(quad_vertex_indices)
+    quad_count = len(quad_vertex_indices)
 
     mesh_data = bpy.data.meshes.new('TerrainInfo')
 
-    bm.to_mesh(mesh_data)
-    del bm
+    mesh_data.vertices.add(len(coordinates))
+    mesh_data.edges.add(len(edges))
+    mesh_data.loops.add(quad_count * 4)
+    mesh_data.polygons.add(quad_count)
+
+    # NOTE: The arrays are converted to the types of the underlying data so that foreach_set can copy them directly.
+    #  The vertices, edges and loops are written through their attributes, since setting them through the
+    #  `vertices`, `edges` and `loops` collections is an order of magnitude slower.
+    attributes = mesh_data.attributes
+    attributes['position'].data.foreach_set('vector', coordinates.astype(np.float32).ravel())
+    attributes['.edge_verts'].data.foreach_set('value', edges.astype(np.int32).ravel())
+    attributes['.corner_vert'].data.foreach_set('value', quad_vertex_indices.astype(np.int32).ravel())
+    attributes['.corner_edge'].data.foreach_set('value', quad_edge_indices.astype(np.int32).ravel())
+    mesh_data.polygons.foreach_set('loop_start', np.arange(0, quad_count * 4, 4, dtype=np.int32))
+    mesh_data.shade_smooth()
+
+    mesh_data.update()
 
     return mesh_data
 
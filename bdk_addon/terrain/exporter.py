@@ -2,7 +2,6 @@ import io
 import math
 import os
 
-import bmesh
 import bpy
 import numpy as np
 from bpy.types import Object, Mesh, Image, Depsgraph
@@ -15,6 +14,8 @@ from ..t3d.data import T3DObject
 from ..t3d.writer import T3DWriter
 from ..helpers import get_terrain_info, sanitize_name_for_unreal
 from ..io.g16 import write_bmp_g16
+from .arrays import get_terrain_info_heights
+from .bitmap import encode_quad_bitmap, get_quad_edge_turn_bits, get_quad_visibility
 
 
 def get_instance_offset(asset_instance: Object) -> Matrix:  # TODO: move to generic helpers
@@ -104,46 +105,14 @@ def terrain_info_to_t3d_object(terrain_info_object: Object, matrix_world: Matrix
         })
 
     mesh = cast(Mesh, terrain_info_object.data)
-    bm = bmesh.new()
-    bm.from_mesh(mesh)
-
-    bitmap_size = max(1, int(terrain_info.x_size * terrain_info.y_size / 32))
-
-    bm.faces.ensure_lookup_table()
 
     # Edge Turn Bitmap
-    edge_turn_bitmap = np.zeros(bitmap_size, dtype=np.int32)
-    vertex_index = terrain_info.x_size * (terrain_info.y_size - 2)        # the vert index is wrong here
-    bitmap_index = 0
-    for y in reversed(range(terrain_info.y_size - 1)):
-        for x in range(terrain_info.x_size - 1):
-            face_index = (y * terrain_info.x_size) - y + x
-            face = bm.faces[face_index]
-            # Check if the first vertex in the loop for this face coincides with the natural first vertex or the vertex
-            # diagonal to it.
-            loop_vertex_index = face.loops[0].vert.index
-            if loop_vertex_index == vertex_index or loop_vertex_index == vertex_index + terrain_info.x_size + 1:
-                array_index = bitmap_index >> 5
-                bit_mask = bitmap_index & 0x1F
-                edge_turn_bitmap[array_index] |= (np.int32(1) << bit_mask)
-            vertex_index += 1
-            bitmap_index += 1
-        vertex_index -= (terrain_info.x_size * 2) - 1
-        bitmap_index += 1
+    edge_turn_bitmap = encode_quad_bitmap(get_quad_edge_turn_bits(mesh, terrain_info.x_size),
+                                          terrain_info.x_size, terrain_info.y_size)
 
     # Quad Visibility Bitmap
-    quad_visibility_bitmap = np.full(bitmap_size, fill_value=-1, dtype=np.int32)
-    bitmap_index = 0
-    for y in reversed(range(terrain_info.y_size - 1)):
-        for x in range(terrain_info.x_size - 1):
-            face_index = (y * terrain_info.x_size) - y + x
-            face = bm.faces[face_index]
-            if face.material_index == 1:
-                array_index = bitmap_index >> 5
-                bit_mask = bitmap_index & 0x1F
-                quad_visibility_bitmap[array_index] &= ~(np.int32(1) << bit_mask)
-            bitmap_index += 1
-        bitmap_index += 1
+    quad_visibility_bitmap = encode_quad_bitmap(get_quad_visibility(mesh), terrain_info.x_size, terrain_info.y_size,
+                                                fill_value=True)
 
     actor.properties['TerrainMap'] = f'Texture\'myLevel.{terrain_info_name}\''
     actor.properties['Layers'] = layers
@@ -279,11 +248,10 @@ def get_terrain_heightmap(terrain_info_object: Object, depsgraph: Depsgraph | No
         terrain_info_object = terrain_info_object.evaluated_get(depsgraph)
     mesh_data = cast(Mesh, terrain_info_object.data)
     # TODO: support "multiple terrains"
-    shape = (terrain_info.x_size, terrain_info.y_size)
-    heightmap = np.array([v.co[2] for v in mesh_data.vertices], dtype=float)
+    heightmap = get_terrain_info_heights(mesh_data, terrain_info.x_size, terrain_info.y_size).astype(float)
     if should_quantize:
         heightmap = quantize_heightmap(heightmap, terrain_info.terrain_scale_z)
-    return heightmap.reshape(shape)
+    return heightmap
 
 
 def export_terrain_heightmap(terrain_info_object: Object, depsgraph: Depsgraph, directory: str):
@@ -32,8 +32,10 @@ def add_terrain_paint_layer(terrain_info_object: Object, name: str) -> BDK_PG_te
     build_terrain_material(terrain_info_object)
 
     # Tag window regions for redraw so that the new layer is displayed in terrain layer lists immediately.
-    for region in filter(lambda r: r.type == 'WINDOW', bpy.context.area.regions):
-        region.tag_redraw()
+    # NOTE: There is no area when running in the background (e.g., from a script).
+    if bpy.context.area is not None:
+        for region in filter(lambda r: r.type == 'WINDOW', bpy.context.area.regions):
+            region.tag_redraw()
 
     return paint_layer
 
@@ -1,6 +1,5 @@
 import os
 import uuid
-from collections import deque
 
 from typing import cast
 
@@ -8,7 +7,7 @@ import bpy
 import mathutils
 import numpy
 from bpy.props import IntProperty, FloatProperty, FloatVectorProperty, BoolProperty, StringProperty, EnumProperty
-from bpy.types import Operator, Context, Mesh, Object, Event, VertexGroup, NodesModifier
+from bpy.types import Operator, Context, Mesh, Object, Event, NodesModifier
 from bpy_extras.io_utils import ExportHelper
 
 from ..io.g16 import read_bmp_g16
@@ -22,10 +21,17 @@ from .layers import add_terrain_paint_layer
 from .doodad.builder import ensure_terrain_info_modifiers, get_terrain_doodads_for_terrain_info_object
 from .doodad.scatter.builder import ensure_scatter_layer_modifiers
 
-from ..helpers import get_terrain_info, get_vertex_group_weights, is_active_object_terrain_info, accumulate_byte_color_attribute_data, \
-    copy_simple_property_group, ensure_name_unique, padded_roll, sanitize_name_for_unreal
+from ..helpers import get_terrain_info, get_vertex_group_weights, set_vertex_group_weights, \
+    is_active_object_terrain_info, accumulate_byte_color_attribute_data, copy_simple_property_group, ensure_name_unique, \
+    padded_roll, sanitize_name_for_unreal
 from .builder import build_terrain_material, create_terrain_info_mesh, create_terrain_info_object, get_terrain_quad_size, \
-    get_terrain_info_vertex_xy_coordinates
+    get_terrain_info_vertex_xy_coordinates, get_terrain_info_vertex_coordinates
+from .arrays import get_terrain_info_heights, set_terrain_info_heights, get_terrain_info_vertex_coordinates_array, \
+    set_terrain_info_vertex_coordinates_array, get_terrain_info_quad_material_indices, \
+    set_terrain_info_quad_material_indices, get_terrain_info_quad_edge_turns, set_terrain_info_quad_edge_turns, \
+    get_terrain_info_attribute_array, set_terrain_info_attribute_array
+from .bitmap import encode_quad_bitmap
+from .resample import resample_filter_items, resample_grid, resample_quad_grid
 from .properties import node_type_items, node_type_item_names, BDK_PG_terrain_info, BDK_PG_terrain_paint_layer, \
     BDK_PG_terrain_layer_node, BDK_PG_terrain_deco_layer, get_terrain_info_paint_layer_by_id
 
@@ -703,17 +709,17 @@ class BDK_OT_terrain_info_repair(Operator):
 
     def execute(self, context: Context):
         terrain_info = get_terrain_info(context.active_object)
-        vertex_coordinates = get_terrain_info_vertex_xy_coordinates(resolution=terrain_info.x_size, terrain_scale=terrain_info.terrain_scale)
         mesh_data = cast(Mesh, context.active_object.data)
-        vertex_repair_count = 0
-        for vertex in mesh_data.vertices:
-            co = next(vertex_coordinates)
-            if co[0] != vertex.co.x or co[1] != vertex.co.y:
-                vertex_repair_count += 1
-                vertex.co.x, vertex.co.y = co
+        coordinates = get_terrain_info_vertex_coordinates_array(mesh_data, terrain_info.x_size, terrain_info.y_size)
+        heights = coordinates[:, :, 2].ravel()
+        repaired_coordinates = get_terrain_info_vertex_coordinates(terrain_info.x_size, terrain_info.terrain_scale,
+                                                                   heights)
+        repaired_coordinates = repaired_coordinates.astype(numpy.float32).reshape(coordinates.shape)
+        vertex_repair_count = int(numpy.count_nonzero(numpy.any(coordinates != repaired_coordinates, axis=2)))
         if vertex_repair_count == 0:
             self.report({'INFO'}, 'No repairs needed')
             return {'CANCELLED'}
+        set_terrain_info_vertex_coordinates_array(mesh_data, repaired_coordinates)
         self.report({'INFO'}, f'Repaired {vertex_repair_count} vertices')
 
         ensure_terrain_info_modifiers(context, terrain_info)
@@ -783,10 +789,8 @@ class BDK_OT_terrain_paint_layer_node_invert(Operator):
 
         assert node
         terrain_info_object = cast(Object, node.terrain_info_object)
-        vertex_group, weights = get_vertex_group_weights(terrain_info_object, node.id)
-        
-        for index, weight in enumerate(weights):
-            vertex_group.add((index,), 1.0 - weight, 'REPLACE')
+        weights = get_vertex_group_weights(context, terrain_info_object, [node.id])[node.id]
+        set_vertex_group_weights(context, terrain_info_object, {node.id: 1.0 - weights})
 
         terrain_info_object.update_tag()
 
@@ -923,18 +927,10 @@ class BDK_OT_terrain_paint_layer_node_duplicate(Operator):
         copy_simple_property_group(node, duplicate_node, {'id', 'name'})
 
         if node.type == 'PAINT':
-            # Duplicate the attribute.
-            vertex_count = len(cast(Mesh, node.terrain_info_object.data).vertices)
-            vertex_group_old = terrain_info_object.vertex_groups.get(node.id)
-            assert vertex_group_old
-            vertex_group_new = terrain_info_object.vertex_groups.new(name=duplicate_node.id)
-            assert vertex_group_new
-            for i in range(vertex_count):
-                try:
-                    weight = vertex_group_old.weight(i)
-                except RuntimeError:
-                    continue
-                vertex_group_new.add((i,), weight, 'REPLACE')
+            # Duplicate the vertex group.
+            assert node.id in terrain_info_object.vertex_groups
+            weights = get_vertex_group_weights(context, terrain_info_object, [node.id])[node.id]
+            set_vertex_group_weights(context, terrain_info_object, {duplicate_node.id: weights})
 
         # Move the node to below the selected node.
         nodes.move(len(nodes) - 1, paint_layer.nodes_index + 1)
@@ -1134,96 +1130,38 @@ class BDK_OT_terrain_info_shift(Operator):
                 if obj.bdk.type != 'TERRAIN_INFO':
                     obj.location += translation
 
-        # Convert the z-values of the terrain info vertices to a numpy array.
         if 'HEIGHTMAP' in self.data_types:
-            shape = terrain_info.x_size, terrain_info.y_size
-            count = terrain_info.x_size * terrain_info.y_size
-            z_values = numpy.fromiter(map(lambda v: v.co.z, mesh_data.vertices), dtype=float, count=count).reshape(shape)
-            z_values = numpy.roll(z_values, (self.x, self.y), axis=(1, 0))
-
-            # Reassign the z-values to the terrain info vertices.
-            for (vertex, z) in zip(mesh_data.vertices, z_values.flat):
-                vertex.co.z = z
+            heights = get_terrain_info_heights(mesh_data, terrain_info.x_size, terrain_info.y_size)
+            set_terrain_info_heights(mesh_data, numpy.roll(heights, (self.x, self.y), axis=(1, 0)))
             
-        if 'PAINT_LAYERS':
-            shape = (terrain_info.x_size, terrain_info.y_size)
-            for paint_layer in terrain_info.paint_layers:
-                for node in filter(lambda x: x.type == 'PAINT', paint_layer.nodes):
-                    vertex_group, weights = get_vertex_group_weights(terrain_info_object, node.id)
-                    count = terrain_info.x_size * terrain_info.y_size
-                    weights = numpy.fromiter(iter(weights), dtype=float, count=count).reshape(shape)
-                    weights = numpy.roll(weights, (self.x, self.y), axis=(1, 0))
-                    weights = weights.flatten()
-                    for index, weight in enumerate(weights):
-                        vertex_group.add((index,), weight, 'REPLACE')
+        if 'PAINT_LAYERS' in self.data_types:
+            shape = (terrain_info.y_size, terrain_info.x_size)
+            vertex_group_names = [node.id for paint_layer in terrain_info.paint_layers for node in paint_layer.nodes
+                                  if node.type == 'PAINT' and node.id in terrain_info_object.vertex_groups]
+            vertex_group_weights = get_vertex_group_weights(context, terrain_info_object, vertex_group_names)
+            for vertex_group_name, weights in vertex_group_weights.items():
+                vertex_group_weights[vertex_group_name] = numpy.roll(weights.reshape(shape), (self.x, self.y),
+                                                                     axis=(1, 0))
+            set_vertex_group_weights(context, terrain_info_object, vertex_group_weights)
 
         if 'ATTRIBUTES' in self.data_types:
             for attribute in mesh_data.attributes:
-                match attribute.data_type:
-                    case 'BYTE_COLOR':
-                        # Convert the attribute values to a numpy array.
-                        shape = (terrain_info.x_size, terrain_info.y_size, 4)
-                        count = terrain_info.x_size * terrain_info.y_size
-                        weights = numpy.fromiter(map(lambda v: v.color, attribute.data), dtype=(float, 4), count=count).reshape(shape)
-                        weights = numpy.roll(weights, (self.x, self.y), axis=(1, 0))
-                        # Reassign the attribute values.
-                        attribute.data.foreach_set('color', weights.flatten())
-                    case 'FLOAT':
-                        shape = terrain_info.x_size, terrain_info.y_size
-                        count = terrain_info.x_size * terrain_info.y_size
-                        weights = numpy.fromiter(map(lambda v: v.value, attribute.data), dtype=float,
-                                                          count=count).reshape(shape)
-                        weights = numpy.roll(weights, (self.x, self.y), axis=(1, 0))
-                        # Reassign the attribute values.
-                        attribute.data.foreach_set('value', weights.flatten())
+                if attribute.data_type in {'BYTE_COLOR', 'FLOAT'} and attribute.domain == 'POINT':
+                    values = get_terrain_info_attribute_array(attribute, terrain_info.x_size, terrain_info.y_size)
+                    set_terrain_info_attribute_array(attribute, numpy.roll(values, (self.x, self.y), axis=(1, 0)))
 
         # Shift the quad tesselation.
         if 'QUAD_TESSELATION' in self.data_types:
-            quad_edge_turns = numpy.zeros(len(mesh_data.polygons), dtype=int)
-            vertex_index = 0
-            for y in range(terrain_info.y_size - 1):
-                for x in range(terrain_info.x_size - 1):
-                    polygon_index = y * (terrain_info.x_size - 1) + x
-                    polygon = mesh_data.polygons[polygon_index]
-                    loop_vertex_index = mesh_data.loops[polygon.loop_start].vertex_index
-                    # Check if the first vertex in the loop for this face coincides with the natural first vertex or the vertex
-                    # diagonal to it.
-                    if loop_vertex_index == vertex_index or loop_vertex_index == vertex_index + terrain_info.x_size + 1:
-                        quad_edge_turns[polygon_index] = 1
-                    vertex_index += 1
-                vertex_index += 1
-
-            quad_edge_turns = quad_edge_turns.reshape((terrain_info.x_size - 1, terrain_info.y_size - 1))
-
-            # Store the original quad edge turns.
-            original_quad_edge_turns = quad_edge_turns.flatten()
-
+            quad_edge_turns = get_terrain_info_quad_edge_turns(mesh_data, terrain_info.x_size, terrain_info.y_size)
             # Do a padded roll to shift the quad edge turns.
-            new_quad_edge_turns = padded_roll(quad_edge_turns, (self.x, self.y)).flatten()
-
-            # Turn the edges of the quads that have changed.
-            for polygon_index in range(len(original_quad_edge_turns)):
-                if original_quad_edge_turns[polygon_index] != new_quad_edge_turns[polygon_index]:
-                    polygon = mesh_data.polygons[polygon_index]
-                    loops = [mesh_data.loops[i] for i in range(polygon.loop_start, polygon.loop_start + polygon.loop_total)]
-                    loop_vertex_indices = deque(map(lambda l: l.vertex_index, loops))
-                    loop_vertex_indices.rotate(1)
-                    for (loop, vertex_index) in zip(loops, loop_vertex_indices):
-                        loop.vertex_index = vertex_index
-
-            mesh_data.update(calc_edges=True)
+            quad_edge_turns = padded_roll(quad_edge_turns.astype(int), (self.x, self.y)) != 0
+            set_terrain_info_quad_edge_turns(mesh_data, terrain_info.x_size, terrain_info.y_size, quad_edge_turns)
 
         if 'TERRAIN_HOLES' in self.data_types:
             # Move the terrain holes (material indices).
-            # Convert all the material indices to a numpy array (used for terrain holes)
-            shape = (terrain_info.x_size - 1, terrain_info.y_size - 1)
-            count = terrain_info.x_size - 1 * terrain_info.y_size - 1
-            material_indices = numpy.fromiter(map(lambda f: f.material_index, mesh_data.polygons),
-                                              dtype=int, count=count).reshape(shape)  # Can we avoid the reshape?
-            material_indices = padded_roll(material_indices, (self.x, self.y))
-            # Reassign the material indices.
-            for (face, material_index) in zip(mesh_data.polygons, material_indices.flat):
-                face.material_index = material_index
+            material_indices = get_terrain_info_quad_material_indices(mesh_data, terrain_info.x_size,
+                                                                      terrain_info.y_size)
+            set_terrain_info_quad_material_indices(mesh_data, padded_roll(material_indices, (self.x, self.y)))
 
         return {'FINISHED'}
 
@@ -1235,6 +1173,7 @@ class BDK_OT_terrain_info_resolution_set(Operator):
     bl_options = {'REGISTER', 'UNDO'}
 
     resolution: EnumProperty(name='Resolution', items=resolution_items)
+    filter: EnumProperty(name='Filter', items=resample_filter_items, default='BILINEAR')
 
     @classmethod
     def poll(cls, context: Context):
@@ -1249,63 +1188,89 @@ class BDK_OT_terrain_info_resolution_set(Operator):
     def execute(self, context: Context):
         terrain_info_object = context.active_object
         terrain_info = get_terrain_info(terrain_info_object)
+        resolution = int(self.resolution)
 
-        if terrain_info.x_size == self.resolution:
+        if terrain_info.x_size == resolution and terrain_info.y_size == resolution:
             self.report({'WARNING'}, f'Current resolution and target resolution are the same ({self.resolution})')
             return {'CANCELLED'}
     
         mesh_data_old = cast(Mesh, terrain_info_object.data)
-        resolution = int(self.resolution)
-        step = int(terrain_info.x_size / resolution)
+        x_size, y_size = terrain_info.x_size, terrain_info.y_size
+        shape = (resolution, resolution)
+        # The terrain keeps its size, so the quads are scaled to fit the new resolution.
+        size = terrain_info.terrain_scale * x_size
+
+        # Gather all the vertex data that is interpolated (the heightmap, the weights of the paint nodes of every paint
+        # and deco layer, and the non-integer point attributes) into a single stack of layers so that it can be
+        # resampled in one pass.
+        layers = [get_terrain_heightmap(terrain_info_object, should_quantize=False)[:, :, numpy.newaxis]]
+
+        vertex_group_names = [vertex_group.name for vertex_group in terrain_info_object.vertex_groups]
+        vertex_group_data = get_vertex_group_weights(context, terrain_info_object, vertex_group_names)
+        layers.extend(weights.reshape((y_size, x_size, 1)) for weights in vertex_group_data.values())
+
+        attributes = [attribute for attribute in mesh_data_old.attributes
+                      if not attribute.is_internal and not attribute.is_required
+                      and attribute.name != 'material_index'
+                      and attribute.domain in {'POINT', 'FACE'}
+                      and attribute.data_type in {'FLOAT', 'INT', 'BOOLEAN', 'FLOAT_VECTOR', 'FLOAT_COLOR',
+                                                  'BYTE_COLOR'}]
+        attribute_data = dict()
+        attribute_layer_slices = dict()
+        layer_count = len(layers)
+        for attribute in attributes:
+            # Quad data and integer attributes are discrete, so they take the value of the nearest quad or vertex.
+            values = get_terrain_info_attribute_array(attribute, x_size, y_size)
+            if attribute.domain == 'FACE':
+                attribute_data[attribute.name] = resample_quad_grid(values, shape)
+            elif attribute.data_type in {'INT', 'BOOLEAN'}:
+                attribute_data[attribute.name] = resample_grid(values, shape, 'NEAREST').astype(values.dtype)
+            else:
+                values = values.reshape((y_size, x_size, -1))
+                attribute_layer_slices[attribute.name] = slice(layer_count, layer_count + values.shape[2])
+                layer_count += values.shape[2]
+                layers.append(values)
+
+        layer_data = resample_grid(numpy.concatenate(layers, axis=2), shape, self.filter)
+        heightmap = layer_data[:, :, 0]
+        for layer_index, name in enumerate(vertex_group_data.keys(), start=1):
+            # Bicubic interpolation can overshoot the valid range of the weights.
+            vertex_group_data[name] = numpy.clip(layer_data[:, :, layer_index], 0.0, 1.0)
+        for attribute in attributes:
+            if attribute.name not in attribute_layer_slices:
+                continue
+            values = layer_data[:, :, attribute_layer_slices[attribute.name]]
+            if attribute.data_type == 'BYTE_COLOR':
+                values = numpy.clip(values, 0.0, 1.0)
+            attribute_data[attribute.name] = values
 
-        heightmap = get_terrain_heightmap(terrain_info_object, should_quantize=False)
-        
-        vertex_group_data = dict()
-
-        vertex_count = len(mesh_data_old.vertices)
-        for vertex_group in terrain_info_object.vertex_groups:
-            weights = numpy.zeros(len(mesh_data_old.vertices), dtype=numpy.float32)
-            # TODO: This is MASSIVELY inefficient but as far as I can tell there's no way to just dump out
-            #  a nice flat list of indexed vertex weights.
-            for i in range(vertex_count):
-                try:
-                    weights[i] = vertex_group.weight(i)
-                except RuntimeError:
-                    continue
-            weights = weights.reshape((terrain_info.x_size, terrain_info.x_size))
-            vertex_group_data[vertex_group.name] = weights
+        material_indices = resample_quad_grid(
+            get_terrain_info_quad_material_indices(mesh_data_old, x_size, y_size), shape)
+        edge_turns = resample_quad_grid(get_terrain_info_quad_edge_turns(mesh_data_old, x_size, y_size), shape)
 
-        # TODO: Turn this into a resampling operation, then there's no difference between upscaling or downscaling.
-        # Extract out every attribute that is on the current heightmap.
-        if step < 1:
-            self.report({'WARNING'}, 'Upscaling is not yet supported')
-            return {'CANCELLED'}
-        else:
-            # Downscaling
-            # Delete every second row and column starting at index 1.
-            # Alternatively, make a copy using the indices to use for each axis.
-            heightmap = heightmap[::step,::step]
-            for name, data in vertex_group_data.items():
-                vertex_group_data[name] = data[::step,::step]
-    
-        # Get heightmap and from existing terrain info. Edge turn information will be LOST.
-        mesh_data = create_terrain_info_mesh(resolution, terrain_info.terrain_scale * resolution * step, heightmap.flatten())
+        mesh_data = create_terrain_info_mesh(resolution, size, heightmap.flatten(),
+                                             encode_quad_bitmap(edge_turns.ravel(), resolution, resolution))
         terrain_info_object.data = mesh_data
         terrain_info.x_size = resolution
         terrain_info.y_size = resolution
+        terrain_info.terrain_scale = size / resolution
 
-        # Restore the materials.
+        # Restore the materials and the terrain holes.
         for material in mesh_data_old.materials:
             mesh_data.materials.append(material)
+        set_terrain_info_quad_material_indices(mesh_data, material_indices)
+
+        # Restore the attributes.
+        for attribute in attributes:
+            attribute_new = mesh_data.attributes.new(attribute.name, attribute.data_type, attribute.domain)
+            set_terrain_info_attribute_array(attribute_new, attribute_data[attribute.name])
 
         # Add the new vertex group info.
-        for name, weights in vertex_group_data.items():
-            vertex_group: VertexGroup = terrain_info_object.vertex_groups.new(name=name)
-            weights = weights.flatten()
-            for index, weight in enumerate(weights):
-                if weight != 0.0:
-                    vertex_group.add([index], weight, 'REPLACE')
-        
+        set_vertex_group_weights(context, terrain_info_object, vertex_group_data)
+
+        # The paint layer UVs depend on the terrain scale.
+        build_terrain_material(terrain_info_object)
+
         # All terrain info modifiers need to be recreated since the dimensions have changed.
         ensure_terrain_info_modifiers(context, terrain_info)
 
@@ -1337,13 +1302,10 @@ class BDK_OT_terrain_info_scale_set(Operator):
         terrain_info = get_terrain_info(context.active_object)
 
         # TODO: this isn't tested yet!
-        xy_coordinates_iter = get_terrain_info_vertex_xy_coordinates(terrain_info.x_size, self.terrain_scale)
-
         mesh_data = cast(Mesh, context.active_object.data)
-        for vertex in mesh_data.vertices:
-            x, y = next(xy_coordinates_iter)
-            vertex.co.x = x
-            vertex.co.y = y
+        heights = get_terrain_info_heights(mesh_data, terrain_info.x_size, terrain_info.y_size)
+        set_terrain_info_vertex_coordinates_array(
+            mesh_data, get_terrain_info_vertex_coordinates(terrain_info.x_size, self.terrain_scale, heights))
 
         terrain_info.terrain_scale = self.terrain_scale
 
@@ -1389,7 +1351,8 @@ class BDK_OT_terrain_info_heightmap_import(Operator):
                     image.scale(terrain_info.x_size, terrain_info.y_size)
 
                 # Extract the heightmap data from the image.
-                data = numpy.array(image.pixels)
+                data = numpy.zeros(len(image.pixels), dtype=numpy.float32)
+                image.pixels.foreach_get(data)
 
                 # Get the red channel of each pixel, then convert it to a 2D array.
                 heightmap = data[::4].reshape((terrain_info.x_size, terrain_info.y_size))
@@ -1418,8 +1381,7 @@ class BDK_OT_terrain_info_heightmap_import(Operator):
 
         # Apply the heightmap to the mesh.
         mesh_data = cast(Mesh, context.active_object.data)
-        for (vertex, z) in zip(mesh_data.vertices, heightmap.flat):
-            vertex.co.z = z * self.terrain_scale_z * 256.0
+        set_terrain_info_heights(mesh_data, heightmap * self.terrain_scale_z * 256.0)
 
         return {'FINISHED'}
 
@@ -0,0 +1,116 @@
+"""
+Resampling of terrain grids (e.g., heightmaps, paint layer weights and quad data) to a different resolution.
+
+The terrain keeps its size when it is resampled, so vertex `i` of the resampled grid lies at vertex
+`i * source_size / target_size` of the source grid. Vertex data is resampled separably with a (target, source) weight
+matrix for each axis, so any number of layers can be resampled in a single pair of matrix products. Quad data (e.g.,
+holes and edge turns) is discrete, so it is always resampled by taking the nearest quad.
+"""
+
+import numpy as np
+
+
+resample_filter_items = (
+    ('NEAREST', 'Nearest', 'Use the value of the nearest vertex'),
+    ('BILINEAR', 'Bilinear', 'Interpolate linearly between the 4 nearest vertices'),
+    ('BICUBIC', 'Bicubic', 'Interpolate with a cubic spline through the 16 nearest vertices. This is smoother than '
+                           'bilinear, but can overshoot the range of the source values'),
+    ('AREA', 'Area', 'Average the vertices covered by each resampled vertex. This is best suited to downscaling'),
+)
+
+
+def get_resample_source_coordinates(source_size: int, target_size: int) -> np.ndarray:
+    """
+    Returns the position of each target vertex in the source grid, in units of source vertices.
+    """
+    return np.arange(target_size, dtype=np.float64) * (source_size / target_size)
+
+
+def _get_cubic_weights(t: np.ndarray) -> np.ndarray:
+    """
+    Returns the weights of the 4 vertices surrounding each position for the Keys cubic convolution kernel (a = -0.5),
+    where `t` is the offset of the position from the second vertex.
+    """
+    a = -0.5
+    distances = np.abs(t[:, np.newaxis] - np.arange(-1, 3))
+    return np.where(distances <= 1.0,
+                    ((a + 2.0) * distances - (a + 3.0)) * distances * distances + 1.0,
+                    ((a * distances - 5.0 * a) * distances + 8.0 * a) * distances - 4.0 * a)
+
+
+def get_resample_weights(source_size: int, target_size: int, filter: str) -> np.ndarray:
+    """
+    Returns the (target_size, source_size) matrix of the weight of each source vertex for each target vertex along one
+    axis. Positions beyond the edges of the source grid take the value of the edge. The weights of each target vertex
+    sum to 1.
+    """
+    # Positions beyond the last source vertex (when upscaling) take the value of the last source vertex.
+    coordinates = np.minimum(get_resample_source_coordinates(source_size, target_size), source_size - 1)
+    weights = np.zeros((target_size, source_size), dtype=np.float64)
+    rows = np.arange(target_size)
+
+    match filter:
+        case 'NEAREST':
+            indices = np.clip(np.floor(coordinates + 0.5).astype(int), 0, source_size - 1)
+            weights[rows, indices] = 1.0
+        case 'BILINEAR':
+            indices = np.floor(coordinates).astype(int)
+            t = coordinates - indices
+            np.add.at(weights, (rows, np.clip(indices, 0, source_size - 1)), 1.0 - t)
+            np.add.at(weights, (rows, np.clip(indices + 1, 0, source_size - 1)), t)
+        case 'BICUBIC':
+            indices = np.floor(coordinates).astype(int)
+            kernel_weights = _get_cubic_weights(coordinates - indices)
+            for offset in range(4):
+                np.add.at(weights, (rows, np.clip(indices + offset - 1, 0, source_size - 1)), kernel_weights[:, offset])
+        case 'AREA':
+            # Each source vertex covers the unit interval around it, and each target vertex covers an interval of the
+            # width of a target quad around its position. The weights are the overlap of the intervals, clipped to
+            # the extent of the source grid.
+            extent = source_size / target_size
+            source_centers = np.arange(source_size, dtype=np.float64)
+            lower = np.maximum(coordinates - extent / 2, -0.5)[:, np.newaxis]
+            upper = np.minimum(coordinates + extent / 2, source_size - 0.5)[:, np.newaxis]
+            weights = np.clip(np.minimum(upper, source_centers + 0.5) - np.maximum(lower, source_centers - 0.5),
+                              0.0, None)
+            weights /= weights.sum(axis=1, keepdims=True)
+        case _:
+            raise ValueError(f'Unknown resample filter: {filter}')
+
+    return weights
+
+
+def resample_grid(values: np.ndarray, shape: tuple[int, int], filter: str) -> np.ndarray:
+    """
+    Resamples a (y_size, x_size) grid to the given (y_size, x_size) shape. Any trailing axes (e.g., the components of
+    color attributes or a stack of layers) are resampled independently.
+    """
+    source_shape = values.shape[:2]
+    y_weights = get_resample_weights(source_shape[0], shape[0], filter)
+    x_weights = get_resample_weights(source_shape[1], shape[1], filter)
+    values = np.asarray(values, dtype=np.float64)
+    # (y, x, ...) -> (Y, x, ...) -> (Y, ..., X) -> (Y, X, ...)
+    values = np.tensordot(y_weights, values, axes=(1, 0))
+    values = np.tensordot(values, x_weights, axes=(1, 1))
+    return np.moveaxis(values, -1, 1)
+
+
+def get_quad_resample_indices(source_size: int, target_size: int) -> np.ndarray:
+    """
+    Returns the index of the nearest source quad for each target quad along one axis, where the sizes are the number
+    of vertices.
+    """
+    # The center of target quad `i` lies at `i + 0.5` target vertices, so the quad that contains it in the source grid
+    # is the floor of its position in source vertices.
+    centers = (np.arange(target_size - 1, dtype=np.float64) + 0.5) * (source_size / target_size)
+    return np.clip(np.floor(centers).astype(int), 0, source_size - 2)
+
+
+def resample_quad_grid(values: np.ndarray, shape: tuple[int, int]) -> np.ndarray:
+    """
+    Resamples a (y_size - 1, x_size - 1) grid of quad data to the quads of a grid of the given (y_size, x_size) shape,
+    taking the value of the nearest quad.
+    """
+    y_indices = get_quad_resample_indices(values.shape[0] + 1, shape[0])
+    x_indices = get_quad_resample_indices(values.shape[1] + 1, shape[1])
+    return values[y_indices][:, x_indices]
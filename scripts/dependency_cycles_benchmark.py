@@ -0,0 +1,110 @@
+"""
+Breaks the cycles of synthetic package dependency graphs by condensing their strongly connected components and by
+removing the edges of every cycle found by `networkx.simple_cycles` (the original approach), measuring the time each
+takes. Each graph is made of clusters of packages that depend on each other at random, where the clusters themselves
+only depend on earlier clusters, like the packages of a game that reference each other within a mod or an episode.
+
+Enumerating the cycles is exponential in the worst case, so it is stopped after `--timeout` seconds.
+
+This does not need Blender.
+
+Usage:
+    python scripts/dependency_cycles_benchmark.py [--packages 10000] [--cluster-sizes 8 20 50] [--timeout 30] [--seed 0]
+"""
+
+import argparse
+import random
+import sys
+import time
+import types
+from pathlib import Path
+
+import networkx
+
+_repository_directory = Path(__file__).resolve().parent.parent
+
+# The `__init__` of the add-on registers it with Blender, so the package is created without running it.
+_package = types.ModuleType('bdk_addon')
+_package.__path__ = [str(_repository_directory / 'bdk_addon')]
+sys.modules['bdk_addon'] = _package
+
+from bdk_addon.bdk.repository.scheduler import condense_dependency_cycles
+
+
+def generate_dependency_graph(rng: random.Random, package_count: int, cluster_size: int) -> networkx.DiGraph:
+    """
+    Returns a graph of packages in clusters of `cluster_size`. Each package depends on about two packages in its own
+    cluster (which forms cycles) and on about four packages in earlier clusters.
+    """
+    graph = networkx.DiGraph()
+    graph.add_nodes_from(f'PACKAGE{index}' for index in range(package_count))
+    for index in range(package_count):
+        cluster_start = index - index % cluster_size
+        cluster_end = min(cluster_start + cluster_size, package_count)
+        for _ in range(2):
+            dependency = rng.randrange(cluster_start, cluster_end)
+            if dependency != index:
+                graph.add_edge(f'PACKAGE{index}', f'PACKAGE{dependency}')
+        if cluster_start > 0:
+            for _ in range(4):
+                graph.add_edge(f'PACKAGE{index}', f'PACKAGE{rng.randrange(cluster_start)}')
+    return graph
+
+
+def remove_cycle_edges(graph: networkx.DiGraph, timeout: float) -> int | None:
+    """
+    Removes the edges of every cycle in the graph, as the dependency graph used to be made acyclic, and returns the
+    number of cycles, or None if enumerating the cycles took longer than `timeout` seconds.
+    """
+    start_time = time.perf_counter()
+    cycles = []
+    for cycle in networkx.simple_cycles(graph):
+        cycles.append(cycle)
+        if len(cycles) % 10000 == 0 and time.perf_counter() - start_time > timeout:
+            print(f'    simple_cycles stopped after {len(cycles)} cycles')
+            return None
+    edges = set()
+    for cycle in cycles:
+        edges |= set([(cycle[i], cycle[i + 1]) for i in range(len(cycle) - 1)] + [(cycle[-1], cycle[0])])
+    for u, v in edges:
+        graph.remove_edge(u, v)
+    return len(cycles)
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--packages', type=int, default=10000)
+    parser.add_argument('--cluster-sizes', type=int, nargs='+', default=[8, 20, 50])
+    parser.add_argument('--timeout', type=float, default=30.0, help='The time limit of enumerating the cycles')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    failures = []
+    for cluster_size in args.cluster_sizes:
+        graph = generate_dependency_graph(random.Random(args.seed), args.packages, cluster_size)
+        print(f'{args.packages} packages in clusters of {cluster_size}, {graph.number_of_edges()} edges')
+
+        condensed_graph = graph.copy()
+        condense_time = time.perf_counter()
+        cycles = condense_dependency_cycles(condensed_graph)
+        condense_time = time.perf_counter() - condense_time
+        if not networkx.is_directed_acyclic_graph(condensed_graph):
+            failures.append(f'Clusters of {cluster_size}: the condensed graph has cycles')
+        print(f'  Condensation:  {condense_time:.2f}s ({len(cycles)} groups of packages that depend on each other)')
+
+        simple_cycles_time = time.perf_counter()
+        cycle_count = remove_cycle_edges(graph.copy(), args.timeout)
+        simple_cycles_time = time.perf_counter() - simple_cycles_time
+        if cycle_count is None:
+            print(f'  simple_cycles: >{args.timeout:.0f}s')
+        else:
+            print(f'  simple_cycles: {simple_cycles_time:.2f}s ({cycle_count} cycles)')
+
+    for failure in failures:
+        print(failure)
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,299 @@
+"""
+Checks that materials animated from the shared scene time take the same values as materials animated with drivers, and
+measures the frame change latency of a scene as the number of animated materials grows, in both modes.
+
+Usage:
+    blender --background --factory-startup --python scripts/material_animation_benchmark.py -- \
+        [--max-material-count 400] [--frame-count 48]
+"""
+
+import argparse
+import math
+import sys
+import time
+from pathlib import Path
+
+import bpy
+import addon_utils
+from bpy.types import Material, NodeSocket, NodeTree, Object
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+addon_utils.enable('bdk_addon', default_set=True)
+
+from bdk_addon.data import UReference, URotator, UColor
+from bdk_addon.material.data import UMaterial, UConstantColor, UFadeColor, EColorFadeType, UTexOscillator, \
+    ETexOscillationType, UTexPanner, UTexRotator, ETexRotationType, UVariableTexPanner
+from bdk_addon.material.importer import MaterialBuilder
+
+
+class InMemoryMaterialBuilder(MaterialBuilder):
+    """
+    A material builder that loads the materials that a material references from a dictionary instead of from the
+    material caches of a repository.
+    """
+    def __init__(self, materials: dict[UReference, UMaterial], node_tree: NodeTree, use_shared_time: bool):
+        super().__init__([], node_tree, use_shared_time=use_shared_time)
+        self._materials = materials
+
+    def load_material(self, reference: UReference | None):
+        return self._materials.get(reference, None) if reference is not None else None
+
+
+def get_parity_materials() -> list[UMaterial]:
+    """
+    Returns a material for each kind of animation that has a shared time equivalent.
+    """
+    constant_color = UConstantColor(UReference('Benchmark', 'Color', 'ConstantColor'))
+    constant_color.Color = UColor(255, 128, 0, 255)
+
+    tex_panner = UTexPanner(UReference('Benchmark', 'Panner', 'TexPanner'))
+    tex_panner.PanDirection = URotator(yaw=8192)
+    tex_panner.PanRate = 0.35
+    tex_panner.Material = constant_color.Reference
+
+    variable_tex_panner = UVariableTexPanner(UReference('Benchmark', 'VariablePanner', 'VariableTexPanner'))
+    variable_tex_panner.PanDirection = URotator(yaw=16384)
+    variable_tex_panner.PanRate = -0.6
+    variable_tex_panner.Material = constant_color.Reference
+
+    pan_oscillator = UTexOscillator(UReference('Benchmark', 'PanOscillator', 'TexOscillator'))
+    pan_oscillator.UOscillationRate = 0.5
+    pan_oscillator.UOscillationAmplitude = 0.25
+    pan_oscillator.VOscillationRate = 1.5
+    pan_oscillator.VOscillationAmplitude = -0.1
+    pan_oscillator.Material = constant_color.Reference
+
+    stretch_oscillator = UTexOscillator(UReference('Benchmark', 'StretchOscillator', 'TexOscillator'))
+    stretch_oscillator.UOscillationType = ETexOscillationType.OT_Stretch
+    stretch_oscillator.UOscillationRate = 0.2
+    stretch_oscillator.UOscillationAmplitude = 0.5
+    stretch_oscillator.VOscillationRate = 0.7
+    stretch_oscillator.VOscillationAmplitude = 0.3
+    stretch_oscillator.Material = constant_color.Reference
+
+    constant_rotator = UTexRotator(UReference('Benchmark', 'ConstantRotator', 'TexRotator'))
+    constant_rotator.TexRotationType = ETexRotationType.TR_ConstantlyRotating
+    constant_rotator.Rotation = URotator(pitch=4096, yaw=-2048)
+    constant_rotator.Material = constant_color.Reference
+
+    oscillating_rotator = UTexRotator(UReference('Benchmark', 'OscillatingRotator', 'TexRotator'))
+    oscillating_rotator.TexRotationType = ETexRotationType.TR_OscillatingRotation
+    oscillating_rotator.OscillationRate = URotator(pitch=16384, roll=8192)
+    oscillating_rotator.OscillationAmplitude = URotator(pitch=4096, roll=2048)
+    oscillating_rotator.Material = constant_color.Reference
+
+    linear_fade_color = UFadeColor(UReference('Benchmark', 'LinearFade', 'FadeColor'))
+    linear_fade_color.ColorFadeType = EColorFadeType.FC_Linear
+    linear_fade_color.Color1 = UColor(255, 0, 0, 255)
+    linear_fade_color.Color2 = UColor(0, 0, 255, 128)
+    linear_fade_color.FadePeriod = 1.5
+    linear_fade_color.FadeOffset = 0.25
+
+    sinusoidal_fade_color = UFadeColor(UReference('Benchmark', 'SinusoidalFade', 'FadeColor'))
+    sinusoidal_fade_color.ColorFadeType = EColorFadeType.FC_Sinusoidal
+    sinusoidal_fade_color.Color1 = UColor(255, 0, 0, 255)
+    sinusoidal_fade_color.Color2 = UColor(0, 255, 0, 0)
+    sinusoidal_fade_color.FadePeriod = 2.5
+    sinusoidal_fade_color.FadeOffset = 0.75
+
+    return [constant_color, tex_panner, variable_tex_panner, pan_oscillator, stretch_oscillator, constant_rotator,
+            oscillating_rotator, linear_fade_color, sinusoidal_fade_color]
+
+
+def create_animated_material_object(name: str, material: UMaterial, materials: dict[UReference, UMaterial],
+                                    use_shared_time: bool) -> Object:
+    """
+    Creates an object in the scene that uses a new Blender material built from the material.
+    """
+    blender_material = bpy.data.materials.new(name)
+    blender_material.use_nodes = True
+    node_tree = blender_material.node_tree
+    node_tree.nodes.clear()
+    tex_coord_node = node_tree.nodes.new('ShaderNodeTexCoord')
+    InMemoryMaterialBuilder(materials, node_tree, use_shared_time).build(
+        material, uv_source_socket=tex_coord_node.outputs['UV'])
+    mesh_data = bpy.data.meshes.new(name)
+    mesh_data.materials.append(blender_material)
+    obj = bpy.data.objects.new(name, mesh_data)
+    bpy.context.scene.collection.objects.link(obj)
+    return obj
+
+
+def remove_animated_material_objects(objects: list[Object]):
+    for obj in objects:
+        mesh_data = obj.data
+        materials = list(mesh_data.materials)
+        bpy.data.objects.remove(obj)
+        bpy.data.meshes.remove(mesh_data)
+        for material in materials:
+            bpy.data.materials.remove(material)
+
+
+def _ping_pong(value: float, scale: float) -> float:
+    if scale == 0.0:
+        return 0.0
+    value = (value - scale) / (scale * 2.0)
+    return abs((value - math.floor(value)) * scale * 2.0 - scale)
+
+
+_math_operations = {
+    'ADD': lambda a, b: a + b,
+    'MULTIPLY': lambda a, b: a * b,
+    'DIVIDE': lambda a, b: a / b if b != 0.0 else 0.0,
+    'SINE': lambda a, _: math.sin(a),
+    'COSINE': lambda a, _: math.cos(a),
+    'PINGPONG': _ping_pong,
+}
+
+
+def get_socket_value(socket: NodeSocket) -> tuple[float, ...] | None:
+    """
+    Returns the value of a socket as seen by the node it belongs to, evaluating the constant and math nodes (including
+    the shared scene time node group) that feed it. Returns None for values that come from the geometry (e.g., UVs).
+    """
+    if not socket.is_output:
+        if socket.is_linked:
+            return get_socket_value(socket.links[0].from_socket)
+        if not hasattr(socket, 'default_value'):
+            return None
+        value = socket.default_value
+        return tuple(value) if hasattr(value, '__len__') else (value,)
+
+    node = socket.node
+    match node.bl_idname:
+        case 'ShaderNodeValue' | 'ShaderNodeRGB':
+            value = socket.default_value
+            return tuple(value) if hasattr(value, '__len__') else (value,)
+        case 'ShaderNodeGroup':
+            output_node = next(node for node in node.node_tree.nodes if node.bl_idname == 'NodeGroupOutput')
+            return get_socket_value(output_node.inputs[socket.name])
+        case 'ShaderNodeMath':
+            a, b = get_socket_value(node.inputs[0]), get_socket_value(node.inputs[1])
+            if a is None or b is None:
+                return None
+            return (_math_operations[node.operation](a[0], b[0]),)
+        case 'ShaderNodeCombineXYZ':
+            values = [get_socket_value(node_input) for node_input in node.inputs]
+            if any(value is None for value in values):
+                return None
+            return tuple(value[0] for value in values)
+        case _:
+            return None
+
+
+def get_node_input_values(node_tree: NodeTree) -> dict[tuple[str, str], tuple[float, ...]]:
+    """
+    Returns the values of the inputs of the nodes of a material, keyed by the node name and the input identifier.
+    """
+    values = {}
+    for node in node_tree.nodes:
+        for node_input in node.inputs:
+            value = get_socket_value(node_input)
+            if value is not None:
+                values[(node.name, node_input.identifier)] = value
+    return values
+
+
+def check_shared_time_parity(frames: list[int]) -> list[str]:
+    """
+    Builds each of the parity materials with drivers and with the shared scene time, and compares the values of the
+    inputs of the nodes that both have at each of the frames.
+    """
+    scene = bpy.context.scene
+    materials = get_parity_materials()
+    materials_by_reference = {material.Reference: material for material in materials}
+    failures = []
+
+    for material in materials[1:]:
+        name = material.Reference.object_name
+        driver_object = create_animated_material_object(f'{name}_Drivers', material, materials_by_reference, False)
+        shared_time_object = create_animated_material_object(f'{name}_SharedTime', material, materials_by_reference,
+                                                             True)
+        driver_node_tree = driver_object.data.materials[0].node_tree
+        shared_time_node_tree = shared_time_object.data.materials[0].node_tree
+
+        if driver_node_tree.animation_data is None or len(driver_node_tree.animation_data.drivers) == 0:
+            failures.append(f'{name}: the driver material is not animated')
+        if shared_time_node_tree.animation_data is not None and len(shared_time_node_tree.animation_data.drivers) > 0:
+            failures.append(f'{name}: the shared time material has drivers')
+
+        frame_values = []
+        compared_input_count = 0
+        for frame in frames:
+            scene.frame_set(frame)
+            driver_values = get_node_input_values(driver_node_tree)
+            shared_time_values = get_node_input_values(shared_time_node_tree)
+            frame_values.append(driver_values)
+            keys = driver_values.keys() & shared_time_values.keys()
+            compared_input_count = len(keys)
+            for key in sorted(keys):
+                if not all(math.isclose(a, b, rel_tol=1e-4, abs_tol=1e-5)
+                           for a, b in zip(driver_values[key], shared_time_values[key])):
+                    failures.append(f'{name}: {key[0]} input {key[1]} is {driver_values[key]} with drivers and '
+                                    f'{shared_time_values[key]} with shared time at frame {frame}')
+
+        # Make sure that the animation was actually evaluated, or the comparison would be trivial.
+        if all(values == frame_values[0] for values in frame_values[1:]):
+            failures.append(f'{name}: the driver values do not change between frames')
+
+        print(f'{name}: compared {compared_input_count} node inputs at {len(frames)} frames')
+
+        remove_animated_material_objects([driver_object, shared_time_object])
+
+    return failures
+
+
+def benchmark_frame_change(material_count: int, frame_count: int, use_shared_time: bool) -> float:
+    """
+    Returns the average time in milliseconds that a frame change takes with the number of animated materials.
+    """
+    scene = bpy.context.scene
+    objects = []
+    for index in range(material_count):
+        tex_panner = UTexPanner(UReference('Benchmark', f'Panner{index}', 'TexPanner'))
+        tex_panner.PanRate = 0.01 * (index + 1)
+        objects.append(create_animated_material_object(f'BDK_Benchmark_{index}', tex_panner, {}, use_shared_time))
+
+    frame_time = time.perf_counter()
+    for frame in range(frame_count):
+        scene.frame_set(frame + 1)
+    frame_time = (time.perf_counter() - frame_time) / frame_count * 1000.0
+
+    remove_animated_material_objects(objects)
+
+    return frame_time
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--max-material-count', type=int, default=400)
+    parser.add_argument('--frame-count', type=int, default=48)
+    args = parser.parse_args(argv)
+
+    # The driver expressions read the frame rate from the scene, so they are only evaluated when scripts are allowed to
+    # run automatically.
+    bpy.context.preferences.filepaths.use_scripts_auto_execute = True
+
+    failures = check_shared_time_parity([1, 13, 37, 120, 1001])
+
+    material_counts = []
+    material_count = 25
+    while material_count < args.max_material_count:
+        material_counts.append(material_count)
+        material_count *= 2
+    material_counts.append(args.max_material_count)
+
+    print('Materials  Drivers (ms/frame)  Shared Time (ms/frame)')
+    for material_count in material_counts:
+        driver_frame_time = benchmark_frame_change(material_count, args.frame_count, False)
+        shared_time_frame_time = benchmark_frame_change(material_count, args.frame_count, True)
+        print(f'{material_count:>9}  {driver_frame_time:>18.3f}  {shared_time_frame_time:>22.3f}')
+
+    for failure in failures:
+        print(failure)
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else sys.argv[1:]))
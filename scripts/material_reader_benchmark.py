@@ -0,0 +1,127 @@
+"""
+Reads a corpus of materials with the precompiled property decoders and with the original reader, checking that they
+decode the same values and measuring the number of materials each decodes per second, both for decoding alone and for
+`read_material` as a whole (i.e., including reading and parsing the files). The corpus is every .props.txt file of a
+known material type in the given directories (e.g., the exports directory of a repository), or randomly generated
+materials of every type if no directories are given.
+
+This does not need Blender.
+
+Usage:
+    python scripts/material_reader_benchmark.py [directory ...] [--count 5000] [--seed 0]
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+import types
+import typing
+from pathlib import Path
+from typing import get_type_hints
+
+_repository_directory = Path(__file__).resolve().parent.parent
+
+# The `__init__` of the add-on registers it with Blender, so the package is created without running it.
+_package = types.ModuleType('bdk_addon')
+_package.__path__ = [str(_repository_directory / 'bdk_addon')]
+sys.modules['bdk_addon'] = _package
+sys.path.insert(0, str(_repository_directory / 'tests'))
+
+from bdk_addon.convert_props_txt_to_json import parse_props_txt_file_content
+from bdk_addon.data import UReference
+from bdk_addon.material.data import MaterialTypeRegistry
+from bdk_addon.material.reader import read_material, decode_material_properties
+
+import material_reader
+
+
+def get_corpus(directories: list[str], count: int, seed: int, temporary_directory: Path) -> list[Path]:
+    """
+    Returns the paths of the materials in the corpus, generating them in the temporary directory if no directories are
+    given.
+    """
+    if directories:
+        return [path for directory in directories for path in sorted(Path(directory).rglob('*.props.txt'))
+                if MaterialTypeRegistry.get_type_from_string(path.parent.name) is not None]
+    rng = random.Random(seed)
+    type_strings = sorted(MaterialTypeRegistry._material_type_map.keys())
+    paths = []
+    for index in range(count):
+        type_string = type_strings[index % len(type_strings)]
+        path = temporary_directory / 'Generated' / type_string / f'Material{index}.props.txt'
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(material_reader.generate_material_content(
+            rng, MaterialTypeRegistry.get_type_from_string(type_string)))
+        paths.append(path)
+    return paths
+
+
+def measure_decoding(decode_function, corpus: list[tuple[type, UReference, dict]]) -> float:
+    """
+    Returns the time that it takes to create and decode every material in the corpus from its parsed properties.
+    """
+    decode_time = time.perf_counter()
+    for material_type, reference, properties in corpus:
+        decode_function(material_type(reference), properties)
+    return time.perf_counter() - decode_time
+
+
+def measure_reading(read_function, paths: list[Path]) -> tuple[list, float]:
+    """
+    Returns the materials read from each path and the time that reading them took.
+    """
+    read_time = time.perf_counter()
+    materials = [read_function(str(path)) for path in paths]
+    return materials, time.perf_counter() - read_time
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('directories', nargs='*')
+    parser.add_argument('--count', type=int, default=5000, help='The number of materials to generate')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        paths = get_corpus(args.directories, args.count, args.seed, Path(temporary_directory))
+
+        corpus = []
+        for path in paths:
+            material_type = MaterialTypeRegistry.get_type_from_string(path.parent.name)
+            corpus.append((material_type, UReference.from_path(path), parse_props_txt_file_content(path.read_text())))
+
+        # The decoders are compiled on first use, which is not measured.
+        measure_decoding(decode_material_properties, corpus[:len(MaterialTypeRegistry._material_type_map)])
+
+        reference_decode_time = measure_decoding(material_reader.decode_material_properties, corpus)
+        decode_time = measure_decoding(decode_material_properties, corpus)
+        reference_materials, reference_read_time = measure_reading(material_reader.read_material, paths)
+        materials, read_time = measure_reading(read_material, paths)
+
+    # The original reader did not read array properties, so only the other properties are compared.
+    mismatches = []
+    for path, material, reference_material in zip(paths, materials, reference_materials):
+        array_names = {name for name, property_type in get_type_hints(type(material)).items()
+                       if typing.get_origin(property_type) == list}
+        values = material_reader.get_material_values(material)
+        reference_values = material_reader.get_material_values(reference_material)
+        if any(values[name] != reference_values[name] for name in values if name not in array_names):
+            mismatches.append(path)
+
+    count = len(paths)
+    print(f'{count} materials')
+    print(f'Decoding:      original {count / reference_decode_time:,.0f}/s, '
+          f'precompiled {count / decode_time:,.0f}/s ({reference_decode_time / decode_time:.1f}x)')
+    print(f'read_material: original {count / reference_read_time:,.0f}/s, '
+          f'precompiled {count / read_time:,.0f}/s ({reference_read_time / read_time:.1f}x)')
+
+    for path in mismatches:
+        print(f'Mismatch: {path}')
+
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
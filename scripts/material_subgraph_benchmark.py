@@ -0,0 +1,272 @@
+"""
+Builds materials whose subgraphs are referenced more than once (e.g., a texture used by several inputs of a Shader, or
+Combiners whose inputs share a modifier stack) with and without reusing the subgraphs that have already been built. It
+checks that both node trees compute the same outputs, and measures the node count and build time of each.
+
+Usage:
+    blender --background --factory-startup --python scripts/material_subgraph_benchmark.py -- [--max-depth 6]
+"""
+
+import argparse
+import hashlib
+import sys
+import time
+from pathlib import Path
+
+import bpy
+import addon_utils
+from bpy.types import NodeSocket, NodeTree
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+addon_utils.enable('bdk_addon', default_set=True)
+
+from bdk_addon.data import UReference, URotator, UColor
+from bdk_addon.material.data import UMaterial, UTexture, UShader, UCombiner, EColorOperation, EAlphaOperation, \
+    UTexPanner, UTexRotator, ETexRotationType, UTexScaler, UFinalBlend, UConstantColor, UColorModifier
+from bdk_addon.material.importer import MaterialBuilder, MaterialSocketInputs, MaterialSocketOutputs
+
+
+class InMemoryMaterialBuilder(MaterialBuilder):
+    """
+    A material builder that loads the materials that a material references from a dictionary, and uses blank images
+    for textures, instead of loading them from the material caches of a repository. The reuse of subgraphs that have
+    already been built can be turned off to compare against building every reference from scratch.
+
+    The UV sockets that the inputs are left with after each material is built are recorded, keyed by the position of
+    the material in the tree of materials that were built, since the importers can change the inputs that they are given
+    and some importers go on to use them.
+    """
+    def __init__(self, materials: dict[UReference, UMaterial], node_tree: NodeTree, use_subgraph_reuse: bool):
+        super().__init__([], node_tree)
+        self._materials = materials
+        self._use_subgraph_reuse = use_subgraph_reuse
+        self._path: tuple[int, ...] = ()
+        self._child_counts = [0]
+        self.input_sockets: dict[tuple[int, ...], tuple[NodeSocket | None, NodeSocket | None]] = {}
+
+    def load_material(self, reference: UReference | None):
+        return self._materials.get(reference, None) if reference is not None else None
+
+    def _load_image(self, reference: UReference):
+        image = bpy.data.images.get(str(reference), None)
+        if image is None:
+            image = bpy.data.images.new(str(reference), 4, 4, alpha=True)
+        return image
+
+    def _import_material(self, material: UMaterial, inputs: MaterialSocketInputs) -> MaterialSocketOutputs | None:
+        if not self._use_subgraph_reuse:
+            self._subgraphs.clear()
+        path = self._path + (self._child_counts[-1],)
+        self._child_counts[-1] += 1
+        self._path = path
+        self._child_counts.append(0)
+        try:
+            outputs = super()._import_material(material, inputs)
+        finally:
+            self._child_counts.pop()
+            self._path = path[:-1]
+        self.input_sockets[path] = (inputs.uv_source_socket, inputs.uv_socket)
+        return outputs
+
+
+def _create_texture(name: str) -> UTexture:
+    texture = UTexture(UReference('Benchmark', name, 'Texture'))
+    texture.bMasked = True
+    texture.UClamp = 256
+    texture.VClamp = 128
+    return texture
+
+
+def get_shader_materials() -> tuple[UMaterial, list[UMaterial]]:
+    """
+    Returns a Shader that uses the same modifier stack on a texture for its diffuse, opacity, specular and specularity
+    mask, and all the materials that it references.
+    """
+    texture = _create_texture('ShaderTexture')
+    tex_panner = UTexPanner(UReference('Benchmark', 'ShaderPanner', 'TexPanner'))
+    tex_panner.PanRate = 0.25
+    tex_panner.Material = texture.Reference
+    tex_scaler = UTexScaler(UReference('Benchmark', 'ShaderScaler', 'TexScaler'))
+    tex_scaler.UScale = 2.0
+    tex_scaler.VScale = 0.5
+    tex_scaler.UOffset = 16.0
+    tex_scaler.Material = tex_panner.Reference
+    shader = UShader(UReference('Benchmark', 'Shader', 'Shader'))
+    shader.Diffuse = tex_scaler.Reference
+    shader.Opacity = tex_scaler.Reference
+    shader.Specular = tex_scaler.Reference
+    shader.SpecularityMask = texture.Reference
+    final_blend = UFinalBlend(UReference('Benchmark', 'ShaderFinalBlend', 'FinalBlend'))
+    final_blend.Material = shader.Reference
+    return final_blend, [texture, tex_panner, tex_scaler, shader, final_blend]
+
+
+def get_combiner_materials(depth: int) -> tuple[UMaterial, list[UMaterial]]:
+    """
+    Returns a chain of Combiners of the given depth, where each Combiner uses the Combiner below it for both of its
+    materials (and, at every other level, its mask), and all the materials that it references. At the bottom of the
+    chain, the materials of the Combiner are a texture under a rotator and the same texture under a panner, so the
+    texture is built under two different UV sockets.
+    """
+    texture = _create_texture('CombinerTexture')
+    tex_panner = UTexPanner(UReference('Benchmark', 'CombinerPanner', 'TexPanner'))
+    tex_panner.PanRate = 0.5
+    tex_panner.Material = texture.Reference
+    tex_rotator = UTexRotator(UReference('Benchmark', 'CombinerRotator', 'TexRotator'))
+    tex_rotator.TexRotationType = ETexRotationType.TR_ConstantlyRotating
+    tex_rotator.Rotation = URotator(yaw=4096)
+    tex_rotator.UOffset = 64.0
+    tex_rotator.Material = texture.Reference
+    color_modifier = UColorModifier(UReference('Benchmark', 'CombinerColorModifier', 'ColorModifier'))
+    color_modifier.Color = UColor(255, 128, 64, 255)
+    color_modifier.Material = tex_panner.Reference
+    constant_color = UConstantColor(UReference('Benchmark', 'CombinerConstantColor', 'ConstantColor'))
+    constant_color.Color = UColor(32, 64, 128, 255)
+    materials = [texture, tex_panner, tex_rotator, color_modifier, constant_color]
+
+    operations = [
+        (EColorOperation.CO_AlphaBlend_With_Mask, EAlphaOperation.AO_Multiply),
+        (EColorOperation.CO_Multiply, EAlphaOperation.AO_Use_Mask),
+        (EColorOperation.CO_Add, EAlphaOperation.AO_Use_Alpha_From_Material2),
+        (EColorOperation.CO_Add_With_Mask_Modulation, EAlphaOperation.AO_Use_Alpha_From_Material1),
+    ]
+    material1, material2 = tex_rotator, color_modifier
+    for level in range(depth):
+        combiner = UCombiner(UReference('Benchmark', f'Combiner{depth}_{level}', 'Combiner'))
+        combiner.CombineOperation, combiner.AlphaOperation = operations[level % len(operations)]
+        combiner.Material1 = material1.Reference
+        combiner.Material2 = material2.Reference
+        combiner.Mask = (material2 if level % 2 == 0 else constant_color).Reference
+        materials.append(combiner)
+        material1 = material2 = combiner
+
+    return material1, materials
+
+
+def _get_value_key(value) -> str:
+    if hasattr(value, '__len__') and not isinstance(value, str):
+        return repr(tuple(round(component, 6) for component in value))
+    return repr(round(value, 6) if isinstance(value, float) else value)
+
+
+def get_socket_hash(socket: NodeSocket, drivers: dict[int, list[tuple[int, str]]], hashes: dict[int, str]) -> str:
+    """
+    Returns a hash of the function that an output socket computes: the type and properties of its node, the values of
+    the unlinked inputs (including their driver expressions) and, recursively, the hashes of the linked inputs. Two
+    sockets have the same hash if expanding the nodes that feed them into trees gives identical trees, so a subgraph
+    that is shared hashes the same as separate copies of it.
+    """
+    key = socket.as_pointer()
+    if key in hashes:
+        return hashes[key]
+    node = socket.node
+    parts = [node.bl_idname, socket.identifier]
+    for node_property in node.bl_rna.properties:
+        if node_property.identifier in _base_node_property_identifiers or node_property.type == 'COLLECTION':
+            continue
+        value = getattr(node, node_property.identifier)
+        if node_property.type == 'POINTER':
+            value = getattr(value, 'name', None)
+        parts.append(f'{node_property.identifier}={_get_value_key(value)}')
+    for node_input in node.inputs:
+        if node_input.is_linked:
+            input_hash = get_socket_hash(node_input.links[0].from_socket, drivers, hashes)
+            parts.append(f'{node_input.identifier}<-{input_hash}')
+        elif hasattr(node_input, 'default_value'):
+            parts.append(f'{node_input.identifier}={_get_value_key(node_input.default_value)}')
+            parts.extend(f'{node_input.identifier}[{index}]:={expression}'
+                         for index, expression in sorted(drivers.get(node_input.as_pointer(), [])))
+    hashes[key] = hashlib.sha1('|'.join(parts).encode()).hexdigest()
+    return hashes[key]
+
+
+def get_socket_drivers(node_tree: NodeTree) -> dict[int, list[tuple[int, str]]]:
+    """
+    Returns the driver expressions of the inputs of the nodes, keyed by the socket.
+    """
+    drivers = {}
+    if node_tree.animation_data is not None:
+        for fcurve in node_tree.animation_data.drivers:
+            socket = node_tree.path_resolve(fcurve.data_path.rsplit('.', 1)[0])
+            drivers.setdefault(socket.as_pointer(), []).append((fcurve.array_index, fcurve.driver.expression))
+    return drivers
+
+
+def get_outputs_hash(node_tree: NodeTree, outputs: MaterialSocketOutputs) -> str:
+    drivers = get_socket_drivers(node_tree)
+    hashes = {}
+    parts = [outputs.blend_method, repr(outputs.use_backface_culling), repr(tuple(outputs.size))]
+    for socket in (outputs.color_socket, outputs.alpha_socket):
+        parts.append(get_socket_hash(socket, drivers, hashes) if socket is not None else 'None')
+    return '|'.join(parts)
+
+
+def build_material(material: UMaterial, materials: list[UMaterial], use_subgraph_reuse: bool) \
+        -> tuple[int, int, float, str, dict[tuple[int, ...], str]]:
+    """
+    Builds the material in a new node tree, and returns its node count, the number of reused subgraphs, the build time,
+    the hash of its outputs and the hashes of the UV sockets that the inputs were left with after each material was
+    built.
+    """
+    blender_material = bpy.data.materials.new(str(material.Reference))
+    if blender_material.node_tree is None:
+        blender_material.use_nodes = True
+    node_tree = blender_material.node_tree
+    node_tree.nodes.clear()
+    tex_coord_node = node_tree.nodes.new('ShaderNodeTexCoord')
+    material_builder = InMemoryMaterialBuilder({material.Reference: material for material in materials}, node_tree,
+                                               use_subgraph_reuse)
+    build_time = time.perf_counter()
+    outputs = material_builder.build(material, uv_source_socket=tex_coord_node.outputs['UV'])
+    build_time = time.perf_counter() - build_time
+    drivers = get_socket_drivers(node_tree)
+    hashes = {}
+    input_socket_hashes = {
+        path: '|'.join(get_socket_hash(socket, drivers, hashes) if socket is not None else 'None' for socket in sockets)
+        for path, sockets in material_builder.input_sockets.items()
+    }
+    result = len(node_tree.nodes), material_builder.reused_subgraph_count, build_time, \
+        get_outputs_hash(node_tree, outputs), input_socket_hashes
+    bpy.data.materials.remove(blender_material)
+    return result
+
+
+_base_node_property_identifiers: set[str] = set()
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--max-depth', type=int, default=6)
+    args = parser.parse_args(argv)
+
+    _base_node_property_identifiers.update(node_property.identifier
+                                           for node_property in bpy.types.ShaderNode.bl_rna.properties)
+
+    cases = [('Shader', *get_shader_materials())]
+    cases += [(f'Combiner depth {depth}', *get_combiner_materials(depth)) for depth in range(1, args.max_depth + 1)]
+
+    failures = []
+    print('Node counts and build times are without/with subgraph reuse.')
+    print(f'{"Material":<18}  {"Nodes":>13}  {"Reused":>6}  {"Build Time (ms)":>19}')
+    for name, material, materials in cases:
+        node_count, _, build_time, outputs_hash, input_socket_hashes = build_material(material, materials, False)
+        reuse_node_count, reused_subgraph_count, reuse_build_time, reuse_outputs_hash, reuse_input_socket_hashes = \
+            build_material(material, materials, True)
+        if outputs_hash != reuse_outputs_hash:
+            failures.append(f'{name}: the outputs differ when subgraphs are reused')
+        # Reusing a subgraph skips building the materials under it, so only the materials that were built (or reused)
+        # in both are compared.
+        if any(input_socket_hashes.get(path, None) != socket_hash
+               for path, socket_hash in reuse_input_socket_hashes.items()):
+            failures.append(f'{name}: the inputs are left with different UV sockets when subgraphs are reused')
+        print(f'{name:<18}  {node_count:>6}/{reuse_node_count:<6}  {reused_subgraph_count:>6}  '
+              f'{build_time * 1000.0:>9.1f}/{reuse_build_time * 1000.0:<9.1f}')
+
+    for failure in failures:
+        print(failure)
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else sys.argv[1:]))
@@ -0,0 +1,93 @@
+"""
+Looks up the .blend files of the packages in a synthetic asset library with the package .blend file index and with a
+recursive glob (which is how `get_blend_file_for_package` used to find them), checking that they find the same files
+and measuring the time each takes.
+
+Usage:
+    blender --background --factory-startup --python scripts/package_blend_file_index_benchmark.py -- [--packages 5000]
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import bpy
+import addon_utils
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+addon_utils.enable('bdk_addon', default_set=True)
+
+from bdk_addon.helpers import get_package_blend_file_index
+
+
+def create_asset_library(directory: Path, package_count: int, rng: random.Random) -> list[str]:
+    """
+    Creates an asset library of empty .blend files in a few subdirectories, along with a build log for each package,
+    and returns the package names.
+    """
+    package_names = []
+    for index in range(package_count):
+        package_name = f'Package{index}'
+        package_directory = directory / rng.choice(['', 'Textures', 'StaticMeshes', 'Maps/Episode1', 'Maps/Episode2'])
+        (package_directory / 'logs').mkdir(parents=True, exist_ok=True)
+        (package_directory / f'{package_name}.blend').touch()
+        (package_directory / 'logs' / f'{package_name}.log').touch()
+        package_names.append(package_name)
+    return package_names
+
+
+def get_blend_file_with_glob(directory: Path, package_name: str) -> str | None:
+    blend_files = [fp for fp in directory.glob(f'**/{package_name}.blend') if fp.is_file()]
+    if len(blend_files) > 0:
+        return str(blend_files[0])
+    return None
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--packages', type=int, default=5000)
+    parser.add_argument('--lookups', type=int, default=200, help='The number of lookups to measure with the glob')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        directory = Path(temporary_directory) / 'assets'
+        package_names = create_asset_library(directory, args.packages, rng)
+        lookup_package_names = [rng.choice(package_names) for _ in range(args.lookups)] + ['Missing']
+
+        glob_time = time.perf_counter()
+        glob_results = [get_blend_file_with_glob(directory, package_name) for package_name in lookup_package_names]
+        glob_time = time.perf_counter() - glob_time
+
+        build_time = time.perf_counter()
+        get_package_blend_file_index(directory)
+        build_time = time.perf_counter() - build_time
+
+        # Every lookup checks whether the index is stale, as `get_blend_file_for_package` does.
+        lookup_time = time.perf_counter()
+        index_results = [get_package_blend_file_index(directory).get(package_name)
+                         for package_name in lookup_package_names]
+        lookup_time = time.perf_counter() - lookup_time
+
+    mismatches = [package_name for package_name, glob_result, index_result
+                  in zip(lookup_package_names, glob_results, index_results) if glob_result != index_result]
+
+    lookup_count = len(lookup_package_names)
+    print(f'{args.packages} packages, {lookup_count} lookups')
+    print(f'Glob:  {glob_time / lookup_count * 1000.0:.2f} ms per lookup')
+    print(f'Index: {build_time * 1000.0:.1f} ms to build, then {lookup_time / lookup_count * 1e6:.1f} us per lookup '
+          f'({glob_time / lookup_time:.0f}x)')
+
+    for package_name in mismatches:
+        print(f'Mismatch: {package_name}')
+
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else sys.argv[1:]))
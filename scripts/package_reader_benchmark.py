@@ -0,0 +1,90 @@
+"""
+Reads the dependencies of a corpus of Unreal packages with the memory-mapped reader and with the original reader,
+checking that they find the same dependencies and measuring the time each takes. The corpus is every package in the
+given directories (e.g., the System, Textures and StaticMeshes directories of a game), or randomly generated package
+headers if no directories are given.
+
+This does not need Blender.
+
+Usage:
+    python scripts/package_reader_benchmark.py [directory ...] [--count 2000] [--seed 0]
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+import types
+from pathlib import Path
+
+_repository_directory = Path(__file__).resolve().parent.parent
+
+# The `__init__` of the add-on registers it with Blender, so the package is created without running it.
+_package = types.ModuleType('bdk_addon')
+_package.__path__ = [str(_repository_directory / 'bdk_addon')]
+sys.modules['bdk_addon'] = _package
+sys.path.insert(0, str(_repository_directory / 'tests'))
+
+from bdk_addon.package.reader import read_package_dependencies
+
+import package_reader
+
+_package_suffixes = {'.u', '.uax', '.ukx', '.unr', '.usx', '.utx', '.rom', '.ut2', '.uz2'}
+
+
+def read_corpus(read_function, paths: list[Path]) -> tuple[list[set[str] | type], float]:
+    """
+    Returns the result of reading each package in the corpus (or the type of the exception raised) and the total time
+    that reading took.
+    """
+    results = []
+    read_time = time.perf_counter()
+    for path in paths:
+        try:
+            results.append(read_function(str(path)))
+        except Exception as error:
+            results.append(type(error))
+    return results, time.perf_counter() - read_time
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('directories', nargs='*')
+    parser.add_argument('--count', type=int, default=2000, help='The number of packages to generate')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        if args.directories:
+            paths = [path for directory in args.directories for path in sorted(Path(directory).rglob('*'))
+                     if path.suffix.lower() in _package_suffixes]
+        else:
+            rng = random.Random(args.seed)
+            paths = [package_reader.generate_package(rng, Path(temporary_directory) / f'Generated{index}.u')
+                     for index in range(args.count)]
+        size = sum(path.stat().st_size for path in paths)
+
+        # Read every package once beforehand, so that both readers are measured with the files in the page cache.
+        read_corpus(lambda path: Path(path).read_bytes(), paths)
+
+        reference_results, reference_time = read_corpus(package_reader.read_package_dependencies, paths)
+        results, read_time = read_corpus(read_package_dependencies, paths)
+
+    mismatches = [path for path, result, reference_result in zip(paths, results, reference_results)
+                  if result != reference_result]
+    error_count = sum(1 for result in results if not isinstance(result, set))
+
+    print(f'{len(paths)} packages, {size / 1024 ** 2:.1f} MiB, {error_count} failed to read')
+    print(f'Original:      {reference_time:.3f}s ({len(paths) / reference_time:.0f} packages/s)')
+    print(f'Memory-mapped: {read_time:.3f}s ({len(paths) / read_time:.0f} packages/s, '
+          f'{reference_time / read_time:.1f}x)')
+
+    for path in mismatches:
+        print(f'Mismatch: {path}')
+
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
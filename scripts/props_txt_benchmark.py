@@ -0,0 +1,120 @@
+"""
+Parses a corpus of props.txt files with the single-pass parser and with the original parser, checking that they produce
+the same results and measuring the time each takes. The corpus is every .props.txt file in the given directories (e.g.,
+the exports directory of a repository), or randomly generated content if no directories are given.
+
+This does not need Blender.
+
+Usage:
+    python scripts/props_txt_benchmark.py [directory ...] [--count 2000] [--lines 0] [--seed 0]
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+import types
+from pathlib import Path
+
+_repository_directory = Path(__file__).resolve().parent.parent
+
+# The `__init__` of the add-on registers it with Blender, so the package is created without running it.
+_package = types.ModuleType('bdk_addon')
+_package.__path__ = [str(_repository_directory / 'bdk_addon')]
+sys.modules['bdk_addon'] = _package
+sys.path.insert(0, str(_repository_directory / 'tests'))
+
+from bdk_addon.convert_props_txt_to_json import parse_props_txt_file_content
+
+import props_txt
+
+
+def generate_content(rng: random.Random, line_count: int) -> str:
+    """
+    Generates props.txt content of at least `line_count` lines by joining generated content that parses, so that the
+    parsers are measured on large files rather than on how quickly they reject malformed ones.
+    """
+    contents = []
+    total_line_count = 0
+    while total_line_count < line_count:
+        content = props_txt.generate_props_txt_content(rng).replace('\r\n', '\n')
+        try:
+            parse_props_txt_file_content(content)
+        except ValueError:
+            continue
+        contents.append(content)
+        total_line_count += content.count('\n') + 1
+    return '\n'.join(contents)
+
+
+def get_corpus(directories: list[str], count: int, line_count: int, seed: int) -> list[tuple[str, str]]:
+    """
+    Returns the name and content of each props.txt file in the corpus.
+    """
+    if not directories:
+        rng = random.Random(seed)
+        if line_count > 0:
+            return [(f'generated {index}', generate_content(rng, line_count)) for index in range(count)]
+        return [(f'generated {index}', props_txt.generate_props_txt_content(rng)) for index in range(count)]
+    corpus = []
+    for directory in directories:
+        for path in sorted(Path(directory).rglob('*.props.txt')):
+            with open(path, 'r') as file:
+                corpus.append((str(path), file.read()))
+    return corpus
+
+
+def parse_corpus(parse_function, corpus: list[tuple[str, str]]) -> tuple[list[str | type], float]:
+    """
+    Returns the result of parsing each file in the corpus as JSON (or the type of the exception raised) and the total
+    time that parsing took.
+    """
+    results = []
+    total_time = 0.0
+    for _, content in corpus:
+        parse_time = time.perf_counter()
+        try:
+            data = parse_function(content)
+        except Exception as error:
+            total_time += time.perf_counter() - parse_time
+            results.append(type(error))
+            continue
+        total_time += time.perf_counter() - parse_time
+        results.append(json.dumps(data))
+    return results, total_time
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('directories', nargs='*')
+    parser.add_argument('--count', type=int, default=2000, help='The number of files to generate')
+    parser.add_argument('--lines', type=int, default=0,
+                        help='The minimum number of lines of each generated file that parses (by default, each '
+                             'generated file is a single random block, which may be malformed)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    corpus = get_corpus(args.directories, args.count, args.lines, args.seed)
+    size = sum(len(content) for _, content in corpus)
+
+    reference_results, reference_time = parse_corpus(props_txt.parse_props_txt_file_content, corpus)
+    results, parse_time = parse_corpus(parse_props_txt_file_content, corpus)
+
+    mismatches = [name for (name, _), result, reference_result in zip(corpus, results, reference_results)
+                  if result != reference_result]
+    error_count = sum(1 for result in results if not isinstance(result, str))
+
+    line_count = sum(content.count('\n') + 1 for _, content in corpus)
+    print(f'{len(corpus)} files, {line_count} lines, {size / 1024:.1f} KiB, {error_count} rejected by both parsers')
+    print(f'Original:    {reference_time:.3f}s')
+    print(f'Single-pass: {parse_time:.3f}s ({reference_time / parse_time:.1f}x)')
+
+    for name in mismatches:
+        print(f'Mismatch: {name}')
+
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
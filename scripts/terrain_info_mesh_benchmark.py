@@ -0,0 +1,68 @@
+"""
+Measures the time it takes to create terrain info meshes with `create_terrain_info_mesh` and one element at a time with
+BMesh (which is how terrain info meshes used to be created) for increasing resolutions. That both create identical
+meshes is checked by `tests/test_terrain_info_mesh.py`.
+
+Usage:
+    blender --background --factory-startup --python scripts/terrain_info_mesh_benchmark.py -- [--max-resolution 1024]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import bpy
+import addon_utils
+import numpy
+
+_repository_directory = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(_repository_directory))
+sys.path.insert(0, str(_repository_directory / 'tests'))
+addon_utils.enable('bdk_addon', default_set=True)
+
+from bdk_addon.terrain.builder import create_terrain_info_mesh
+
+import terrain_info_mesh
+
+
+def get_benchmark_resolutions(max_resolution: int) -> list[int]:
+    resolutions = [2, 9]
+    resolution = 128
+    while resolution < max_resolution:
+        resolutions.append(resolution)
+        resolution *= 2
+    resolutions.append(max_resolution)
+    return resolutions
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--max-resolution', type=int, default=1024)
+    args = parser.parse_args(argv)
+
+    random = numpy.random.default_rng(0)
+
+    for resolution in get_benchmark_resolutions(args.max_resolution):
+        size = resolution * 512.0
+        heightmap = random.uniform(-4096.0, 4096.0, resolution * resolution)
+        edge_turn_bitmap = random.integers(0, 1 << 32, (resolution * resolution + 31) // 32, dtype=numpy.int64)
+
+        creation_time = time.perf_counter()
+        mesh_data = create_terrain_info_mesh(resolution, size, heightmap, edge_turn_bitmap)
+        creation_time = time.perf_counter() - creation_time
+
+        bmesh_creation_time = time.perf_counter()
+        bmesh_mesh_data = terrain_info_mesh.create_terrain_info_mesh(resolution, size, heightmap, edge_turn_bitmap)
+        bmesh_creation_time = time.perf_counter() - bmesh_creation_time
+
+        print(f'{resolution}x{resolution}: {creation_time:.3f}s (BMesh: {bmesh_creation_time:.3f}s, '
+              f'{bmesh_creation_time / creation_time:.0f}x)')
+
+        bpy.data.meshes.remove(mesh_data)
+        bpy.data.meshes.remove(bmesh_mesh_data)
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else sys.argv[1:]))
@@ -0,0 +1,122 @@
+"""
+Measures the time it takes to shift, duplicate a paint node of, set the scale of and import a heightmap into terrain
+infos of increasing resolution.
+
+Usage:
+    blender --background --factory-startup --python scripts/terrain_info_operators_benchmark.py -- \
+        [--max-resolution 1024]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import cast
+
+import bpy
+import addon_utils
+import numpy
+from bpy.types import Mesh, Object
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+addon_utils.enable('bdk_addon', default_set=True)
+
+from bdk_addon.helpers import get_terrain_info, set_vertex_group_weights
+from bdk_addon.io.g16 import write_bmp_g16
+from bdk_addon.terrain.builder import create_terrain_info_object
+
+
+def get_benchmark_resolutions(max_resolution: int) -> list[int]:
+    resolutions = []
+    resolution = 128
+    while resolution < max_resolution:
+        resolutions.append(resolution)
+        resolution *= 2
+    resolutions.append(max_resolution)
+    return resolutions
+
+
+def create_benchmark_terrain_info_object(resolution: int, terrain_scale: float,
+                                         random: numpy.random.Generator) -> Object:
+    """
+    Creates a terrain info with a random heightmap and a paint layer that has a paint node with random weights.
+    """
+    vertex_count = resolution * resolution
+    terrain_info_object = create_terrain_info_object('TerrainInfoBenchmark', resolution, resolution * terrain_scale,
+                                                     random.uniform(-4096.0, 4096.0, vertex_count))
+    bpy.context.scene.collection.objects.link(terrain_info_object)
+    bpy.context.view_layer.objects.active = terrain_info_object
+
+    bpy.ops.bdk.terrain_paint_layer_add()
+    bpy.ops.bdk.terrain_paint_layer_nodes_add(type='PAINT')
+
+    paint_node = get_terrain_info(terrain_info_object).paint_layers[0].nodes[0]
+    set_vertex_group_weights(bpy.context, terrain_info_object,
+                             {paint_node.id: random.uniform(0.0, 1.0, vertex_count)})
+
+    return terrain_info_object
+
+
+def remove_terrain_info_object(terrain_info_object: Object):
+    mesh_data = terrain_info_object.data
+    node_trees = [modifier.node_group for modifier in terrain_info_object.modifiers
+                  if modifier.type == 'NODES' and modifier.node_group is not None]
+    bpy.data.objects.remove(terrain_info_object)
+    bpy.data.meshes.remove(mesh_data)
+    for node_tree in node_trees:
+        bpy.data.node_groups.remove(node_tree)
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--max-resolution', type=int, default=1024)
+    args = parser.parse_args(argv)
+
+    random = numpy.random.default_rng(0)
+    terrain_scale = 64.0
+    failures = []
+
+    with tempfile.TemporaryDirectory() as directory:
+        for resolution in get_benchmark_resolutions(args.max_resolution):
+            terrain_info_object = create_benchmark_terrain_info_object(resolution, terrain_scale, random)
+            terrain_info = get_terrain_info(terrain_info_object)
+
+            heightmap_path = os.path.join(directory, f'{resolution}.bmp')
+            write_bmp_g16(heightmap_path, random.integers(0, 65536, (resolution, resolution), dtype=numpy.uint16))
+
+            timings = []
+            for name, function in (
+                    ('Shift', lambda: bpy.ops.bdk.terrain_info_shift(
+                        x_distance=resolution // 3 * terrain_scale, y_distance=-resolution // 5 * terrain_scale,
+                        data_types={'HEIGHTMAP', 'QUAD_TESSELATION', 'TERRAIN_HOLES', 'ATTRIBUTES',
+                                    'PAINT_LAYERS'})),
+                    ('Duplicate Paint Node', lambda: bpy.ops.bdk.terrain_paint_layer_node_duplicate()),
+                    ('Set Scale', lambda: bpy.ops.bdk.terrain_info_scale_set(terrain_scale=terrain_scale * 2.0)),
+                    ('Import Heightmap', lambda: bpy.ops.bdk.terrain_info_heightmap_import(filepath=heightmap_path))):
+                operator_time = time.perf_counter()
+                result = function()
+                timings.append(f'{name}: {time.perf_counter() - operator_time:.3f}s')
+                if result != {'FINISHED'}:
+                    failures.append(f'{resolution}x{resolution}: {name} returned {result}')
+
+            if len(terrain_info.paint_layers[0].nodes) != 2:
+                failures.append(f'{resolution}x{resolution}: the paint node was not duplicated')
+            if not numpy.isclose(terrain_info.terrain_scale, terrain_scale * 2.0):
+                failures.append(f'{resolution}x{resolution}: the terrain scale was not set')
+            if cast(Mesh, terrain_info_object.data).validate():
+                failures.append(f'{resolution}x{resolution}: mesh is invalid')
+
+            print(f'{resolution}x{resolution}: {", ".join(timings)}')
+
+            remove_terrain_info_object(terrain_info_object)
+
+    for failure in failures:
+        print(failure)
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else sys.argv[1:]))
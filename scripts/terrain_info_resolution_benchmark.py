@@ -0,0 +1,145 @@
+"""
+Sets the resolution of a terrain info to a target resolution and back with each resampling filter, measuring the time
+each takes, and checks that the heightmap, paint and deco layer nodes, holes and edge turns survive the round trip.
+
+Usage:
+    blender --background --factory-startup --python scripts/terrain_info_resolution_benchmark.py -- \
+        [--source-resolution 256] [--target-resolution 1024]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import cast
+
+import bpy
+import addon_utils
+import numpy
+from bpy.types import Mesh, Object
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+addon_utils.enable('bdk_addon', default_set=True)
+
+from bdk_addon.helpers import get_terrain_info, get_vertex_group_weights, set_vertex_group_weights
+from bdk_addon.terrain.arrays import get_terrain_info_heights, get_terrain_info_attribute_array, \
+    set_terrain_info_attribute_array, get_terrain_info_quad_material_indices, set_terrain_info_quad_material_indices, \
+    get_terrain_info_quad_edge_turns
+from bdk_addon.terrain.builder import create_terrain_info_object
+from bdk_addon.terrain.resample import resample_filter_items
+
+
+def create_benchmark_terrain_info_object(resolution: int, random: numpy.random.Generator) -> Object:
+    """
+    Creates a terrain info with a random heightmap, holes and edge turns, and a paint layer and a deco layer that each
+    have a paint node and a field node with random values.
+    """
+    vertex_count = resolution * resolution
+    terrain_info_object = create_terrain_info_object(
+        'TerrainInfoBenchmark', resolution, resolution * 64.0, random.uniform(-4096.0, 4096.0, vertex_count),
+        random.integers(0, 1 << 32, (vertex_count + 31) // 32, dtype=numpy.int64))
+    bpy.context.scene.collection.objects.link(terrain_info_object)
+    bpy.context.view_layer.objects.active = terrain_info_object
+    mesh_data = cast(Mesh, terrain_info_object.data)
+    set_terrain_info_quad_material_indices(mesh_data, random.integers(0, 2, (resolution - 1, resolution - 1)))
+
+    bpy.ops.bdk.terrain_paint_layer_add()
+    bpy.ops.bdk.terrain_paint_layer_nodes_add(type='PAINT')
+    bpy.ops.bdk.terrain_paint_layer_nodes_add(type='FIELD')
+    bpy.ops.bdk.terrain_deco_layer_add()
+    bpy.ops.bdk.terrain_deco_layer_nodes_add(type='PAINT')
+    bpy.ops.bdk.terrain_deco_layer_nodes_add(type='FIELD')
+
+    terrain_info = get_terrain_info(terrain_info_object)
+    nodes = [*terrain_info.paint_layers[0].nodes, *terrain_info.deco_layers[0].nodes]
+    weights = {node.id: random.uniform(0.0, 1.0, vertex_count) for node in nodes if node.type == 'PAINT'}
+    set_vertex_group_weights(bpy.context, terrain_info_object, weights)
+    for node in nodes:
+        if node.type == 'FIELD':
+            set_terrain_info_attribute_array(mesh_data.attributes[node.id], random.uniform(0.0, 1.0, vertex_count))
+
+    return terrain_info_object
+
+
+def get_terrain_info_data(terrain_info_object: Object) -> dict[str, numpy.ndarray]:
+    terrain_info = get_terrain_info(terrain_info_object)
+    mesh_data = cast(Mesh, terrain_info_object.data)
+    x_size, y_size = terrain_info.x_size, terrain_info.y_size
+    data = {
+        'heights': get_terrain_info_heights(mesh_data, x_size, y_size),
+        'holes': get_terrain_info_quad_material_indices(mesh_data, x_size, y_size),
+        'edge turns': get_terrain_info_quad_edge_turns(mesh_data, x_size, y_size),
+    }
+    nodes = [*terrain_info.paint_layers[0].nodes, *terrain_info.deco_layers[0].nodes]
+    vertex_group_names = [node.id for node in nodes if node.type == 'PAINT']
+    for name, weights in get_vertex_group_weights(bpy.context, terrain_info_object, vertex_group_names).items():
+        data[f'paint node {name}'] = weights
+    for node in nodes:
+        if node.type == 'FIELD':
+            data[f'field node {node.id}'] = get_terrain_info_attribute_array(mesh_data.attributes[node.id], x_size,
+                                                                             y_size)
+    return data
+
+
+def remove_terrain_info_object(terrain_info_object: Object):
+    terrain_info = get_terrain_info(terrain_info_object)
+    for deco_layer in terrain_info.deco_layers:
+        bpy.data.objects.remove(deco_layer.object)
+    mesh_data = terrain_info_object.data
+    node_trees = [modifier.node_group for modifier in terrain_info_object.modifiers
+                  if modifier.type == 'NODES' and modifier.node_group is not None]
+    bpy.data.objects.remove(terrain_info_object)
+    bpy.data.meshes.remove(mesh_data)
+    for node_tree in node_trees:
+        bpy.data.node_groups.remove(node_tree)
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--source-resolution', type=int, default=256)
+    parser.add_argument('--target-resolution', type=int, default=1024)
+    args = parser.parse_args(argv)
+
+    random = numpy.random.default_rng(0)
+    failures = []
+
+    for filter, _, _ in resample_filter_items:
+        terrain_info_object = create_benchmark_terrain_info_object(args.source_resolution, random)
+        terrain_info = get_terrain_info(terrain_info_object)
+        source_data = get_terrain_info_data(terrain_info_object)
+        size = terrain_info.terrain_scale * terrain_info.x_size
+
+        timings = []
+        for resolution in (args.target_resolution, args.source_resolution):
+            operator_time = time.perf_counter()
+            bpy.ops.bdk.terrain_info_resolution_set(resolution=str(resolution), filter=filter)
+            timings.append(f'{resolution}: {time.perf_counter() - operator_time:.3f}s')
+
+            mesh_data = cast(Mesh, terrain_info_object.data)
+            if terrain_info.x_size != resolution or len(mesh_data.vertices) != resolution * resolution:
+                failures.append(f'{filter}: terrain info does not have a resolution of {resolution}')
+            if not numpy.isclose(terrain_info.terrain_scale * resolution, size):
+                failures.append(f'{filter}: terrain size changed to {terrain_info.terrain_scale * resolution}')
+            if mesh_data.validate():
+                failures.append(f'{filter}: mesh is invalid at a resolution of {resolution}')
+
+        # Quad data always survives the round trip, and so does vertex data except with the area filter.
+        round_trip_data = get_terrain_info_data(terrain_info_object)
+        for name, values in source_data.items():
+            if filter == 'AREA' and name not in {'holes', 'edge turns'}:
+                continue
+            if not numpy.allclose(round_trip_data[name], values, atol=1e-5):
+                failures.append(f'{filter}: round trip does not reproduce the terrain {name}')
+
+        print(f'{filter} {args.source_resolution}x{args.source_resolution}: {", ".join(timings)}')
+
+        remove_terrain_info_object(terrain_info_object)
+
+    for failure in failures:
+        print(failure)
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else sys.argv[1:]))
@@ -0,0 +1,26 @@
+import sys
+import types
+from pathlib import Path
+
+_repository_directory = Path(__file__).parent.parent
+
+try:
+    import bpy
+except ImportError:
+    bpy = None
+
+if bpy is not None:
+    # Register the add-on, since many of its modules depend on its property groups.
+    import addon_utils
+
+    def _raise_error(error: Exception):
+        raise error
+
+    sys.path.insert(0, str(_repository_directory))
+    addon_utils.enable('bdk_addon', default_set=True, handle_error=_raise_error)
+elif 'bdk_addon' not in sys.modules:
+    # The `__init__` of the add-on registers it with Blender, so the package is created without running it. This allows
+    # the modules that do not depend on `bpy` to be tested outside of Blender.
+    package = types.ModuleType('bdk_addon')
+    package.__path__ = [str(_repository_directory / 'bdk_addon')]
+    sys.modules['bdk_addon'] = package
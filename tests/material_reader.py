@@ -0,0 +1,163 @@
+"""
+Helpers for testing the material reader in `bdk_addon.material.reader`.
+
+`transform_value` and `read_material` are the original reader, kept verbatim as a reference, since the precompiled
+decoders must decode every property that it handled to the same values. `decode_material_properties` is the decoding
+loop of the original `read_material`, so that decoding can be measured on its own. `generate_material_content`
+generates random props.txt content for a material type, in the format that umodel exports.
+"""
+
+import enum
+import random
+import typing
+from pathlib import Path
+from typing import get_type_hints, Any
+from bdk_addon.convert_props_txt_to_json import parse_props_txt_file_content
+from bdk_addon.data import UReference, URotator, UColor
+from bdk_addon.material.data import UMaterial, MaterialTypeRegistry
+
+
+def transform_value(property_type: type, value: Any) -> typing.Any | None:
+    # TODO: this function is a catastrophe and needs to be reworked.
+    if property_type == int:
+        return int(value)
+    elif property_type == bool:
+        return bool(value)
+    elif property_type == float:
+        return float(value)
+    elif property_type == str:
+        return value
+    elif property_type.__class__ == enum.EnumMeta:
+        return property_type[str(value).split(' ')[0]]
+    elif property_type.__class__ == typing._UnionGenericAlias and len(property_type.__args__) == 2 and \
+            property_type.__args__[1] == type(None):
+        if value is None:
+            return None
+        return transform_value(property_type.__args__[0], value)
+    elif property_type == URotator:
+        rotator = URotator()
+        rotator.Roll = value['Roll']
+        rotator.Pitch = value['Pitch']
+        rotator.Yaw = value['Yaw']
+        return rotator
+    elif property_type == UReference | None:
+        if value is None:
+            return None
+        return UReference.from_string(value)
+    elif property_type == UColor:
+        return UColor(r=value['R'], g=value['G'], b=value['B'], a=value['A'])
+    else:
+        raise RuntimeError(f'Unhandled type: {property_type}')
+
+
+def read_material(path: str) -> UMaterial:
+    # We are assuming that the file structure is laid out as it is by default in umodel exports.
+    type_string = Path(path).parts[-2]
+    material_type = MaterialTypeRegistry.get_type_from_string(type_string)
+
+    if material_type is None:
+        raise ValueError(f'Unhandled material type: {type_string}')
+
+    if not issubclass(material_type, UMaterial):
+        raise TypeError(f'{material_type} is not a subclass of UMaterial')
+
+    # Read the .props.txt file into a property dictionary
+    with open(path, 'r') as file:
+        properties = parse_props_txt_file_content(file.read())
+        reference = UReference.from_path(Path(path))
+        material = material_type(reference)
+        material_type_hints = get_type_hints(type(material))
+
+        for name, value in properties.items():
+            try:
+                property_type = material_type_hints[name]
+                value = transform_value(property_type, value)
+                setattr(material, name, value)
+            except KeyError:
+                continue
+
+        return material
+
+
+def decode_material_properties(material: UMaterial, properties: dict[str, Any]):
+    material_type_hints = get_type_hints(type(material))
+    for name, value in properties.items():
+        try:
+            property_type = material_type_hints[name]
+            value = transform_value(property_type, value)
+            setattr(material, name, value)
+        except KeyError:
+            continue
+
+
+def _generate_reference(rng: random.Random) -> str:
+    if rng.random() < 0.1:
+        return 'None'
+    type_name = rng.choice(['Texture', 'Shader', 'Combiner', 'TexPanner', 'FinalBlend'])
+    group = rng.choice(['', 'Group.', 'Group.SubGroup.'])
+    return f"{type_name}'Package{rng.randrange(20)}.{group}Name{rng.randrange(1000)}'"
+
+
+def _generate_value(rng: random.Random, property_type: Any) -> str:
+    if property_type == bool:
+        return rng.choice(['true', 'false', 'True', 'False'])
+    elif property_type == int:
+        return str(rng.randrange(-1000, 1000))
+    elif property_type == float:
+        return rng.choice([f'{rng.uniform(-100.0, 100.0):.6f}', str(rng.randrange(-10, 10))])
+    elif property_type == URotator:
+        return f'{{ Pitch={rng.randrange(-65536, 65536)}, Yaw={rng.randrange(-65536, 65536)}, ' \
+               f'Roll={rng.randrange(-65536, 65536)} }}'
+    elif property_type == UColor:
+        return f'{{ R={rng.randrange(256)}, G={rng.randrange(256)}, B={rng.randrange(256)}, A={rng.randrange(256)} }}'
+    elif property_type in (UReference, UReference | None):
+        return _generate_reference(rng)
+    elif isinstance(property_type, enum.EnumMeta):
+        member = rng.choice(list(property_type))
+        return f'{member.name} ({list(property_type).index(member)})'
+    raise ValueError(f'Cannot generate a value of type {property_type}')
+
+
+def generate_material_content(rng: random.Random, material_type: type) -> str:
+    """
+    Returns random props.txt content for the material type. Most of the properties of the type are written, in a random
+    order, along with some properties that the type does not have. Array properties are written either as a block that
+    contains all the elements or as one property per element.
+    """
+    lines = []
+    type_hints = [(name, property_type) for name, property_type in get_type_hints(material_type).items()
+                  if name != 'Reference']
+    rng.shuffle(type_hints)
+    for name, property_type in type_hints:
+        if rng.random() < 0.2:
+            continue
+        if typing.get_origin(property_type) == list:
+            count = rng.randrange(1, 6)
+            if rng.random() < 0.5:
+                lines.append(f'{name}[{count}] =')
+                lines.append('{')
+                lines.extend(f'    {name}[{index}] = {_generate_reference(rng)}' for index in range(count))
+                lines.append('}')
+            else:
+                lines.extend(f'{name}[{index}] = {_generate_reference(rng)}' for index in range(count))
+        else:
+            lines.append(f'{name} = {_generate_value(rng, property_type)}')
+    for index in range(rng.randrange(3)):
+        lines.append(f'UnknownProperty{index} = {rng.randrange(100)}')
+    return '\n'.join(lines)
+
+
+def get_material_values(material: UMaterial) -> dict[str, Any]:
+    """
+    Returns the values of the properties of the material in a form that can be compared.
+    """
+    def get_value(value: Any) -> Any:
+        if isinstance(value, URotator):
+            return 'URotator', value.Pitch, value.Yaw, value.Roll
+        elif isinstance(value, UColor):
+            return 'UColor', value.R, value.G, value.B, value.A
+        elif isinstance(value, list):
+            return [get_value(element) for element in value]
+        return type(value), value
+
+    return {name: get_value(getattr(material, name)) for name in get_type_hints(type(material))}
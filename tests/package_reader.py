@@ -0,0 +1,260 @@
+"""
+Helpers for testing the package reader in `bdk_addon.package.reader`.
+
+The classes and functions up to `read_package_dependencies` are the original reader, kept verbatim as a reference, since
+the new reader must find the same dependencies. `write_package` writes a package with the given tables, and
+`generate_package` writes a random one, with the irregularities (e.g., nested imports and Windows-1252 names) that the
+reader has to handle.
+"""
+
+from ctypes import Structure, c_uint32, c_uint16, sizeof
+import random
+import struct
+from pathlib import Path
+from typing import BinaryIO
+from enum import Enum
+
+
+class UnrealPackageHeader(Structure):
+    _fields_ = [
+        ('signature', c_uint32),
+        ('version', c_uint16),
+        ('license_mode', c_uint16),
+        ('package_flags', c_uint32),
+        ('name_count', c_uint32),
+        ('name_offset', c_uint32),
+        ('export_count', c_uint32),
+        ('export_offset', c_uint32),
+        ('import_count', c_uint32),
+        ('import_offset', c_uint32),
+    ]
+
+
+class ObjectReferenceType(Enum):
+    """
+    An enumeration of object reference types.
+    """
+    NULL = 0
+    IMPORT_TABLE = 1
+    EXPORT_TABLE = 2
+
+
+class ObjectReference:
+    def __init__(self, type: ObjectReferenceType = ObjectReferenceType.NULL, index: int = 0):
+        self.type = type
+        self.index = index
+
+    @staticmethod
+    def from_buffer_copy(stream: BinaryIO):
+        index = struct.unpack('i', stream.read(4))[0]
+        if index < 0:
+            index = -index - 1
+            object_reference_type = ObjectReferenceType.IMPORT_TABLE
+        elif index > 0:
+            index = index - 1
+            object_reference_type = ObjectReferenceType.EXPORT_TABLE
+        else:
+            object_reference_type = ObjectReferenceType.NULL
+
+        return ObjectReference(object_reference_type, index)
+
+
+class UnrealPackageImport:
+    def __init__(self, class_package: int = 0, class_name: int = 0, object_name: int = 0, package: ObjectReference = ObjectReference()):
+        self.class_package = class_package
+        self.class_name = class_name
+        self.object_name = object_name
+        self.package = package
+
+    @staticmethod
+    def from_buffer_copy(stream: BinaryIO):
+        return UnrealPackageImport(
+            class_package=compact_integer_from_buffer(stream),
+            class_name=compact_integer_from_buffer(stream),
+            package=ObjectReference.from_buffer_copy(stream),
+            object_name=compact_integer_from_buffer(stream),
+        )
+
+
+def compact_integer_from_buffer(stream: BinaryIO) -> int:
+    output = 0
+    signed = False
+    for i in range(5):
+        x = struct.unpack('B', stream.read(1))[0]
+        if i == 0:
+            if x & 0x80 > 0:
+                signed = True
+            output |= x & 0x3F
+            if x & 0x40 == 0:
+                break
+        elif i == 4:
+            output |= (x & 0x1F) << (6 + (3 * 7))
+        else:
+            output |= (x & 0x7F) << (6 + ((i - 1) * 7))
+            if x & 0x80 == 0:
+                break
+
+    if signed:
+        output *= -1
+
+    return output
+
+
+def name_from_buffer(package_version: int, stream: BinaryIO) -> str:
+    name = bytearray()
+    if package_version < 64:
+        # Read null-terminated string.
+        while True:
+            char = stream.read(1)
+            if char == b'\x00':
+                break
+            name.append(char[0])
+    else:
+        # Read single byte for the length of the string (this is definitely a compact integer!)
+        length = compact_integer_from_buffer(stream)
+        name = stream.read(length)
+        # Assert if the string is not null-terminated.
+        assert name[-1] == 0, f'Name is not null-terminated: {name}'
+        # Lop off the null-terminator.
+        name = name[:-1]
+
+    return name.decode('windows-1252')
+
+
+def read_package_dependencies(path: str) -> set[str]:
+    """
+    Load an Unreal package file.
+    """
+    # Load the package file.
+    with open(path, 'rb') as stream:
+        # Parse the header.
+        header = UnrealPackageHeader.from_buffer_copy(stream.read(sizeof(UnrealPackageHeader)))
+
+        # Read the name table.
+        stream.seek(header.name_offset)
+
+        name_table: list[str] = []
+        for _ in range(header.name_count):
+            name = name_from_buffer(header.version, stream)
+            _flags = struct.unpack('I', stream.read(4))[0]
+            name_table.append(name)
+
+        # Read the import table.
+        stream.seek(header.import_offset)
+
+        import_table: list[UnrealPackageImport] = []
+        for _ in range(header.import_count):
+            entry = UnrealPackageImport.from_buffer_copy(stream)
+            import_table.append(entry)
+
+        import_packages: set[str] = set()
+
+        for entry in import_table:
+            # Recurse through the package hierarchy.
+            if entry.package.type == ObjectReferenceType.IMPORT_TABLE:
+                def recurse_import_table(import_table: list[UnrealPackageImport], index: int) -> UnrealPackageImport:
+                    entry = import_table[index]
+                    if entry.package.type == ObjectReferenceType.IMPORT_TABLE:
+                        return recurse_import_table(import_table, entry.package.index)
+                    else:
+                        return entry
+
+                package = recurse_import_table(import_table, entry.package.index)
+                package_name = name_table[package.object_name]
+
+                import_packages.add(package_name)
+
+        return import_packages
+
+
+def encode_compact_integer(value: int) -> bytes:
+    """
+    Encodes a compact integer, the inverse of `compact_integer_from_buffer`.
+    """
+    sign = 0x80 if value < 0 else 0
+    value = abs(value)
+    data = bytearray([sign | (value & 0x3F) | (0x40 if value >= 0x40 else 0)])
+    value >>= 6
+    for index in range(4):
+        if data[-1] & (0x40 if index == 0 else 0x80) == 0:
+            break
+        if index < 3:
+            data.append((value & 0x7F) | (0x80 if value >= 0x80 else 0))
+            value >>= 7
+        else:
+            data.append(value & 0x1F)
+    return bytes(data)
+
+
+def encode_name(version: int, name: bytes) -> bytes:
+    if version < 64:
+        return name + b'\x00' + struct.pack('<I', 0)
+    return encode_compact_integer(len(name) + 1) + name + b'\x00' + struct.pack('<I', 0)
+
+
+def write_package(path: Path, version: int, names: list[bytes],
+                  imports: list[tuple[int, int, int, int]],
+                  exports: list[tuple[int, int, int, int, int, int, int]]) -> Path:
+    """
+    Writes a package with the given name table, import table (class package, class name, package index, object name)
+    and export table (class index, super index, package index, object name, flags, serial size, serial offset).
+    """
+    header_size = 36
+    name_table = b''.join(encode_name(version, name) for name in names)
+    import_table = b''.join(encode_compact_integer(class_package) + encode_compact_integer(class_name) +
+                            struct.pack('<i', package_index) + encode_compact_integer(object_name)
+                            for class_package, class_name, package_index, object_name in imports)
+    export_table = b''.join(encode_compact_integer(class_index) + encode_compact_integer(super_index) +
+                            struct.pack('<i', package_index) + encode_compact_integer(object_name) +
+                            struct.pack('<I', flags) + encode_compact_integer(serial_size) +
+                            (encode_compact_integer(serial_offset) if serial_size > 0 else b'')
+                            for class_index, super_index, package_index, object_name, flags, serial_size, serial_offset
+                            in exports)
+    # Leave some padding between the tables, so that the offsets in the header are actually used.
+    name_offset = header_size + 7
+    export_offset = name_offset + len(name_table) + 3
+    import_offset = export_offset + len(export_table) + 5
+    header = struct.pack('<IHHIIIIIII', 0x9E2A83C1, version, 0, 0, len(names), name_offset, len(exports),
+                         export_offset, len(imports), import_offset)
+    data = bytearray(import_offset + len(import_table) + 16)
+    data[:header_size] = header
+    data[name_offset:name_offset + len(name_table)] = name_table
+    data[export_offset:export_offset + len(export_table)] = export_table
+    data[import_offset:import_offset + len(import_table)] = import_table
+    path.write_bytes(bytes(data))
+    return path
+
+
+def _generate_name(rng: random.Random) -> bytes:
+    name = ''.join(rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_')
+                   for _ in range(rng.randrange(1, 24)))
+    if rng.random() < 0.02:
+        # Windows-1252 characters, some of which differ from Latin-1 (e.g., 0x80 is the euro sign).
+        name += rng.choice(['\xe9', '\u20ac', '\u2122', '\xfc'])
+    if rng.random() < 0.005:
+        # A name long enough that its length takes two bytes.
+        name *= 20
+    return name.encode('windows-1252')
+
+
+def generate_package(rng: random.Random, path: Path, max_name_count: int = 2000, max_import_count: int = 400,
+                     max_export_count: int = 800) -> Path:
+    """
+    Writes a random package header and name, import and export tables to the path. Each import is in a top-level
+    package or in an earlier import, so the imports form a hierarchy of nested packages.
+    """
+    version = rng.choice([61, 63, 68, 69, 100, 128])
+    names = list({_generate_name(rng) for _ in range(rng.randrange(8, max_name_count))})
+    name_count = len(names)
+    imports = []
+    for index in range(rng.randrange(0, max_import_count)):
+        package_index = -rng.randrange(1, index + 1) if index > 0 and rng.random() < 0.7 else 0
+        imports.append((rng.randrange(name_count), rng.randrange(name_count), package_index, rng.randrange(name_count)))
+    exports = []
+    for index in range(rng.randrange(0, max_export_count)):
+        class_index = -rng.randrange(1, len(imports) + 1) if imports and rng.random() < 0.9 else 0
+        package_index = rng.randrange(0, index + 1)
+        serial_size = rng.choice([0, rng.randrange(1, 1 << 20)])
+        exports.append((class_index, 0, package_index, rng.randrange(name_count), rng.getrandbits(32), serial_size,
+                        rng.randrange(1, 1 << 26) if serial_size > 0 else 0))
+    return write_package(path, version, names, imports, exports)
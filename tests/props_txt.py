@@ -0,0 +1,284 @@
+"""
+Helpers for testing the props.txt parser in `bdk_addon.convert_props_txt_to_json`.
+
+The functions up to `parse_props_txt_file_content` are the original parser, kept verbatim as a reference, since the
+single-pass parser must produce the same results. `generate_props_txt_content` generates random props.txt content in
+the format that umodel exports, along with the irregularities that the parser has to handle.
+"""
+
+import random
+import re
+
+
+def get_line_key(line):
+    """Get key from line or return None if not found.
+    EG from 'VectorParameterValues[1] = \n' return 'VectorParameterValues[1]',
+    from 'ParameterName = Emissive Color' return 'ParameterName'
+    """
+    res = re.search(r"(?P<key>[a-zA-Z\d\[\]\s]+)=", line)
+    if not res:
+        return None
+    else:
+        return res.group("key").strip()
+
+
+def get_text_until_closing_bracket(lines, lines_starting_index):
+    """
+    Get text from first opening bracket to corresponding closing bracket, return line numbers for this text block
+    """
+    text = ""
+    bracket_detected = False
+    bracket_counter = 0
+    lines_to_skip = []
+
+    for i, line in enumerate(lines):
+        for char in line:
+            if char == "{":
+                bracket_detected = True
+                bracket_counter += 1
+            if char == "}":
+                bracket_counter -= 1
+            text += char
+            if bracket_detected and bracket_counter == 0:
+                lines_to_skip.append(lines_starting_index + i)
+                return text, lines_to_skip
+        lines_to_skip.append(lines_starting_index + i)
+        text += "\n"
+    raise ValueError("Bracket not closed")
+
+
+def strip_brackets_from_string_once_if_needed (string):
+    """
+    Convert string '  { add: {badad: 1313}   }  ' to 'add: {badad: 1313}',
+    raise error if string is '  { add: {badad: 1313}  ' (missing opening or closing bracket)
+    """
+    new_string = string.strip()
+    opening_bracket = False
+    closing_bracket = False
+
+    # Forward pass
+    for i, char in enumerate(new_string):
+        if char == "{":
+            opening_bracket = True
+            new_string = new_string[i + 1:]
+            break
+    # Backward pass
+    for i, char in enumerate(new_string[::-1]):
+        if char == "}":
+            closing_bracket = True
+            new_string = new_string[:len(new_string) - i - 1]
+            break
+    if not closing_bracket and opening_bracket:
+        raise ValueError("Closing bracket missing", string)
+    if not opening_bracket and closing_bracket:
+        raise ValueError("Opening bracket missing", string)
+    else:
+        return new_string
+
+
+def boolify_nullify(s):
+    if s.lower() in ['true']:
+        return True
+    if s.lower() in ['false']:
+        return False
+    if s.lower() in ['none', 'null']:
+        return None
+    raise ValueError(f"Couldn't boolify-nullify {s}")
+
+
+def auto_convert(s):
+    for fn in (boolify_nullify, int, float):
+        try:
+            return fn(s)
+        except ValueError:
+            pass
+    return s
+
+
+def remove_index_from_key(string):
+    return re.search(r"(?P<key>[a-zA-Z\d\s]+)", string).group("key")
+
+
+def parse_inline_value(string):
+    """
+    Parse inline nested structure string, eg, '{ Name=None }' or '{ R=1, G=1, B=1, A=0 }'
+    """
+    if not string.strip():
+        return {}
+    parts = string.split(",")
+    is_object = any(map(lambda x: "=" in x, parts))
+    if is_object:
+        data = {}
+        for part in parts:
+            key, value = part.split("=")
+            key = key.strip()
+            data[key] = auto_convert(value.strip())
+    else:
+        data = []
+        for part in parts:
+            data.append(auto_convert(part.strip()))
+    return data
+
+
+def parse_props_txt_file_content(content):
+    """
+    Parse content similar to
+    '''
+    VectorParameterValues[1] =
+    {
+        VectorParameterValues[0] =
+        {
+            ParameterName = Emissive Color
+            ParameterValue = { R=1, G=1, B=1, A=0 }
+            ParameterInfo = { Name=None }
+        }
+    }
+    Parent = Material3'/EternalCrusade/Content/Materials/Templates/M_Template.M_Template'
+    BasePropertyOverrides =
+    {
+        bOverride_BlendMode = false
+        BlendMode = BLEND_Opaque (0)
+        bOverride_TwoSided = false
+        TwoSided = false
+    }
+    FlattenedTexture = None
+    '''
+    """
+    data = {}
+    lines = content.split("\n")
+
+    lines_to_skip = []
+    for i, line in enumerate(lines):
+        if i in lines_to_skip:
+            continue
+        key = get_line_key(line)
+        if not key:
+            continue
+        value_raw = "=".join(line.split("=")[1:]).strip()
+
+        if not value_raw:
+            # Is nested structure, start from next line
+            content, t_lines_to_skip = get_text_until_closing_bracket(lines[i + 1:], i + 1)
+            # Don't iterate through lines that are inside nested block
+            lines_to_skip += t_lines_to_skip
+
+            content = strip_brackets_from_string_once_if_needed(content)
+            value = parse_props_txt_file_content(content)
+        else:
+            if "{" in value_raw:
+                # Still nested structure, but 1-line
+                content = strip_brackets_from_string_once_if_needed(value_raw)
+                value = parse_inline_value(content)
+            else:
+                value = auto_convert(value_raw)
+        data[key] = value
+
+    return data
+
+
+
+
+_KEY_NAMES = ('Material', 'Diffuse', 'Opacity', 'Color', 'FadePeriod', 'bOverride_BlendMode', 'ParameterName',
+              'TexCoordSource', 'UClampMode', 'Pan Rate', 'Format', 'SurfaceType', 'X', 'Y', 'Z', 'R', 'G', 'B', 'A')
+
+# Characters that are unusual in keys and values, but that the parser must treat like the original does (e.g., Unicode
+# digits and whitespace that `\d` and `\s` match, and characters that are not part of a key).
+_ODD_CHARACTERS = ('_', '.', '-', '(', ')', '\'', '/', ' ', '\t', '١', 'é', ' ', ' ', '\x1c', '=')
+
+
+def _generate_key(rng: random.Random) -> str:
+    key = rng.choice(_KEY_NAMES)
+    if rng.random() < 0.2:
+        key += f'[{rng.randrange(8)}]'
+    if rng.random() < 0.05:
+        key = rng.choice(_ODD_CHARACTERS) + key
+    if rng.random() < 0.05:
+        key += rng.choice(_ODD_CHARACTERS)
+    return key
+
+
+def _generate_scalar(rng: random.Random) -> str:
+    match rng.randrange(11):
+        case 0:
+            return str(rng.randrange(-1000, 1000))
+        case 1:
+            return f'{rng.uniform(-100.0, 100.0):.6f}'
+        case 2:
+            return rng.choice(('true', 'false', 'True', 'FALSE'))
+        case 3:
+            return rng.choice(('None', 'none', 'null', 'NULL'))
+        case 4:
+            return f'BLEND_Opaque ({rng.randrange(8)})'
+        case 5:
+            return f'Texture\'MyPackage.Group{rng.randrange(4)}.Name_{rng.randrange(100)}\''
+        case 6:
+            return 'Emissive Color'
+        case 7:
+            return rng.choice(('1e5', '-0', '+7', '0x10', 'inf', '-Infinity', '1_000', ' 12 '))
+        case 8:
+            return ''.join(rng.choice(_ODD_CHARACTERS) for _ in range(rng.randrange(1, 4)))
+        case 9:
+            return f'{rng.randrange(10)}.{rng.randrange(10)}'
+        case _:
+            return ''
+
+
+def _generate_inline_value(rng: random.Random) -> str:
+    match rng.randrange(6):
+        case 0:
+            return '{ ' + ', '.join(f'{name}={rng.randrange(256)}' for name in 'RGBA') + ' }'
+        case 1:
+            return '{ Name=None }'
+        case 2:
+            return '{ ' + ', '.join(_generate_scalar(rng) for _ in range(rng.randrange(1, 4))) + ' }'
+        case 3:
+            return rng.choice(('{ }', '{}', '{ , }', '{ A=1, B }', '{ A=1=2 }'))
+        case 4:
+            return '{ ' + f'{_generate_key(rng)}={_generate_scalar(rng)}' + ' }' + rng.choice(('', ' ', ' }', 'x'))
+        case _:
+            return '{ X=' + _generate_scalar(rng) + ', Y={ Z=1 } }'
+
+
+def _generate_block(rng: random.Random, depth: int, indent: str) -> list[str]:
+    lines = []
+    for _ in range(rng.randrange(0 if depth > 0 else 1, 6)):
+        key = _generate_key(rng)
+        kind = rng.random()
+        if kind < 0.5:
+            lines.append(f'{indent}{key} = {_generate_scalar(rng)}')
+        elif kind < 0.7:
+            lines.append(f'{indent}{key} = {_generate_inline_value(rng)}')
+        elif kind < 0.9 and depth < 4:
+            lines.append(f'{indent}{key} =' + rng.choice(('', ' ', '\t')))
+            inner_lines = _generate_block(rng, depth + 1, indent + '    ')
+            # The brackets of a nested block are usually on their own lines, but can share a line with its properties
+            # or with each other.
+            match rng.randrange(5):
+                case 0:
+                    if inner_lines:
+                        inner_lines[0] = '{ ' + inner_lines[0].lstrip()
+                    else:
+                        inner_lines = ['{']
+                    lines += inner_lines
+                    lines.append(f'{indent}}}')
+                case 1:
+                    lines.append(f'{indent}{{')
+                    lines += inner_lines
+                    if inner_lines:
+                        lines[-1] += ' }'
+                    else:
+                        lines.append('}')
+                case 2:
+                    lines.append(f'{indent}{{ ' + ' '.join(line.strip() for line in inner_lines[:1]) + ' }')
+                case _:
+                    lines.append(f'{indent}{{')
+                    lines += inner_lines
+                    lines.append(f'{indent}}}')
+        else:
+            # Lines that are not properties, such as blank lines, comments and stray brackets.
+            lines.append(indent + rng.choice(('', '    ', '// comment', 'NoEquals', '{', '}', '{ }', '=', ' = 1')))
+    return lines
+
+
+def generate_props_txt_content(rng: random.Random) -> str:
+    return rng.choice(('\n', '\r\n')).join(_generate_block(rng, 0, ''))
@@ -0,0 +1,87 @@
+"""
+Helpers for testing the terrain info mesh builder in `bdk_addon.terrain.builder`.
+
+`create_terrain_info_mesh` is the original builder, which created the mesh one element at a time with BMesh, kept
+verbatim as a reference, since the new builder must create identical meshes. `get_mesh_arrays` returns the mesh data
+that the two are compared by.
+"""
+
+import bmesh
+import bpy
+import numpy as np
+from bpy.types import Mesh
+
+from bdk_addon.terrain.builder import get_terrain_info_vertex_xy_coordinates
+
+
+def create_terrain_info_mesh(resolution: int, size: float, heightmap: np.ndarray | None = None, edge_turn_bitmap: np.ndarray | None = None) -> Mesh:
+    bm = bmesh.new()
+
+    if heightmap is None:
+        heightmap = np.full(resolution * resolution, fill_value=0, dtype=float)
+
+    terrain_scale = size / resolution
+    coordinates_iter = get_terrain_info_vertex_xy_coordinates(resolution, terrain_scale)
+    coordinates = np.fromiter(((x, y, z) for ((x, y), z) in zip(coordinates_iter, heightmap)), dtype=np.dtype((float, 3)))
+
+    for co in coordinates:
+        bm.verts.new(co)
+
+    bm.verts.ensure_lookup_table()
+
+    # Build the edge turn face indices set.
+    # TODO: Would be nice to make a common function that can do this for both the edge turn bitmap and the quad vis.
+    # TODO: Inefficient to be doing look-ups here I think. Would probably make more sense to build an actual bitmap
+    # and then flip it over Y so that the indexing of the edge turn bitmap and the quads lines up.
+    edge_turn_face_indices = set()
+    if edge_turn_bitmap is not None:
+        edge_turn_bitmap_index = 0
+        for y in reversed(range(resolution - 1)):
+            for x in range(resolution - 1):
+                face_index = (y * resolution) - y + x
+                array_index = edge_turn_bitmap_index >> 5
+                bit_mask = edge_turn_bitmap_index & 0x1F
+                if (edge_turn_bitmap[array_index] & (1 << bit_mask)) == 0:
+                    edge_turn_face_indices.add(face_index)
+                edge_turn_bitmap_index += 1
+            edge_turn_bitmap_index += 1
+
+    # Faces
+    vertex_index = 0
+    indices = [0, 1, resolution + 1, resolution]
+    turned_indices = [resolution, 0, 1, resolution + 1]
+    for y in range(resolution - 1):
+        for x in range(resolution - 1):
+            face_index = (y * resolution) - y + x
+            if face_index in edge_turn_face_indices:
+                face = bm.faces.new(tuple([bm.verts[vertex_index + i] for i in turned_indices]))
+            else:
+                face = bm.faces.new(tuple([bm.verts[vertex_index + i] for i in indices]))
+            face.smooth = True
+            vertex_index += 1
+            face_index += 1
+        vertex_index += 1
+
+    mesh_data = bpy.data.meshes.new('TerrainInfo')
+
+    bm.to_mesh(mesh_data)
+    del bm
+
+    return mesh_data
+
+
+def get_mesh_arrays(mesh_data: Mesh) -> dict[str, np.ndarray]:
+    arrays = dict()
+    for collection_name, attribute_name, dtype, width in (
+            ('vertices', 'co', np.float32, 3),
+            ('edges', 'vertices', np.int32, 2),
+            ('loops', 'vertex_index', np.int32, 1),
+            ('loops', 'edge_index', np.int32, 1),
+            ('polygons', 'loop_start', np.int32, 1),
+            ('polygons', 'loop_total', np.int32, 1),
+            ('polygons', 'use_smooth', bool, 1)):
+        collection = getattr(mesh_data, collection_name)
+        array = np.zeros(len(collection) * width, dtype=dtype)
+        collection.foreach_get(attribute_name, array)
+        arrays[f'{collection_name}.{attribute_name}'] = array
+    return arrays
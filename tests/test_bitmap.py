@@ -0,0 +1,117 @@
+import numpy as np
+import pytest
+
+bpy = pytest.importorskip('bpy')
+
+from bdk_addon.terrain.bitmap import decode_quad_bitmap, encode_quad_bitmap, get_quad_bitmap_size, \
+    get_quad_edge_turn_bits, get_quad_visibility, set_quad_visibility
+from bdk_addon.terrain.builder import create_terrain_info_mesh
+
+
+_sizes = [(2, 2), (3, 3), (5, 4), (9, 9), (16, 16), (17, 33), (33, 17), (64, 64), (65, 65)]
+
+
+def _encode_quad_bitmap_with_loops(quad_bits: np.ndarray, x_size: int, y_size: int, bitmap_size: int) -> np.ndarray:
+    """
+    Encodes the quad bits one at a time, in the order that the terrain exporter used to.
+    """
+    bitmap = np.zeros(bitmap_size, dtype=np.int32)
+    bitmap_index = 0
+    for y in reversed(range(y_size - 1)):
+        for x in range(x_size - 1):
+            if quad_bits[(y * x_size) - y + x]:
+                bitmap[bitmap_index >> 5] |= np.int32(1) << (bitmap_index & 0x1F)
+            bitmap_index += 1
+        bitmap_index += 1
+    return bitmap
+
+
+def _decode_quad_bitmap_with_loops(bitmap: np.ndarray, x_size: int, y_size: int) -> np.ndarray:
+    """
+    Decodes the quad bits one at a time, in the order that the T3D importer used to.
+    """
+    quad_bits = np.zeros((x_size - 1) * (y_size - 1), dtype=bool)
+    bitmap_index = 0
+    for y in reversed(range(y_size - 1)):
+        for x in range(x_size - 1):
+            array_index = bitmap_index >> 5
+            if array_index < len(bitmap):
+                quad_bits[(y * x_size) - y + x] = (int(bitmap[array_index]) >> (bitmap_index & 0x1F)) & 1
+            bitmap_index += 1
+        bitmap_index += 1
+    return quad_bits
+
+
+@pytest.fixture
+def empty_scene():
+    bpy.ops.wm.read_homefile(use_empty=True)
+
+
+@pytest.mark.parametrize('x_size, y_size', _sizes)
+def test_quad_bitmap_round_trip(x_size: int, y_size: int):
+    quad_bits = np.random.default_rng(x_size * y_size).random((x_size - 1) * (y_size - 1)) < 0.5
+    bitmap = encode_quad_bitmap(quad_bits, x_size, y_size)
+    assert bitmap.dtype == np.int32
+    # The bitmap holds every quad, even when `x_size * y_size / 32` rounds down below the last bit (e.g., 9x9).
+    assert len(bitmap) >= get_quad_bitmap_size(x_size, y_size)
+    assert np.array_equal(decode_quad_bitmap(bitmap, x_size, y_size), quad_bits)
+
+
+@pytest.mark.parametrize('x_size, y_size', _sizes)
+def test_quad_bitmap_matches_loops(x_size: int, y_size: int):
+    quad_bits = np.random.default_rng(x_size + y_size).random((x_size - 1) * (y_size - 1)) < 0.5
+    bitmap = encode_quad_bitmap(quad_bits, x_size, y_size)
+    assert np.array_equal(bitmap, _encode_quad_bitmap_with_loops(quad_bits, x_size, y_size, len(bitmap)))
+    assert np.array_equal(decode_quad_bitmap(bitmap, x_size, y_size),
+                          _decode_quad_bitmap_with_loops(bitmap, x_size, y_size))
+
+
+def test_encode_quad_bitmap_fill_value():
+    x_size, y_size = 5, 5
+    quad_bits = np.zeros((x_size - 1) * (y_size - 1), dtype=bool)
+    bitmap = encode_quad_bitmap(quad_bits, x_size, y_size, fill_value=True)
+    # Only the bits of the quads are clear, and the padding bits at the end of each row and of the bitmap are set.
+    assert not np.any(decode_quad_bitmap(bitmap, x_size, y_size))
+    assert bin(int(bitmap[0]) & 0xFFFFFFFF).count('1') == 32 - len(quad_bits)
+
+
+def test_decode_quad_bitmap_signed_and_unsigned():
+    x_size, y_size = 9, 9
+    quad_bits = np.random.default_rng(0).random((x_size - 1) * (y_size - 1)) < 0.5
+    bitmap = encode_quad_bitmap(quad_bits, x_size, y_size)
+    unsigned_bitmap = [int(value) & 0xFFFFFFFF for value in bitmap]
+    assert np.array_equal(decode_quad_bitmap(unsigned_bitmap, x_size, y_size), quad_bits)
+    assert np.array_equal(decode_quad_bitmap(list(map(int, bitmap)), x_size, y_size), quad_bits)
+
+
+def test_decode_quad_bitmap_short():
+    # Bits beyond the end of the bitmap are clear.
+    x_size, y_size = 9, 9
+    quad_bits = decode_quad_bitmap([-1], x_size, y_size)
+    assert np.array_equal(quad_bits, _decode_quad_bitmap_with_loops(np.array([-1]), x_size, y_size))
+    assert np.any(quad_bits) and not np.all(quad_bits)
+
+
+@pytest.mark.parametrize('resolution', [2, 9, 16, 33])
+def test_quad_edge_turn_bits_round_trip(empty_scene, resolution: int):
+    quad_bits = np.random.default_rng(resolution).random((resolution - 1) * (resolution - 1)) < 0.5
+    edge_turn_bitmap = encode_quad_bitmap(quad_bits, resolution, resolution)
+    mesh_data = create_terrain_info_mesh(resolution, resolution * 64.0, edge_turn_bitmap=edge_turn_bitmap)
+    try:
+        assert np.array_equal(get_quad_edge_turn_bits(mesh_data, resolution), quad_bits)
+    finally:
+        bpy.data.meshes.remove(mesh_data)
+
+
+@pytest.mark.parametrize('resolution', [2, 9, 16, 33])
+def test_quad_visibility_round_trip(empty_scene, resolution: int):
+    mesh_data = create_terrain_info_mesh(resolution, resolution * 64.0)
+    try:
+        assert np.all(get_quad_visibility(mesh_data))
+        visibility = np.random.default_rng(resolution).random((resolution - 1) * (resolution - 1)) < 0.5
+        set_quad_visibility(mesh_data, visibility)
+        assert np.array_equal(get_quad_visibility(mesh_data), visibility)
+        material_indices = np.array([polygon.material_index for polygon in mesh_data.polygons])
+        assert np.array_equal(material_indices, np.where(visibility, 0, 1))
+    finally:
+        bpy.data.meshes.remove(mesh_data)
@@ -0,0 +1,101 @@
+import json
+import random
+
+import pytest
+
+from bdk_addon.convert_props_txt_to_json import parse_props_txt_file_content
+
+import props_txt
+
+
+def _parse(parse_function, content: str):
+    """
+    Returns the parsed content as JSON (so that key order is compared and NaN values compare equal), or the type of
+    the exception raised.
+    """
+    try:
+        return json.dumps(parse_function(content))
+    except Exception as error:
+        return type(error)
+
+
+def test_parse_props_txt_file_content():
+    content = '\n'.join((
+        'VectorParameterValues[1] =',
+        '{',
+        '    VectorParameterValues[0] =',
+        '    {',
+        '        ParameterName = Emissive Color',
+        '        ParameterValue = { R=1, G=1, B=1, A=0 }',
+        '        ParameterInfo = { Name=None }',
+        '    }',
+        '}',
+        'Parent = Material3\'/EternalCrusade/Content/Materials/Templates/M_Template.M_Template\'',
+        'BasePropertyOverrides =',
+        '{',
+        '    TwoSided = 1.5',
+        '    BlendMode = BLEND_Opaque (0)',
+        '}',
+        'FlattenedTexture = None',
+    ))
+    assert parse_props_txt_file_content(content) == {
+        'VectorParameterValues[1]': {
+            'VectorParameterValues[0]': {
+                'ParameterName': 'Emissive Color',
+                'ParameterValue': {'R': 1, 'G': 1, 'B': 1, 'A': 0},
+                'ParameterInfo': {'Name': None},
+            },
+        },
+        'Parent': 'Material3\'/EternalCrusade/Content/Materials/Templates/M_Template.M_Template\'',
+        'BasePropertyOverrides': {
+            'TwoSided': 1.5,
+            'BlendMode': 'BLEND_Opaque (0)',
+        },
+        'FlattenedTexture': None,
+    }
+
+
+@pytest.mark.parametrize('content', [
+    'Key = { A=1 }',
+    'Key =\n{ A = 1 }',
+    'Key =\n{ A = 1\n    B = 2\n}',
+    'Key =\n{\n    A = 1 }',
+    'Key =\n{\n}\nB = 2',
+    'Key =\n{\n    Inner =\n    {\n        A = { R=1, G=2 }\n    }\n}',
+    'bOverride_BlendMode = false',
+    'Key =\n{\n    A = 1',
+    'Key = { A=1',
+    'Key = A=1 }',
+    'Key = { A=1=2 }',
+    'Key =\n}\n{ A = 1 }',
+    'Key =\n} }\n{ A = 1 }\nB = 2 { {\nC = 3',
+    'Key =\n{\n    Inner =\n    }\n}',
+    'Key =\n{\n    Inner =\n    {\n    }  }\nB = 2',
+    '.=Key = 1',
+])
+def test_parse_props_txt_file_content_matches_reference(content: str):
+    assert _parse(parse_props_txt_file_content, content) == \
+           _parse(props_txt.parse_props_txt_file_content, content)
+
+
+def test_parse_props_txt_file_content_deeply_nested():
+    # Each block is only scanned once, so deeply nested blocks don't take much longer than flat ones.
+    depth = 300
+    lines = []
+    for index in range(depth):
+        lines += [f'Key{index} =', '{', f'Value = {index}']
+    lines += ['}'] * depth
+    data = parse_props_txt_file_content('\n'.join(lines))
+    for index in range(depth):
+        data = data[f'Key{index}']
+        assert data['Value'] == index
+    assert list(data.keys()) == ['Value']
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_parse_props_txt_file_content_matches_reference_fuzz(seed: int):
+    rng = random.Random(seed)
+    for _ in range(100):
+        content = props_txt.generate_props_txt_content(rng)
+        assert _parse(parse_props_txt_file_content, content) == \
+               _parse(props_txt.parse_props_txt_file_content, content), content
@@ -0,0 +1,114 @@
+import copy
+import gc
+import pickle
+import threading
+import weakref
+from pathlib import Path
+
+import pytest
+
+from bdk_addon.data import UReference
+
+
+@pytest.mark.parametrize('string, fields', [
+    ('StaticMesh\'MyPackage.MyGroup.MyName\'', ('MyPackage', 'MyName', 'StaticMesh', None)),
+    ('Texture\'MyPackage.MyName\'', ('MyPackage', 'MyName', 'Texture', None)),
+    ('Shader\'My Package.My-Name_1\'', ('My Package', 'My-Name_1', 'Shader', None)),
+    ('MyPackage.MyGroup.MyName', ('MyPackage', 'MyName', None, None)),
+    ('MyPackage', ('MyPackage', 'MyPackage', None, None)),
+])
+def test_from_string(string: str, fields: tuple):
+    reference = UReference.from_string(string)
+    assert (reference.package_name, reference.object_name, reference.type_name, reference.group_name) == fields
+
+
+@pytest.mark.parametrize('string', ['None', ''])
+def test_from_string_none(string: str):
+    assert UReference.from_string(string) is None
+
+
+def test_from_string_cached():
+    string = 'Texture\'MyPackage.MyGroup.FromStringCached\''
+    assert UReference.from_string(string) is UReference.from_string(string)
+    assert UReference.from_string(string) is UReference('MyPackage', 'FromStringCached', 'Texture')
+
+
+def test_from_path():
+    reference = UReference.from_path(Path('exports') / 'MyPackage' / 'Texture' / 'MyName.props.txt')
+    assert reference is UReference('MyPackage', 'MyName', 'Texture')
+
+
+def test_str():
+    assert str(UReference('MyPackage', 'MyName', 'Texture')) == 'Texture\'MyPackage.MyName\''
+    assert str(UReference('MyPackage', 'MyName', 'Texture', 'MyGroup')) == 'Texture\'MyPackage.MyGroup.MyName\''
+    assert repr(UReference('MyPackage', 'MyName', 'Texture')) == 'UReference(Texture\'MyPackage.MyName\')'
+    # The string round trips, apart from the group, which `from_string` does not keep.
+    reference = UReference('MyPackage', 'MyName', 'Shader')
+    assert UReference.from_string(str(reference)) is reference
+
+
+def test_interned():
+    reference = UReference('MyPackage', 'Interned', 'Texture')
+    assert UReference('MyPackage', 'Interned', 'Texture') is reference
+    assert UReference('MyPackage', 'Interned', 'Texture', 'MyGroup') is not reference
+    assert UReference('MyPackage', 'Interned', 'Shader') is not reference
+    assert UReference('MyPackage', 'Interned', 'Texture') == reference
+    assert len({reference, UReference('MyPackage', 'Interned', 'Texture')}) == 1
+
+
+def test_interned_across_threads():
+    barrier = threading.Barrier(8)
+    references = []
+
+    def create_reference():
+        barrier.wait()
+        references.append(UReference('MyPackage', 'InternedAcrossThreads', 'Texture'))
+
+    threads = [threading.Thread(target=create_reference) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(references) == 8
+    assert all(reference is references[0] for reference in references)
+
+
+def test_immutable():
+    reference = UReference('MyPackage', 'Immutable', 'Texture')
+    with pytest.raises(AttributeError):
+        reference.object_name = 'Other'
+    with pytest.raises(AttributeError):
+        reference.other = 'Other'
+    assert reference.object_name == 'Immutable'
+
+
+def test_copy_and_pickle_interned():
+    reference = UReference('MyPackage', 'Pickled', 'Texture', 'MyGroup')
+    assert copy.copy(reference) is reference
+    assert copy.deepcopy(reference) is reference
+    assert pickle.loads(pickle.dumps(reference)) is reference
+    assert pickle.loads(pickle.dumps({reference: 1})) == {reference: 1}
+
+
+def test_released_when_unreferenced():
+    reference = UReference('MyPackage', 'Released', 'Texture')
+    reference_ref = weakref.ref(reference)
+    del reference
+    gc.collect()
+    assert reference_ref() is None
+    assert ('MyPackage', 'Released', 'Texture', None) not in UReference._references
+    # A new reference is interned again.
+    assert UReference('MyPackage', 'Released', 'Texture') is UReference('MyPackage', 'Released', 'Texture')
+
+
+def test_from_string_cache_bounded():
+    maxsize = UReference._parse_string.cache_info().maxsize
+    assert maxsize is not None
+    first_reference_ref = weakref.ref(UReference.from_string('Texture\'MyPackage.Bounded0\''))
+    for index in range(1, maxsize + 1):
+        UReference.from_string(f'Texture\'MyPackage.Bounded{index}\'')
+    assert UReference._parse_string.cache_info().currsize <= maxsize
+    # The least recently parsed string has been evicted, and its reference released.
+    gc.collect()
+    assert first_reference_ref() is None
@@ -0,0 +1,32 @@
+import pytest
+
+bpy = pytest.importorskip('bpy')
+
+from bdk_addon.data import UReference
+from bdk_addon.material.importer import import_materials
+
+
+class _FailingMaterialCache:
+    """
+    A material cache that fails to load every material, after the importer has already created the Blender material.
+    """
+    load_time = 0.0
+
+    def prefetch(self, references: list[UReference]):
+        pass
+
+    def load_material(self, reference: UReference):
+        raise OSError(f'Failed to read {reference}')
+
+
+def test_import_materials_removes_only_failed_material():
+    bpy.ops.wm.read_homefile(use_empty=True)
+    # The failed material sorts before the existing materials, so it is not the last material in `bpy.data.materials`.
+    existing_material_names = {'Existing', 'Zebra', 'AFailed'}
+    for name in existing_material_names:
+        bpy.data.materials.new(name)
+
+    materials = import_materials(_FailingMaterialCache(), ['exports/MyPackage/Shader/AFailed.props.txt'])
+
+    assert materials == {'exports/MyPackage/Shader/AFailed.props.txt': None}
+    assert {material.name for material in bpy.data.materials} == existing_material_names
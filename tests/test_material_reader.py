@@ -0,0 +1,83 @@
+import random
+import typing
+from pathlib import Path
+from typing import get_type_hints
+
+import pytest
+
+from bdk_addon.data import UReference
+from bdk_addon.material.data import MaterialTypeRegistry, UCubemap, UMaterialSwitch
+from bdk_addon.material.reader import read_material
+
+import material_reader
+
+
+def _write_material(directory: Path, type_string: str, name: str, content: str) -> Path:
+    path = directory / 'MyPackage' / type_string / f'{name}.props.txt'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+    return path
+
+
+@pytest.mark.parametrize('type_string', sorted(MaterialTypeRegistry._material_type_map.keys()))
+def test_read_material_matches_original(tmp_path: Path, type_string: str):
+    # The original reader did not read array properties, so only the other properties are compared.
+    material_type = MaterialTypeRegistry.get_type_from_string(type_string)
+    array_names = {name for name, property_type in get_type_hints(material_type).items()
+                   if typing.get_origin(property_type) == list}
+    rng = random.Random(type_string)
+    for index in range(20):
+        content = material_reader.generate_material_content(rng, material_type)
+        path = _write_material(tmp_path, type_string, f'Material{index}', content)
+        values = material_reader.get_material_values(read_material(str(path)))
+        reference_values = material_reader.get_material_values(material_reader.read_material(str(path)))
+        for name in array_names:
+            del values[name], reference_values[name]
+        assert values == reference_values, content
+
+
+def test_read_material_array_block(tmp_path: Path):
+    # The elements of an array block are ordered by their index, not by the order that they are written in.
+    path = _write_material(tmp_path, 'MaterialSwitch', 'Switch', '\n'.join((
+        'Current = 1',
+        'Materials[3] =',
+        '{',
+        '    Materials[1] = Shader\'MyPackage.Group.B\'',
+        '    Materials[0] = Texture\'MyPackage.A\'',
+        '    Materials[2] = None',
+        '}',
+    )))
+    material = read_material(str(path))
+    assert isinstance(material, UMaterialSwitch)
+    assert material.Current == 1
+    assert material.Materials == [UReference('MyPackage', 'A', 'Texture'), UReference('MyPackage', 'B', 'Shader'),
+                                  None]
+
+
+def test_read_material_array_elements(tmp_path: Path):
+    # Elements can also be written one at a time, and the missing elements are None.
+    path = _write_material(tmp_path, 'Cubemap', 'Cube', '\n'.join((
+        'Faces[0] = Texture\'MyPackage.Face0\'',
+        'Faces[2] = Texture\'MyPackage.Face2\'',
+        'UClamp = 256',
+    )))
+    material = read_material(str(path))
+    assert isinstance(material, UCubemap)
+    assert material.Faces == [UReference('MyPackage', 'Face0', 'Texture'), None,
+                              UReference('MyPackage', 'Face2', 'Texture')]
+    assert material.UClamp == 256
+    # The default value of the class is shared, so it must not be modified.
+    assert UCubemap.Faces == []
+    assert read_material(str(_write_material(tmp_path, 'Cubemap', 'Empty', 'UClamp = 1'))).Faces == []
+
+
+def test_read_material_unknown_array(tmp_path: Path):
+    # Indexed properties that the material type does not have as an array are ignored.
+    path = _write_material(tmp_path, 'Texture', 'Texture', '\n'.join((
+        'UClamp[0] = 1',
+        'Unknown[0] = 2',
+        'VClamp = 64',
+    )))
+    material = read_material(str(path))
+    assert material.UClamp == 0
+    assert material.VClamp == 64
@@ -0,0 +1,78 @@
+import os
+from pathlib import Path
+
+import pytest
+
+bpy = pytest.importorskip('bpy')
+
+from bdk_addon.bdk.repository.kernel import Manifest
+from bdk_addon.helpers import PackageBlendFileIndex, get_package_blend_file_index
+
+
+def _set_modified_times_to_past(directory: Path):
+    # Directory modified times have a coarse resolution on some file systems, so they are set well in the past to make
+    # sure that the next change is noticed.
+    for root, _, _ in os.walk(directory):
+        os.utime(root, ns=(0, 0))
+
+
+@pytest.fixture
+def asset_library(tmp_path: Path) -> Path:
+    directory = tmp_path / 'assets'
+    (directory / 'Textures' / 'logs').mkdir(parents=True)
+    (directory / 'MyPackage.blend').touch()
+    (directory / 'Textures' / 'MyTextures.blend').touch()
+    (directory / 'Textures' / 'logs' / 'MyTextures.log').touch()
+    (directory / 'Textures' / 'MyTextures.blend1').touch()
+    _set_modified_times_to_past(directory)
+    return directory
+
+
+def test_package_blend_file_index(asset_library: Path):
+    index = PackageBlendFileIndex(asset_library)
+    assert index.get('MyPackage') == str(asset_library / 'MyPackage.blend')
+    assert index.get('MyTextures') == str(asset_library / 'Textures' / 'MyTextures.blend')
+    assert index.get('logs') is None
+    assert index.get('Missing') is None
+    assert not index.is_stale()
+
+
+def test_package_blend_file_index_missing_directory(tmp_path: Path):
+    directory = tmp_path / 'assets'
+    index = get_package_blend_file_index(directory)
+    assert index.get('MyPackage') is None
+    assert get_package_blend_file_index(directory) is index
+    directory.mkdir()
+    (directory / 'MyPackage.blend').touch()
+    assert index.is_stale()
+    assert get_package_blend_file_index(directory).get('MyPackage') == str(directory / 'MyPackage.blend')
+
+
+@pytest.mark.parametrize('change', ['add', 'remove', 'rename'])
+def test_package_blend_file_index_rebuilt_when_directory_changes(asset_library: Path, change: str):
+    index = get_package_blend_file_index(asset_library)
+    assert get_package_blend_file_index(asset_library) is index
+
+    textures_directory = asset_library / 'Textures'
+    match change:
+        case 'add':
+            (textures_directory / 'MyOtherTextures.blend').touch()
+        case 'remove':
+            (textures_directory / 'MyTextures.blend').unlink()
+        case 'rename':
+            (textures_directory / 'MyTextures.blend').rename(textures_directory / 'MyRenamedTextures.blend')
+
+    assert index.is_stale()
+    new_index = get_package_blend_file_index(asset_library)
+    assert new_index is not index
+    assert new_index.get('MyOtherTextures') == (str(textures_directory / 'MyOtherTextures.blend')
+                                                if change == 'add' else None)
+    assert (new_index.get('MyTextures') is None) == (change != 'add')
+    assert (new_index.get('MyRenamedTextures') is not None) == (change == 'rename')
+
+
+def test_package_blend_file_index_rebuilt_when_manifest_written(asset_library: Path, tmp_path: Path):
+    index = get_package_blend_file_index(asset_library)
+    assert get_package_blend_file_index(asset_library) is index
+    Manifest(str(tmp_path / 'manifest.json')).write()
+    assert get_package_blend_file_index(asset_library) is not index
@@ -0,0 +1,96 @@
+import random
+from pathlib import Path
+
+import pytest
+
+from bdk_addon.package.reader import ObjectReferenceType, compact_integer_from_buffer, name_from_buffer, \
+    read_package, read_package_dependencies
+
+import package_reader
+from package_reader import encode_compact_integer, encode_name, write_package
+
+
+_compact_integer_values = [0, 1, 63, 64, 8191, 8192, (1 << 20) - 1, 1 << 20, (1 << 27) - 1, 1 << 27, (1 << 32) - 1, -1,
+                           -63, -64, -8192, -(1 << 27)]
+
+
+@pytest.mark.parametrize('value', _compact_integer_values)
+def test_compact_integer_from_buffer(value: int):
+    data = b'\xff' + encode_compact_integer(value) + b'\xff'
+    assert compact_integer_from_buffer(data, 1) == (value, len(data) - 1)
+
+
+@pytest.mark.parametrize('version', [61, 68])
+def test_name_from_buffer(version: int):
+    # Names are decoded as Windows-1252 (e.g., 0x80 is the euro sign).
+    data = encode_name(version, b'Caf\xe9 \x80')
+    assert name_from_buffer(version, data, 0) == ('Café €', len(data) - 4)
+
+
+@pytest.mark.parametrize('version', [61, 68])
+def test_read_package(tmp_path: Path, version: int):
+    names = [b'Core', b'Engine', b'Class', b'Package', b'Texture', b'MyPackage', b'Group', b'MyTexture', b'None',
+             b'Caf\xe9\x80', b'Long' * 40] + [f'Name{index}'.encode() for index in range(100)]
+    imports = [
+        (0, 3, 0, 0),       # Core (Package)
+        (0, 3, 0, 1),       # Engine (Package)
+        (0, 2, -1, 2),      # Core.Class
+        (0, 2, -2, 4),      # Engine.Texture
+        (0, 3, -2, 106),    # Engine.Name95 (a name index that needs two bytes)
+    ]
+    exports = [
+        (-4, 0, 0, 6, 0x70004, 0, 0),              # Group (a texture with no serial data)
+        (-4, 0, 1, 7, 0x70004, 1234, 100000),      # Group.MyTexture
+        (0, -3, 0, 107, 0x1, 70000, 1 << 28),      # A class
+    ]
+    path = write_package(tmp_path / 'MyPackage.utx', version, names, imports, exports)
+
+    package = read_package(str(path))
+
+    assert package.header.version == version
+    assert package.names == [name.decode('windows-1252') for name in names]
+    assert [(entry.class_package, entry.class_name, entry.package_index, entry.object_name)
+            for entry in package.imports] == imports
+    assert [(entry.class_index, entry.super_index, entry.package_index, entry.object_name, entry.object_flags,
+             entry.serial_size, entry.serial_offset) for entry in package.exports] == exports
+
+    assert package.imports[2].package.type == ObjectReferenceType.IMPORT_TABLE
+    assert package.imports[2].package.index == 0
+    assert package.imports[0].package.type == ObjectReferenceType.NULL
+    assert [package.get_export_class_name(export) for export in package.exports] == ['Texture', 'Texture', 'Class']
+    assert [package.get_export_outer_name(export) for export in package.exports] == [None, 'Group', None]
+    assert package.get_object_name(package.exports[2].super_) == 'Class'
+
+    assert package.get_dependencies() == {'Core', 'Engine'}
+    assert read_package_dependencies(str(path)) == {'Core', 'Engine'}
+
+
+def test_read_package_dependencies_nested(tmp_path: Path):
+    names = [b'Core', b'Package', b'Outer', b'Inner', b'Object', b'Other']
+    imports = [
+        (0, 1, 0, 0),       # Core
+        (0, 1, -1, 2),      # Core.Outer
+        (0, 1, -2, 3),      # Core.Outer.Inner
+        (0, 4, -3, 4),      # Core.Outer.Inner.Object
+        (0, 1, 1, 5),       # An import whose package is an export is not a dependency.
+    ]
+    exports = [(0, 0, 0, 5, 0, 0, 0)]
+    path = write_package(tmp_path / 'Nested.u', 68, names, imports, exports)
+    assert read_package_dependencies(str(path)) == {'Core'}
+
+
+def test_read_package_dependencies_cyclic(tmp_path: Path):
+    # A malformed package whose imports are each other's packages must not hang or recurse forever.
+    names = [b'A', b'B', b'Package']
+    imports = [
+        (0, 2, -2, 0),
+        (0, 2, -1, 1),
+    ]
+    path = write_package(tmp_path / 'Cyclic.u', 68, names, imports, [])
+    assert read_package_dependencies(str(path)) <= {'A', 'B'}
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_read_package_dependencies_matches_original(tmp_path: Path, seed: int):
+    path = package_reader.generate_package(random.Random(seed), tmp_path / f'Generated{seed}.u')
+    assert read_package_dependencies(str(path)) == package_reader.read_package_dependencies(str(path))
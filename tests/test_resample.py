@@ -0,0 +1,103 @@
+import numpy
+import pytest
+
+from bdk_addon.terrain.resample import get_resample_source_coordinates, get_resample_weights, resample_filter_items, \
+    resample_grid, resample_quad_grid
+
+filters = [identifier for identifier, _, _ in resample_filter_items]
+# Pairs of (source, target) resolutions, in both directions.
+resolution_pairs = [(256, 1024), (1024, 256), (64, 128), (128, 8), (2, 8), (8, 2)]
+
+
+@pytest.mark.parametrize('filter', filters)
+@pytest.mark.parametrize('source_size, target_size', resolution_pairs)
+def test_weights_sum_to_one(filter, source_size, target_size):
+    weights = get_resample_weights(source_size, target_size, filter)
+    assert weights.shape == (target_size, source_size)
+    numpy.testing.assert_allclose(weights.sum(axis=1), 1.0)
+
+
+@pytest.mark.parametrize('filter', filters)
+def test_constant_is_preserved(filter):
+    values = numpy.full((16, 16), 3.5)
+    for shape in ((64, 64), (4, 4), (16, 8)):
+        numpy.testing.assert_allclose(resample_grid(values, shape, filter), 3.5)
+
+
+@pytest.mark.parametrize('filter', ['NEAREST', 'BILINEAR', 'BICUBIC'])
+@pytest.mark.parametrize('small_size, large_size', [(256, 1024), (64, 128), (2, 8)])
+def test_round_trip_reproduces_values(filter, small_size, large_size):
+    # Every vertex of the smaller grid is also a vertex of the larger grid, so resampling to the larger grid and back
+    # reproduces the values exactly.
+    values = numpy.random.default_rng(0).uniform(-4096.0, 4096.0, (small_size, small_size))
+    upscaled = resample_grid(values, (large_size, large_size), filter)
+    numpy.testing.assert_allclose(resample_grid(upscaled, (small_size, small_size), filter), values)
+
+
+@pytest.mark.parametrize('filter, source_size, target_size', [
+    ('BILINEAR', 256, 1024), ('BILINEAR', 1024, 256), ('BILINEAR', 64, 128),
+    ('BICUBIC', 256, 1024), ('BICUBIC', 1024, 256), ('BICUBIC', 64, 128),
+    # The area filter blends neighbouring source vertices when upscaling, so it is only linear when downscaling.
+    ('AREA', 1024, 256), ('AREA', 128, 8),
+])
+def test_linear_ramp_is_reproduced(filter, source_size, target_size):
+    # Linear functions are reproduced exactly, except near the edges where the edge values are repeated.
+    x, y = numpy.meshgrid(numpy.arange(source_size), numpy.arange(source_size))
+    source_ramp = 3.0 * x - 2.0 * y
+    coordinates = get_resample_source_coordinates(source_size, target_size)
+    margin = 2.0 + source_size / target_size / 2.0
+    inner = numpy.flatnonzero((coordinates >= margin) & (coordinates <= source_size - 1 - margin))
+    assert len(inner) > 0
+    x, y = numpy.meshgrid(coordinates[inner], coordinates[inner])
+
+    resampled_ramp = resample_grid(source_ramp, (target_size, target_size), filter)
+
+    numpy.testing.assert_allclose(resampled_ramp[numpy.ix_(inner, inner)], 3.0 * x - 2.0 * y)
+
+
+def test_nearest_downscale_takes_every_nth_vertex():
+    values = numpy.arange(64.0).reshape(8, 8)
+    numpy.testing.assert_array_equal(resample_grid(values, (4, 4), 'NEAREST'), values[::2, ::2])
+
+
+def test_area_downscale_averages_covered_vertices():
+    weights = get_resample_weights(8, 4, 'AREA')
+    numpy.testing.assert_allclose(weights[1], [0.0, 0.25, 0.5, 0.25, 0.0, 0.0, 0.0, 0.0])
+    # The window of the first vertex is clipped to the edge of the grid.
+    numpy.testing.assert_allclose(weights[0], [2 / 3, 1 / 3, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0])
+
+
+def test_upscale_repeats_edge_values():
+    values = numpy.array([[0.0, 1.0], [2.0, 3.0]])
+    for filter in filters:
+        resampled = resample_grid(values, (8, 8), filter)
+        # The last vertices lie beyond the last source vertex, where the edge value is repeated.
+        numpy.testing.assert_allclose(resampled[-1, -1], 3.0)
+
+
+def test_trailing_axes_are_resampled_independently():
+    random = numpy.random.default_rng(0)
+    stack = random.uniform(0.0, 1.0, (32, 32, 5, 4))
+    for filter in filters:
+        resampled = resample_grid(stack, (64, 48), filter)
+        assert resampled.shape == (64, 48, 5, 4)
+        numpy.testing.assert_allclose(resampled[:, :, 2, 1], resample_grid(stack[:, :, 2, 1], (64, 48), filter))
+
+
+def test_unknown_filter_raises():
+    with pytest.raises(ValueError):
+        get_resample_weights(4, 8, 'LANCZOS')
+
+
+@pytest.mark.parametrize('small_size, large_size', [(256, 1024), (8, 16), (2, 8)])
+def test_quad_grid_round_trip(small_size, large_size):
+    quads = numpy.random.default_rng(0).integers(0, 2, (small_size - 1, small_size - 1)).astype(bool)
+    upscaled = resample_quad_grid(quads, (large_size, large_size))
+    assert upscaled.shape == (large_size - 1, large_size - 1)
+    numpy.testing.assert_array_equal(resample_quad_grid(upscaled, (small_size, small_size)), quads)
+
+
+def test_quad_grid_takes_nearest_quad():
+    quads = numpy.arange(49).reshape(7, 7)
+    # The center of the quads of the downscaled grid lie in the odd quads of the source grid.
+    numpy.testing.assert_array_equal(resample_quad_grid(quads, (4, 4)), quads[1::2, 1::2])
@@ -0,0 +1,65 @@
+import json
+import os
+
+from bdk_addon.bdk.repository.scanner import DirectoryScanCache, scan_package_patterns
+
+
+def _write_package(path, contents: bytes, modified_time_ns: int):
+    path.write_bytes(contents)
+    os.utime(path, ns=(modified_time_ns, modified_time_ns))
+
+
+def test_scan_finds_packages_in_pattern_order(tmp_path):
+    (tmp_path / 'Textures').mkdir()
+    (tmp_path / 'StaticMeshes').mkdir()
+    _write_package(tmp_path / 'Textures' / 'B.utx', b'b', 1_000_000_000)
+    _write_package(tmp_path / 'Textures' / 'A.utx', b'a', 1_000_000_000)
+    _write_package(tmp_path / 'StaticMeshes' / 'C.usx', b'c', 1_000_000_000)
+    (tmp_path / 'Textures' / 'Readme.txt').write_text('')
+
+    result = scan_package_patterns([str(tmp_path / 'StaticMeshes' / '*.usx'), str(tmp_path / 'Textures' / '*.utx')])
+
+    assert [os.path.basename(path) for path, _, _ in result.packages] == ['C.usx', 'A.utx', 'B.utx']
+
+
+def test_cached_scan_detects_package_modified_in_place(tmp_path):
+    directory = tmp_path / 'Textures'
+    directory.mkdir()
+    package_path = directory / 'A.utx'
+    _write_package(package_path, b'a', 1_000_000_000)
+    pattern = str(directory / '*.utx')
+    cache_path = tmp_path / 'cache' / 'scan.json'
+
+    cache = DirectoryScanCache(cache_path)
+    scan_package_patterns([pattern], cache)
+    cache.write()
+
+    # Rewriting the package in-place does not change the modified time of its directory.
+    directory_modified_time = os.stat(directory).st_mtime_ns
+    _write_package(package_path, b'abc', 2_000_000_000)
+    os.utime(directory, ns=(directory_modified_time, directory_modified_time))
+
+    cache = DirectoryScanCache.from_file(cache_path)
+    result = scan_package_patterns([pattern], cache)
+
+    assert result.skipped_directory_count == 1
+    assert result.packages == [(str(package_path), 3, 2_000_000_000)]
+    assert cache.directories[str(directory)].files['A.utx'] == (3, 2_000_000_000)
+
+
+def test_cache_write_leaves_no_temporary_file(tmp_path):
+    cache_path = tmp_path / 'scan.json'
+    cache = DirectoryScanCache(cache_path)
+    cache.directories['Textures'] = DirectoryScanCache.Directory(1, {'A.utx': (2, 3)})
+    cache.write()
+
+    assert os.listdir(tmp_path) == ['scan.json']
+    assert DirectoryScanCache.from_file(cache_path).directories['Textures'].files == {'A.utx': (2, 3)}
+
+
+def test_malformed_cache_is_discarded(tmp_path):
+    cache_path = tmp_path / 'scan.json'
+    for contents in ('{"directories": {"Textures": {"modified', '{}', '[]', '{"directories": {"Textures": {}}}',
+                     '{"directories": {"Textures": {"modified_time": 1, "files": [["A.utx", 2]]}}}'):
+        cache_path.write_text(contents)
+        assert DirectoryScanCache.from_file(cache_path).directories == {}
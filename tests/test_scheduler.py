@@ -0,0 +1,215 @@
+import itertools
+import random
+import threading
+import time
+
+import pytest
+
+networkx = pytest.importorskip('networkx')
+
+from bdk_addon.bdk.repository.scheduler import condense_dependency_cycles, get_dependent_nodes, \
+    get_critical_path_priorities, run_dependency_schedule
+
+
+def _get_reachability(graph: networkx.DiGraph, nodes: list) -> set[tuple]:
+    return {(node, descendant) for node in nodes for descendant in networkx.descendants(graph, node)
+            if descendant in nodes}
+
+
+def test_condense_dependency_cycles_acyclic():
+    graph = networkx.DiGraph([('A', 'B'), ('B', 'C'), ('A', 'C')])
+    assert condense_dependency_cycles(graph) == []
+    assert set(graph.edges) == {('A', 'B'), ('B', 'C'), ('A', 'C')}
+
+
+def test_condense_dependency_cycles_self_loop():
+    graph = networkx.DiGraph([('A', 'A'), ('A', 'B')])
+    assert condense_dependency_cycles(graph) == [['A']]
+    assert set(graph.edges) == {('A', 'B')}
+
+
+def test_condense_dependency_cycles():
+    # B and C depend on each other, and the cycle sits between D and E (dependencies) and A and F (dependents).
+    graph = networkx.DiGraph([('A', 'B'), ('B', 'C'), ('C', 'B'), ('B', 'D'), ('C', 'E'), ('F', 'C')])
+    assert condense_dependency_cycles(graph) == [['B', 'C']]
+    assert networkx.is_directed_acyclic_graph(graph)
+    assert set(graph.edges) == {
+        ('B', ('CYCLE_DEPENDENCIES', 0)), ('C', ('CYCLE_DEPENDENCIES', 0)),
+        (('CYCLE_DEPENDENCIES', 0), 'D'), (('CYCLE_DEPENDENCIES', 0), 'E'),
+        (('CYCLE', 0), 'B'), (('CYCLE', 0), 'C'),
+        ('A', ('CYCLE', 0)), ('F', ('CYCLE', 0)),
+    }
+    # Both members come after every dependency of either member, and before every dependent of either member.
+    order = list(reversed(list(networkx.topological_sort(graph))))
+    for member in ('B', 'C'):
+        assert order.index(member) > order.index('D')
+        assert order.index(member) > order.index('E')
+        assert order.index(member) < order.index('A')
+        assert order.index(member) < order.index('F')
+
+
+def test_condense_dependency_cycles_chained():
+    # Two cycles, where the first depends on the second.
+    graph = networkx.DiGraph([('A', 'B'), ('B', 'A'), ('B', 'C'), ('C', 'D'), ('D', 'C'), ('D', 'E')])
+    cycles = condense_dependency_cycles(graph)
+    assert sorted(cycles) == [['A', 'B'], ['C', 'D']]
+    assert networkx.is_directed_acyclic_graph(graph)
+    order = list(reversed(list(networkx.topological_sort(graph))))
+    assert max(order.index('C'), order.index('D')) < min(order.index('A'), order.index('B'))
+    assert order.index('E') < min(order.index('C'), order.index('D'))
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_condense_dependency_cycles_random(seed: int):
+    rng = random.Random(seed)
+    nodes = [f'Package{index}' for index in range(rng.randrange(2, 40))]
+    edge_probability = rng.uniform(0.02, 0.15)
+    graph = networkx.DiGraph()
+    graph.add_nodes_from(nodes)
+    graph.add_edges_from((a, b) for a, b in itertools.product(nodes, repeat=2) if rng.random() < edge_probability)
+
+    original_graph = graph.copy()
+    components = []
+    for component in networkx.strongly_connected_components(original_graph):
+        node = next(iter(component))
+        if len(component) > 1 or original_graph.has_edge(node, node):
+            components.append(sorted(component))
+    component_indices = {node: index for index, component in enumerate(components) for node in component}
+
+    cycles = condense_dependency_cycles(graph)
+
+    assert sorted(cycles) == sorted(components)
+    assert networkx.is_directed_acyclic_graph(graph)
+    # Every node still comes after everything it depended on and before everything that depended on it, apart from
+    # the nodes in the same cycle, which no longer order each other. No other ordering is introduced.
+    original_reachability = _get_reachability(original_graph, nodes)
+    reachability = _get_reachability(graph, nodes)
+    assert reachability == {(a, b) for a, b in original_reachability
+                            if a not in component_indices or component_indices.get(b) != component_indices[a]}
+
+
+def test_condense_dependency_cycles_large_ring():
+    nodes = list(range(20000))
+    graph = networkx.DiGraph(zip(nodes, nodes[1:] + nodes[:1]))
+    assert condense_dependency_cycles(graph) == [nodes]
+    assert networkx.is_directed_acyclic_graph(graph)
+    assert graph.number_of_edges() == len(nodes) * 2
+
+
+def test_get_dependent_nodes():
+    graph = networkx.DiGraph([('A', 'B'), ('B', 'C'), ('D', 'C'), ('E', 'F')])
+    assert get_dependent_nodes(graph, ['C']) == {'A', 'B', 'D'}
+    assert get_dependent_nodes(graph, ['B', 'F']) == {'A', 'E'}
+    assert get_dependent_nodes(graph, ['A', 'Unknown']) == set()
+
+
+def test_get_dependent_nodes_cycle():
+    # B and C depend on each other, so when either changes, the other must be rebuilt too, even though the only
+    # predecessor of each member is the cycle node once the graph has been condensed.
+    graph = networkx.DiGraph([('A', 'B'), ('B', 'C'), ('C', 'B'), ('B', 'D'), ('C', 'E'), ('F', 'C')])
+    cycles = condense_dependency_cycles(graph)
+    for member, other_member in (('B', 'C'), ('C', 'B')):
+        dependents = get_dependent_nodes(graph, [member], cycles)
+        # The member depends on itself through the other member.
+        assert {member, other_member, 'A', 'F'} <= dependents
+        assert not dependents & {'D', 'E'}
+    # A change to a dependency of the cycle reaches every member and their dependents.
+    assert {'B', 'C', 'A', 'F'} <= get_dependent_nodes(graph, ['E'], cycles)
+    assert 'D' not in get_dependent_nodes(graph, ['E'], cycles)
+
+
+def test_get_critical_path_priorities():
+    graph = networkx.DiGraph([('A', 'B'), ('B', 'C'), ('D', 'C'), ('E', 'F')])
+    priorities = get_critical_path_priorities(graph, {'A': 1.0, 'B': 2.0, 'C': 4.0, 'D': 8.0, 'E': 16.0})
+    assert priorities == {'A': 1.0, 'B': 3.0, 'C': 12.0, 'D': 8.0, 'E': 16.0, 'F': 16.0}
+
+
+def test_run_dependency_schedule_starts_when_dependencies_complete():
+    # C only depends on D, so it starts while B (which is at the same depth as D) is still running. Package X has no
+    # job, but still orders A after B.
+    graph = networkx.DiGraph([('A', 'X'), ('X', 'B'), ('C', 'D')])
+    c_started = threading.Event()
+    completed = []
+
+    def build(node: str) -> bool:
+        if node == 'C':
+            c_started.set()
+        elif node == 'B':
+            return c_started.wait(timeout=10.0)
+        return True
+
+    report = run_dependency_schedule(graph, ['A', 'B', 'C', 'D'], build, max_workers=3,
+                                     on_complete=lambda node, result, duration: completed.append((node, result)))
+
+    assert ('B', True) in completed
+    assert completed.index(('D', True)) < completed.index(('C', True))
+    assert completed.index(('B', True)) < completed.index(('A', True))
+    assert set(report.start_order) == {'A', 'B', 'C', 'D'}
+    assert report.start_order.index('C') < report.start_order.index('A')
+
+
+def test_run_dependency_schedule_priority_order():
+    # With one worker, the ready nodes with the longest chain of dependent work go first: A (1 + 5 for its dependent
+    # B), then B, which becomes ready when A completes, then C.
+    graph = networkx.DiGraph([('B', 'A')])
+    graph.add_node('C')
+    durations = {'A': 1.0, 'B': 5.0, 'C': 3.0}
+    report = run_dependency_schedule(graph, ['A', 'B', 'C'], lambda node: None, max_workers=1, durations=durations)
+    assert report.start_order == ['A', 'B', 'C']
+    # Without the dependent, C has the longer estimated duration and goes first.
+    report = run_dependency_schedule(graph, ['A', 'C'], lambda node: None, max_workers=1, durations=durations)
+    assert report.start_order == ['C', 'A']
+
+
+def test_run_dependency_schedule_concurrency_limit():
+    lock = threading.Lock()
+    running_count = 0
+    max_running_count = 0
+
+    def build(node: int):
+        nonlocal running_count, max_running_count
+        with lock:
+            running_count += 1
+            max_running_count = max(max_running_count, running_count)
+        time.sleep(0.01)
+        with lock:
+            running_count -= 1
+
+    graph = networkx.DiGraph()
+    graph.add_nodes_from(range(12))
+    report = run_dependency_schedule(graph, range(12), build, max_workers=3)
+    assert max_running_count == 3
+    assert len(report.durations) == 12
+
+
+def test_run_dependency_schedule_utilization():
+    graph = networkx.DiGraph()
+    graph.add_nodes_from(['A', 'B', 'C'])
+    report = run_dependency_schedule(graph, ['A', 'B', 'C'], lambda node: time.sleep(0.05), max_workers=2)
+    assert report.worker_count == 2
+    assert report.busy_time == pytest.approx(sum(report.durations.values()))
+    assert report.busy_time >= 0.15
+    assert report.utilization == pytest.approx(report.busy_time / (report.wall_time * 2))
+    # Three equal jobs on two workers take two rounds, so at most three quarters of the worker time is used.
+    assert 0.5 < report.utilization <= 0.76
+
+
+def test_run_dependency_schedule_exception():
+    # The exception is re-raised once the running jobs have finished, and no further jobs are started.
+    graph = networkx.DiGraph([('A', 'B')])
+    graph.add_node('C')
+    started = []
+    completed = []
+
+    def build(node: str):
+        started.append(node)
+        if node == 'B':
+            raise ValueError('Failed to build B')
+        time.sleep(0.05)
+
+    with pytest.raises(ValueError, match='Failed to build B'):
+        run_dependency_schedule(graph, ['A', 'B', 'C'], build, max_workers=2,
+                                on_complete=lambda node, result, duration: completed.append(node))
+
+    assert 'A' not in started
+    assert completed == [node for node in started if node != 'B']
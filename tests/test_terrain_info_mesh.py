@@ -0,0 +1,42 @@
+import numpy
+import pytest
+
+bpy = pytest.importorskip('bpy')
+
+from bdk_addon.terrain.builder import create_terrain_info_mesh
+
+import terrain_info_mesh
+
+
+@pytest.fixture(autouse=True)
+def empty_file():
+    bpy.ops.wm.read_homefile(use_empty=True)
+
+
+def _assert_meshes_equal(mesh_data, reference_mesh_data):
+    arrays = terrain_info_mesh.get_mesh_arrays(mesh_data)
+    reference_arrays = terrain_info_mesh.get_mesh_arrays(reference_mesh_data)
+    for name, array in arrays.items():
+        numpy.testing.assert_array_equal(array, reference_arrays[name], err_msg=name)
+    # `validate` returns True if it had to correct the mesh.
+    assert not mesh_data.validate(verbose=True)
+
+
+@pytest.mark.parametrize('resolution', [2, 3, 9, 64])
+def test_create_terrain_info_mesh_matches_bmesh(resolution: int):
+    random = numpy.random.default_rng(resolution)
+    size = resolution * 512.0
+    heightmap = random.uniform(-4096.0, 4096.0, resolution * resolution)
+    edge_turn_bitmap = random.integers(0, 1 << 32, (resolution * resolution + 31) // 32, dtype=numpy.int64)
+
+    mesh_data = create_terrain_info_mesh(resolution, size, heightmap, edge_turn_bitmap)
+    reference_mesh_data = terrain_info_mesh.create_terrain_info_mesh(resolution, size, heightmap, edge_turn_bitmap)
+    _assert_meshes_equal(mesh_data, reference_mesh_data)
+
+
+def test_create_terrain_info_mesh_defaults():
+    # Without a heightmap the terrain is flat, and without an edge turn bitmap every quad is turned.
+    mesh_data = create_terrain_info_mesh(16, 8192.0)
+    reference_mesh_data = terrain_info_mesh.create_terrain_info_mesh(16, 8192.0)
+    _assert_meshes_equal(mesh_data, reference_mesh_data)
+    assert not any(vertex.co.z for vertex in mesh_data.vertices)
@@ -0,0 +1,85 @@
+import numpy
+import pytest
+
+bpy = pytest.importorskip('bpy')
+
+from bdk_addon.helpers import get_vertex_group_weights, set_vertex_group_weights
+
+
+@pytest.fixture
+def grid_object():
+    bpy.ops.wm.read_homefile(use_empty=True)
+    bpy.ops.mesh.primitive_grid_add(x_subdivisions=15, y_subdivisions=15)
+    obj = bpy.context.active_object
+    for name in ('A', 'B', 'C'):
+        obj.vertex_groups.new(name=name)
+    obj.vertex_groups.active_index = obj.vertex_groups['B'].index
+    return obj
+
+
+def _get_vertex_group_names(obj) -> list[str]:
+    return [vertex_group.name for vertex_group in obj.vertex_groups]
+
+
+def test_weights_round_trip(grid_object):
+    random = numpy.random.default_rng(0)
+    vertex_count = len(grid_object.data.vertices)
+    weights = {name: random.uniform(0.0, 1.0, vertex_count).astype(numpy.float32) for name in ('A', 'C')}
+    weights['A'][::3] = 0.0
+
+    set_vertex_group_weights(bpy.context, grid_object, weights)
+    result = get_vertex_group_weights(bpy.context, grid_object, ['A', 'B', 'C'])
+
+    numpy.testing.assert_array_equal(result['A'], weights['A'])
+    numpy.testing.assert_array_equal(result['B'], numpy.zeros(vertex_count))
+    numpy.testing.assert_array_equal(result['C'], weights['C'])
+    # Vertices with a weight of 0 are not assigned to the vertex group.
+    vertex_group_index = grid_object.vertex_groups['A'].index
+    assert not any(group.group == vertex_group_index for group in grid_object.data.vertices[0].groups)
+
+
+def test_replacing_keeps_order_and_active_vertex_group(grid_object):
+    vertex_count = len(grid_object.data.vertices)
+
+    set_vertex_group_weights(bpy.context, grid_object,
+                             {'A': numpy.full(vertex_count, 0.5), 'D': numpy.ones(vertex_count)})
+
+    assert _get_vertex_group_names(grid_object) == ['A', 'B', 'C', 'D']
+    assert grid_object.vertex_groups.active.name == 'B'
+    assert [attribute.name for attribute in grid_object.data.attributes if attribute.name.startswith('bdk_')] == []
+
+
+def test_failed_conversion_keeps_weights(grid_object):
+    vertex_count = len(grid_object.data.vertices)
+    weights = numpy.linspace(0.0, 1.0, vertex_count)
+    set_vertex_group_weights(bpy.context, grid_object, {'A': weights})
+
+    # The weights of the second vertex group cannot be written, after the first has already been converted.
+    with pytest.raises(RuntimeError):
+        set_vertex_group_weights(bpy.context, grid_object, {'A': numpy.zeros(vertex_count), 'E': weights[:-1]})
+
+    assert _get_vertex_group_names(grid_object) == ['A', 'B', 'C']
+    assert [attribute.name for attribute in grid_object.data.attributes if attribute.name.startswith('bdk_')] == []
+    result = get_vertex_group_weights(bpy.context, grid_object, ['A'])
+    numpy.testing.assert_allclose(result['A'], weights, atol=1e-6)
+
+
+def test_setting_weights_in_edit_mode_fails(grid_object):
+    bpy.ops.object.mode_set(mode='EDIT')
+    with pytest.raises(RuntimeError):
+        set_vertex_group_weights(bpy.context, grid_object, {'A': numpy.zeros(len(grid_object.data.vertices))})
+    bpy.ops.object.mode_set(mode='OBJECT')
+
+    assert _get_vertex_group_names(grid_object) == ['A', 'B', 'C']
+
+
+def test_reading_weights_leaves_no_temporary_data(grid_object):
+    scene_count = len(bpy.data.scenes)
+    object_count = len(bpy.data.objects)
+    node_group_count = len(bpy.data.node_groups)
+
+    get_vertex_group_weights(bpy.context, grid_object, ['A', 'B'])
+
+    assert len(bpy.data.scenes) == scene_count
+    assert len(bpy.data.objects) == object_count
+    assert len(bpy.data.node_groups) == node_group_count